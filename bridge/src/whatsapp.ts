@@ -9,6 +9,7 @@ import makeWASocket, {
   useMultiFileAuthState,
   fetchLatestBaileysVersion,
   makeCacheableSignalKeyStore,
+  downloadMediaMessage,
 } from '@whiskeysockets/baileys';
 
 import { Boom } from '@hapi/boom';
@@ -24,6 +25,8 @@ export interface InboundMessage {
   content: string;
   timestamp: number;
   isGroup: boolean;
+  audio?: string; // base64 voice note, for transcription on the Python side
+  mimetype?: string;
 }
 
 export interface WhatsAppClientOptions {
@@ -121,6 +124,17 @@ export class WhatsAppClient {
 
         const isGroup = msg.key.remoteJid?.endsWith('@g.us') || false;
 
+        let audio: string | undefined;
+        const audioMessage = msg.message?.audioMessage;
+        if (audioMessage) {
+          try {
+            const buffer = await downloadMediaMessage(msg, 'buffer', {});
+            audio = (buffer as Buffer).toString('base64');
+          } catch (err) {
+            console.error('Failed to download voice message:', err);
+          }
+        }
+
         this.options.onMessage({
           id: msg.key.id || '',
           sender: msg.key.remoteJid || '',
@@ -128,6 +142,8 @@ export class WhatsAppClient {
           content,
           timestamp: msg.messageTimestamp as number,
           isGroup,
+          audio,
+          mimetype: audioMessage?.mimetype || undefined,
         });
       }
     });
@@ -0,0 +1,130 @@
+"""Compaction of tool results the model has already read."""
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+from nanobot.session.blobs import BlobStore
+
+if TYPE_CHECKING:
+    from nanobot.config.schema import CompactionConfig
+
+
+class ResultStore:
+    """
+    Full tool results kept in memory under a short content hash.
+
+    Least recently used entries are dropped once the stored text exceeds
+    ``max_chars``. Refs not found in memory are looked up in ``backing``
+    (the session blob store), so results persisted with a session can be
+    read again in later turns.
+    """
+
+    def __init__(self, max_chars: int = 5_000_000, backing: "BlobStore | None" = None):
+        self.max_chars = max_chars
+        self.backing = backing
+        self._items: OrderedDict[str, str] = OrderedDict()
+        self._size = 0
+
+    def put(self, text: str) -> str:
+        ref = BlobStore.ref_for(text)
+        if ref in self._items:
+            self._items.move_to_end(ref)
+            return ref
+        self._items[ref] = text
+        self._size += len(text)
+        while self._size > self.max_chars and len(self._items) > 1:
+            _, old = self._items.popitem(last=False)
+            self._size -= len(old)
+        return ref
+
+    def get(self, ref: str) -> str | None:
+        text = self._items.get(ref)
+        if text is not None:
+            self._items.move_to_end(ref)
+        elif self.backing:
+            text = self.backing.get(ref)
+        return text
+
+
+class ToolResultCompactor:
+    """
+    Shrinks tool results once the model has seen them in full.
+
+    A result longer than its tool's threshold (``thresholds`` overrides the
+    default ``threshold``) is replaced by its head and tail plus a reference
+    into ``store``; the model can fetch the rest with ``read_tool_result``.
+    Results are only compacted after one LLM round has consumed them, so the
+    model always gets the complete output once.
+    """
+
+    EXEMPT = frozenset({"read_tool_result"})
+
+    def __init__(
+        self,
+        threshold: int = 4000,
+        thresholds: dict[str, int] | None = None,
+        head_chars: int = 1500,
+        tail_chars: int = 500,
+        store: ResultStore | None = None,
+    ):
+        self.threshold = threshold
+        self.thresholds = thresholds or {}
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.store = store or ResultStore()
+
+    def limit_for(self, tool_name: str) -> int:
+        """Compaction threshold for a tool (0 = never compact)."""
+        if tool_name in self.EXEMPT:
+            return 0
+        return self.thresholds.get(tool_name, self.threshold)
+
+    def compact_text(self, tool_name: str, text: str) -> str:
+        limit = self.limit_for(tool_name)
+        if not limit or len(text) <= max(limit, self.head_chars + self.tail_chars):
+            return text
+        return self.shorten(text, self.store.put(text))
+
+    def shorten(self, text: str, ref: str) -> str:
+        """Head and tail of ``text`` with a note pointing at ``ref``."""
+        if len(text) <= self.head_chars + self.tail_chars:
+            return text
+        omitted = len(text) - self.head_chars - self.tail_chars
+        tail = text[-self.tail_chars:] if self.tail_chars else ""
+        return (
+            f"{text[:self.head_chars]}\n"
+            f"[... {omitted} of {len(text)} chars omitted. "
+            f'Use read_tool_result(ref="{ref}", offset={self.head_chars}) to read them ...]\n'
+            f"{tail}"
+        )
+
+    def compact(self, messages: list[dict[str, Any]], start: int, end: int) -> int:
+        """Compact tool messages in ``messages[start:end]``; returns chars saved."""
+        saved = 0
+        for i in range(start, min(end, len(messages))):
+            msg = messages[i]
+            content = msg.get("content")
+            if msg.get("role") != "tool" or not isinstance(content, str):
+                continue
+            compacted = self.compact_text(msg.get("name", ""), content)
+            if compacted is not content:
+                messages[i] = {**msg, "content": compacted}
+                saved += len(content) - len(compacted)
+        return saved
+
+
+def make_compactor(
+    config: "CompactionConfig | None", backing: BlobStore | None = None
+) -> ToolResultCompactor | None:
+    """Build a compactor from config (None when compaction is disabled)."""
+    from nanobot.config.schema import CompactionConfig
+    config = config or CompactionConfig()
+    if not config.enabled:
+        return None
+    return ToolResultCompactor(
+        threshold=config.threshold,
+        thresholds=dict(config.thresholds),
+        head_chars=config.head_chars,
+        tail_chars=config.tail_chars,
+        store=ResultStore(backing=backing),
+    )
@@ -0,0 +1,192 @@
+"""Background memory consolidation worker."""
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from nanobot.session.manager import Session
+
+
+@dataclass
+class ConsolidationJob:
+    """A session whose unconsolidated messages should be summarized."""
+
+    session: Session
+    archive_all: bool = False
+    attempts: int = 0
+    not_before: float = 0.0
+    # Filled in when the job is picked up, so late messages land in the next run
+    messages: list[dict] = field(default_factory=list)
+    end: int = 0
+    source: list[dict] | None = None
+
+    @property
+    def key(self) -> str:
+        return self.session.key
+
+    def snapshot(self, keep_count: int) -> bool:
+        """Capture the pending range; returns False when there is nothing to do."""
+        self.source = self.session.messages
+        if self.archive_all:
+            self.end = len(self.session.messages)
+            self.messages = self.session.messages[self.session.last_consolidated:]
+        else:
+            self.end = len(self.session.messages) - keep_count
+            self.messages = self.session.messages[self.session.last_consolidated:max(self.end, 0)]
+        return bool(self.messages)
+
+
+ConsolidateFn = Callable[[list[ConsolidationJob]], Awaitable[None]]
+
+
+class ConsolidationWorker:
+    """
+    Serializes memory consolidation behind a single background task.
+
+    Sessions are enqueued after each message; repeated requests for the same
+    session collapse into one pending job (single-flight), and a session that
+    is already being consolidated is re-queued once the current run finishes.
+    The worker waits for ``debounce_s`` of quiet before running, then hands up
+    to ``max_batch`` sessions to ``consolidate`` in one call. Failed batches
+    are retried with exponential backoff up to ``max_retries`` times.
+    """
+
+    def __init__(
+        self,
+        consolidate: ConsolidateFn,
+        keep_count: int,
+        debounce_s: float = 2.0,
+        max_batch: int = 4,
+        max_retries: int = 3,
+        retry_base_s: float = 5.0,
+    ):
+        self._consolidate = consolidate
+        self.keep_count = keep_count
+        self.debounce_s = debounce_s
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.retry_base_s = retry_base_s
+        self._pending: dict[str, ConsolidationJob] = {}
+        self._in_flight: set[str] = set()
+        self._requeue: dict[str, ConsolidationJob] = {}
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._last_enqueue = 0.0
+        self._task: asyncio.Task[None] | None = None
+        self._archive_ids = itertools.count(1)
+
+    def enqueue(self, session: Session) -> None:
+        """Request consolidation of a live session's older messages."""
+        self._add(ConsolidationJob(session=session))
+
+    def enqueue_archive(self, key: str, messages: list[dict], last_consolidated: int = 0) -> None:
+        """Archive a detached copy of a session's messages (used by /new)."""
+        session = Session(key=key, messages=messages, last_consolidated=last_consolidated)
+        job = ConsolidationJob(session=session, archive_all=True)
+        # Archives are independent snapshots and never merge with the live session
+        self._pending[f"{key}#archive-{next(self._archive_ids)}"] = job
+        self._notify()
+
+    def _add(self, job: ConsolidationJob) -> None:
+        if job.key in self._in_flight:
+            self._requeue.setdefault(job.key, job)
+        else:
+            self._pending.setdefault(job.key, job)
+        self._notify()
+
+    def _notify(self) -> None:
+        self._last_enqueue = time.monotonic()
+        self._idle.clear()
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending) + len(self._requeue) + len(self._in_flight)
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                if not self._in_flight:
+                    self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            quiet_until = self._last_enqueue + self.debounce_s
+            ready_at = min(job.not_before for job in self._pending.values())
+            delay = max(quiet_until, ready_at) - now
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_batch(now)
+
+    async def _run_batch(self, now: float) -> None:
+        batch: list[tuple[str, ConsolidationJob]] = []
+        for slot, job in list(self._pending.items()):
+            if len(batch) >= self.max_batch:
+                break
+            if job.not_before > now:
+                continue
+            del self._pending[slot]
+            if job.snapshot(self.keep_count):
+                batch.append((slot, job))
+        if not batch:
+            return
+
+        self._in_flight.update(job.key for _, job in batch)
+        try:
+            await self._consolidate([job for _, job in batch])
+        except Exception as e:
+            for slot, job in batch:
+                job.attempts += 1
+                if job.attempts > self.max_retries:
+                    logger.error(f"Memory consolidation for {job.key} failed, giving up: {e}")
+                    continue
+                backoff = self.retry_base_s * 2 ** (job.attempts - 1)
+                job.not_before = time.monotonic() + backoff
+                logger.warning(
+                    f"Memory consolidation for {job.key} failed ({e}), "
+                    f"retry {job.attempts}/{self.max_retries} in {backoff:.0f}s"
+                )
+                self._pending.setdefault(slot, job)
+        else:
+            for _, job in batch:
+                # clear() swaps in a new list, so a session reset mid-run is left alone
+                if not job.archive_all and job.session.messages is job.source:
+                    job.session.last_consolidated = max(job.session.last_consolidated, job.end)
+        finally:
+            for _, job in batch:
+                self._in_flight.discard(job.key)
+                if (queued := self._requeue.pop(job.key, None)) is not None:
+                    self._pending.setdefault(job.key, queued)
+
+    async def flush(self, timeout: float | None = None) -> None:
+        """Wait until every queued consolidation has finished (ignores debounce)."""
+        saved, self.debounce_s = self.debounce_s, 0
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        finally:
+            self.debounce_s = saved
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,148 @@
+"""Full-text index over HISTORY.md."""
+
+import re
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+
+_TIMESTAMP = re.compile(r"^\[(\d{4}-\d{2}-\d{2})(?:[ T](\d{2}:\d{2}))?")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    ts TEXT,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries(ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    content, content='entries', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+@dataclass
+class HistoryHit:
+    """A ranked match from the history index."""
+
+    id: int
+    ts: str | None
+    snippet: str
+
+
+class HistoryIndex:
+    """
+    SQLite FTS5 index over the entries of HISTORY.md.
+
+    The index remembers how many bytes of HISTORY.md it has consumed and
+    indexes only what was appended since, so ``sync()`` after each append is
+    cheap and pre-existing history is imported on first use. If the file
+    shrinks or its head changes (manual edits), the index is rebuilt.
+    """
+
+    def __init__(self, history_file: Path, db_path: Path):
+        self.history_file = history_file
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path)
+        self._db.executescript(_SCHEMA)
+
+    def _meta(self, key: str, default: str = "") -> str:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def sync(self) -> int:
+        """Index entries appended to HISTORY.md since the last sync; returns how many."""
+        if not self.history_file.exists():
+            return 0
+        offset = int(self._meta("offset", "0"))
+        with open(self.history_file, "rb") as f:
+            head = f.read(256)
+            # The stored head only covers what was indexed, and grows with appends
+            # until it reaches 256 bytes; compare just that prefix
+            stored = bytes.fromhex(self._meta("head", ""))
+            if offset > self.history_file.stat().st_size or head[: len(stored)] != stored:
+                logger.info("History index: HISTORY.md was rewritten, rebuilding")
+                self._db.executescript(
+                    "DELETE FROM entries; INSERT INTO entries_fts(entries_fts) VALUES ('delete-all');"
+                )
+                offset = 0
+            f.seek(offset)
+            data = f.read()
+
+        # Only consume complete entries (terminated by a blank line)
+        end = data.rfind(b"\n\n")
+        if end < 0:
+            return 0
+        chunk = data[: end + 2]
+        count = 0
+        for block in chunk.decode("utf-8", errors="replace").split("\n\n"):
+            block = block.strip()
+            if not block:
+                continue
+            m = _TIMESTAMP.match(block)
+            ts = f"{m.group(1)} {m.group(2) or '00:00'}" if m else None
+            self._db.execute("INSERT INTO entries (ts, content) VALUES (?, ?)", (ts, block))
+            count += 1
+        self._set_meta("offset", str(offset + len(chunk)))
+        self._set_meta("head", head[: offset + len(chunk)].hex())
+        self._db.commit()
+        if count:
+            logger.debug(f"History index: indexed {count} new entries")
+        return count
+
+    def search(
+        self,
+        query: str,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 5,
+    ) -> list[HistoryHit]:
+        """Ranked matches for ``query``, optionally restricted to a time range.
+
+        ``since``/``until`` are ISO dates or datetimes (``until`` is inclusive
+        of the whole day when only a date is given).
+        """
+        self.sync()
+        terms = list(dict.fromkeys(t for t in re.findall(r"\w+", query.lower())))[:64]
+        filters, params = [], []
+        if since:
+            filters.append("entries.ts >= ?")
+            params.append(since.replace("T", " ")[:16])
+        if until:
+            filters.append("entries.ts <= ?")
+            params.append(until.replace("T", " ")[:16] if len(until) > 10 else f"{until} 23:59")
+        where = "".join(f" AND {f}" for f in filters)
+
+        if not terms:
+            rows = self._db.execute(
+                f"SELECT id, ts, content FROM entries WHERE 1{where} ORDER BY ts DESC, id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+            return [HistoryHit(id=r[0], ts=r[1], snippet=r[2][:300]) for r in rows]
+
+        sql = (
+            "SELECT entries.id, entries.ts, snippet(entries_fts, 0, '**', '**', ' … ', 32) "
+            "FROM entries_fts JOIN entries ON entries.id = entries_fts.rowid "
+            f"WHERE entries_fts MATCH ?{where} ORDER BY bm25(entries_fts) LIMIT ?"
+        )
+        # Prefer entries containing every term; fall back to any term
+        for joiner in (" AND ", " OR "):
+            match = joiner.join(f'"{t}"' for t in terms)
+            rows = self._db.execute(sql, (match, *params, limit)).fetchall()
+            if rows or len(terms) == 1:
+                break
+        return [HistoryHit(id=r[0], ts=r[1], snippet=r[2]) for r in rows]
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
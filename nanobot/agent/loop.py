@@ -2,7 +2,6 @@
 
 import asyncio
 from contextlib import AsyncExitStack
-import json
 import json_repair
 from pathlib import Path
 from typing import Any
@@ -12,16 +11,24 @@ from loguru import logger
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.providers.base import LLMProvider
+from nanobot.agent.compaction import ResultStore, ToolResultCompactor, make_compactor
 from nanobot.agent.context import ContextBuilder
+from nanobot.agent.media import MediaPipeline, max_dim_for_model
+from nanobot.agent.runner import AgentRunner, RunResult, TurnLimits
 from nanobot.agent.tools.registry import ToolRegistry
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
 from nanobot.agent.tools.shell import ExecTool
+from nanobot.agent.tools.sandbox import make_sandbox
 from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
 from nanobot.agent.tools.message import MessageTool
-from nanobot.agent.tools.spawn import SpawnTool
+from nanobot.agent.tools.spawn import SpawnTool, SubagentsTool
 from nanobot.agent.tools.cron import CronTool
-from nanobot.agent.memory import MemoryStore
+from nanobot.agent.tools.history import ReadToolResultTool, RecallHistoryTool, SemanticSearchTool
+from nanobot.agent.tools.selector import ListToolsTool, SelectionHooks, ToolSelector
+from nanobot.agent.memory import StructuredMemoryStore, make_memory_store
+from nanobot.agent.consolidation import ConsolidationJob, ConsolidationWorker
 from nanobot.agent.subagent import SubagentManager
+from nanobot.session.blobs import BlobStore
 from nanobot.session.manager import Session, SessionManager
 
 
@@ -47,14 +54,30 @@ class AgentLoop:
         temperature: float = 0.7,
         max_tokens: int = 4096,
         memory_window: int = 50,
+        memory_backend: str = "file",
+        memory_top_k: int = 12,
+        max_turn_tokens: int = 0,
+        max_turn_seconds: int = 0,
+        max_tool_calls: int = 0,
+        max_repeated_calls: int = 3,
+        reflect_mode: str = "adaptive",
+        reflect_prompt: str = "Reflect on the results and decide next steps.",
         brave_api_key: str | None = None,
         exec_config: "ExecToolConfig | None" = None,
         cron_service: "CronService | None" = None,
         restrict_to_workspace: bool = False,
         session_manager: SessionManager | None = None,
         mcp_servers: dict | None = None,
+        tool_selection: "ToolSelectionConfig | None" = None,
+        semantic_search: "SemanticSearchConfig | None" = None,
+        subagents: "SubagentConfig | None" = None,
+        compaction: "CompactionConfig | None" = None,
+        persist_tool_calls: bool = False,
+        tool_blob_threshold: int = 2000,
+        media: "MediaConfig | None" = None,
     ):
-        from nanobot.config.schema import ExecToolConfig
+        from nanobot.config.schema import ExecToolConfig, MediaConfig, ToolSelectionConfig
+        from nanobot.utils.helpers import get_data_path
         from nanobot.cron.service import CronService
         self.bus = bus
         self.provider = provider
@@ -68,8 +91,22 @@ class AgentLoop:
         self.exec_config = exec_config or ExecToolConfig()
         self.cron_service = cron_service
         self.restrict_to_workspace = restrict_to_workspace
-
-        self.context = ContextBuilder(workspace)
+        self.semantic_config = semantic_search
+        self.media_config = media or MediaConfig()
+
+        self.context = ContextBuilder(
+            workspace,
+            memory=make_memory_store(workspace, memory_backend, memory_top_k),
+            media=MediaPipeline(
+                cache_dir=get_data_path() / "cache" / "images",
+                max_dim=self.media_config.max_dimension or max_dim_for_model(self.model),
+                quality=self.media_config.jpeg_quality,
+                workers=self.media_config.workers,
+                media_dir=get_data_path() / "media",
+                max_age_days=self.media_config.max_age_days,
+                max_size_mb=self.media_config.max_size_mb,
+            ),
+        )
         self.sessions = session_manager or SessionManager(workspace)
         self.tools = ToolRegistry()
         self.subagents = SubagentManager(
@@ -82,13 +119,45 @@ class AgentLoop:
             brave_api_key=brave_api_key,
             exec_config=self.exec_config,
             restrict_to_workspace=restrict_to_workspace,
+            config=subagents,
+            compaction=compaction,
         )
         
+        self.consolidator = ConsolidationWorker(self._consolidate_batch, keep_count=memory_window // 2)
+
         self._running = False
         self._mcp_servers = mcp_servers or {}
         self._mcp_stack: AsyncExitStack | None = None
         self._mcp_connected = False
+        self.persist_tool_calls = persist_tool_calls
+        self.tool_blob_threshold = tool_blob_threshold
+        self.blobs = BlobStore(self.sessions.sessions_dir / "blobs")
+        self.compactor = make_compactor(compaction, backing=self.blobs)
         self._register_default_tools()
+
+        self.runner = AgentRunner(
+            provider=provider,
+            tools=self.tools,
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            max_iterations=self.max_iterations,
+            reflect_prompt=reflect_prompt,
+            reflect_mode=reflect_mode,
+            limits=TurnLimits(
+                max_tokens=max_turn_tokens,
+                max_seconds=max_turn_seconds,
+                max_tool_calls=max_tool_calls,
+                max_repeated_calls=max_repeated_calls,
+            ),
+            compactor=self.compactor,
+        )
+
+        selection = tool_selection or ToolSelectionConfig()
+        self.tool_selector: ToolSelector | None = None
+        if selection.enabled:
+            self.tool_selector = ToolSelector(self.tools, top_k=selection.top_k, pinned=selection.pinned)
+            self.tools.register(ListToolsTool(self.tool_selector))
     
     def _register_default_tools(self) -> None:
         """Register the default set of tools."""
@@ -104,8 +173,25 @@ class AgentLoop:
             working_dir=str(self.workspace),
             timeout=self.exec_config.timeout,
             restrict_to_workspace=self.restrict_to_workspace,
+            max_output_chars=self.exec_config.max_output_chars,
+            max_output_bytes=self.exec_config.max_output_bytes,
+            sandbox=make_sandbox(self.exec_config.sandbox),
+            progress_interval=self.exec_config.progress_interval,
+            send_callback=self.bus.publish_outbound,
+            persistent=self.exec_config.persistent_shell,
+            session_ttl=self.exec_config.shell_idle_ttl,
         ))
         
+        # History search
+        self.tools.register(RecallHistoryTool(self.context.memory.history_index))
+        self.semantic_index = self._make_semantic_index()
+        if self.semantic_index:
+            self.tools.register(SemanticSearchTool(self.semantic_index))
+
+        if self.compactor or self.persist_tool_calls:
+            store = self.compactor.store if self.compactor else ResultStore(backing=self.blobs)
+            self.tools.register(ReadToolResultTool(store))
+
         # Web tools
         self.tools.register(WebSearchTool(api_key=self.brave_api_key))
         self.tools.register(WebFetchTool())
@@ -117,11 +203,29 @@ class AgentLoop:
         # Spawn tool (for subagents)
         spawn_tool = SpawnTool(manager=self.subagents)
         self.tools.register(spawn_tool)
+        self.tools.register(SubagentsTool(manager=self.subagents))
         
         # Cron tool (for scheduling)
         if self.cron_service:
             self.tools.register(CronTool(self.cron_service))
     
+    def _make_semantic_index(self) -> "SemanticIndex | None":
+        """Create the optional semantic index (needs numpy)."""
+        cfg = self.semantic_config
+        if not cfg or not cfg.enabled:
+            return None
+        try:
+            from nanobot.agent.semantic import SemanticIndex, make_embedder
+        except ImportError as e:
+            logger.warning(f"Semantic search disabled: {e}. Install with: pip install numpy")
+            return None
+        return SemanticIndex(
+            index_dir=self.workspace / "memory" / "semantic",
+            sessions_dir=self.sessions.sessions_dir,
+            history_file=self.context.memory.history_file,
+            embedder=make_embedder(cfg.embedder, cfg.dim),
+        )
+
     async def _connect_mcp(self) -> None:
         """Connect to configured MCP servers (one-time, lazy)."""
         if self._mcp_connected or not self._mcp_servers:
@@ -138,15 +242,23 @@ class AgentLoop:
             if isinstance(message_tool, MessageTool):
                 message_tool.set_context(channel, chat_id)
 
+        if exec_tool := self.tools.get("exec"):
+            if isinstance(exec_tool, ExecTool):
+                exec_tool.set_context(channel, chat_id)
+
         if spawn_tool := self.tools.get("spawn"):
             if isinstance(spawn_tool, SpawnTool):
                 spawn_tool.set_context(channel, chat_id)
 
+        if subagents_tool := self.tools.get("subagents"):
+            if isinstance(subagents_tool, SubagentsTool):
+                subagents_tool.set_context(channel, chat_id)
+
         if cron_tool := self.tools.get("cron"):
             if isinstance(cron_tool, CronTool):
                 cron_tool.set_context(channel, chat_id)
 
-    async def _run_agent_loop(self, initial_messages: list[dict]) -> tuple[str | None, list[str]]:
+    async def _run_agent_loop(self, initial_messages: list[dict]) -> RunResult:
         """
         Run the agent iteration loop.
 
@@ -154,60 +266,53 @@ class AgentLoop:
             initial_messages: Starting messages for the LLM conversation.
 
         Returns:
-            Tuple of (final_content, list_of_tools_used).
+            The run result (final content, tools used, tool messages).
         """
-        messages = initial_messages
-        iteration = 0
-        final_content = None
-        tools_used: list[str] = []
-
-        while iteration < self.max_iterations:
-            iteration += 1
-
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
-
-            if response.has_tool_calls:
-                tool_call_dicts = [
-                    {
-                        "id": tc.id,
-                        "type": "function",
-                        "function": {
-                            "name": tc.name,
-                            "arguments": json.dumps(tc.arguments)
-                        }
-                    }
-                    for tc in response.tool_calls
-                ]
-                messages = self.context.add_assistant_message(
-                    messages, response.content, tool_call_dicts,
-                    reasoning_content=response.reasoning_content,
-                )
+        hooks = None
+        if self.tool_selector:
+            hooks = SelectionHooks(self.tool_selector, self._latest_user_text(initial_messages))
+        result = await self.runner.run(initial_messages, hooks)
+        if self.tool_selector:
+            self.tool_selector.record_used(result.tools_used)
+        return result
+
+    def _save_turn(self, session: Session, user_content: str, result: RunResult, final_content: str) -> None:
+        """Append a finished turn to the session, with its tool calls if persistence is on."""
+        session.add_message("user", user_content)
+        if self.persist_tool_calls:
+            for m in result.tool_messages:
+                if m["role"] == "assistant":
+                    session.add_message("assistant", m.get("content", ""), tool_calls=m["tool_calls"])
+                    continue
+                content, extra = m["content"], {}
+                if len(content) > self.tool_blob_threshold:
+                    # Large payloads live in the blob store; the session keeps a preview
+                    extra["blob"] = self.blobs.put(content)
+                    content = (self.compactor or ToolResultCompactor()).shorten(content, extra["blob"])
+                session.add_message("tool", content, tool_call_id=m["tool_call_id"], name=m["name"], **extra)
+        session.add_message("assistant", final_content,
+                            tools_used=result.tools_used if result.tools_used else None)
+        self.sessions.save(session)
 
-                for tool_call in response.tool_calls:
-                    tools_used.append(tool_call.name)
-                    args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
-                    logger.info(f"Tool call: {tool_call.name}({args_str[:200]})")
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
-                    messages = self.context.add_tool_result(
-                        messages, tool_call.id, tool_call.name, result
-                    )
-                messages.append({"role": "user", "content": "Reflect on the results and decide next steps."})
-            else:
-                final_content = response.content
-                break
-
-        return final_content, tools_used
+    @staticmethod
+    def _latest_user_text(messages: list[dict]) -> str:
+        """Text of the last user message (used to rank tools)."""
+        for m in reversed(messages):
+            if m.get("role") != "user":
+                continue
+            content = m.get("content")
+            if isinstance(content, list):
+                return " ".join(p.get("text", "") for p in content if isinstance(p, dict))
+            return content or ""
+        return ""
 
     async def run(self) -> None:
         """Run the agent loop, processing messages from the bus."""
         self._running = True
         await self._connect_mcp()
+        if self.semantic_index:
+            self.semantic_index.start(self.semantic_config.refresh_interval)
+        self.context.media.start(self.media_config.gc_interval)
         logger.info("Agent loop started")
 
         while self._running:
@@ -239,9 +344,32 @@ class AgentLoop:
                 pass  # MCP SDK cancel scope cleanup is noisy but harmless
             self._mcp_stack = None
 
+    async def close_tools(self) -> None:
+        """Close tools that hold processes, such as the exec tool's persistent shells."""
+        exec_tool = self.tools.get("exec")
+        if isinstance(exec_tool, ExecTool):
+            await exec_tool.close()
+
+    def kill_tools(self) -> None:
+        """Synchronous last resort for hard exits: kill persistent shells right away."""
+        exec_tool = self.tools.get("exec")
+        if isinstance(exec_tool, ExecTool):
+            exec_tool.kill()
+
+    async def flush_consolidation(self, timeout: float = 30) -> None:
+        """Finish queued memory consolidation (including /new archives) before shutdown."""
+        try:
+            await self.consolidator.flush(timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Memory consolidation still pending after {timeout}s, dropping it")
+        await self.consolidator.stop()
+
     def stop(self) -> None:
         """Stop the agent loop."""
         self._running = False
+        if self.semantic_index:
+            self.semantic_index.stop()
+        self.context.media.stop()
         logger.info("Agent loop stopping")
     
     async def _process_message(self, msg: InboundMessage, session_key: str | None = None) -> OutboundMessage | None:
@@ -270,34 +398,38 @@ class AgentLoop:
         if cmd == "/new":
             # Capture messages before clearing (avoid race condition with background task)
             messages_to_archive = session.messages.copy()
+            last_consolidated = session.last_consolidated
             session.clear()
             self.sessions.save(session)
             self.sessions.invalidate(session.key)
 
-            async def _consolidate_and_cleanup():
-                temp_session = Session(key=session.key)
-                temp_session.messages = messages_to_archive
-                await self._consolidate_memory(temp_session, archive_all=True)
-
-            asyncio.create_task(_consolidate_and_cleanup())
+            self.consolidator.enqueue_archive(session.key, messages_to_archive, last_consolidated)
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
                                   content="New session started. Memory consolidation in progress.")
+        if cmd == "/cancel" or cmd.startswith("/cancel "):
+            return self._cancel_subagents(msg, cmd.removeprefix("/cancel").strip())
         if cmd == "/help":
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
-                                  content="🐈 nanobot commands:\n/new — Start a new conversation\n/help — Show available commands")
+                                  content="🐈 nanobot commands:\n/new — Start a new conversation\n"
+                                          "/cancel [id] — Cancel background tasks (all if no id)\n"
+                                          "/help — Show available commands")
         
         if len(session.messages) > self.memory_window:
-            asyncio.create_task(self._consolidate_memory(session))
+            self.consolidator.enqueue(session)
 
         self._set_tool_context(msg.channel, msg.chat_id)
+        # Encode attachments off the event loop
+        images = [part for part in await self.context.media.prepare(msg.media) if part] if msg.media else None
         initial_messages = self.context.build_messages(
             history=session.get_history(max_messages=self.memory_window),
             current_message=msg.content,
             media=msg.media if msg.media else None,
             channel=msg.channel,
             chat_id=msg.chat_id,
+            images=images,
         )
-        final_content, tools_used = await self._run_agent_loop(initial_messages)
+        result = await self._run_agent_loop(initial_messages)
+        final_content = result.content
 
         if final_content is None:
             final_content = "I've completed processing but have no response to give."
@@ -305,10 +437,7 @@ class AgentLoop:
         preview = final_content[:120] + "..." if len(final_content) > 120 else final_content
         logger.info(f"Response to {msg.channel}:{msg.sender_id}: {preview}")
         
-        session.add_message("user", msg.content)
-        session.add_message("assistant", final_content,
-                            tools_used=tools_used if tools_used else None)
-        self.sessions.save(session)
+        self._save_turn(session, msg.content, result, final_content)
         
         return OutboundMessage(
             channel=msg.channel,
@@ -317,6 +446,17 @@ class AgentLoop:
             metadata=msg.metadata or {},  # Pass through for channel-specific needs (e.g. Slack thread_ts)
         )
     
+    def _cancel_subagents(self, msg: InboundMessage, task_id: str) -> OutboundMessage:
+        """Handle /cancel: stop one (or every) subagent spawned from this chat."""
+        origin = f"{msg.channel}:{msg.chat_id}"
+        if task_id:
+            ok = self.subagents.cancel(task_id, origin)
+            content = f"Cancelled background task {task_id}." if ok else f"No background task {task_id} in this chat."
+        else:
+            count = self.subagents.cancel_all(origin)
+            content = f"Cancelled {count} background task(s)." if count else "No background tasks running."
+        return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id, content=content)
+
     async def _process_system_message(self, msg: InboundMessage) -> OutboundMessage | None:
         """
         Process a system message (e.g., subagent announce).
@@ -345,14 +485,13 @@ class AgentLoop:
             channel=origin_channel,
             chat_id=origin_chat_id,
         )
-        final_content, _ = await self._run_agent_loop(initial_messages)
+        result = await self._run_agent_loop(initial_messages)
+        final_content = result.content
 
         if final_content is None:
             final_content = "Background task completed."
         
-        session.add_message("user", f"[System: {msg.sender_id}] {msg.content}")
-        session.add_message("assistant", final_content)
-        self.sessions.save(session)
+        self._save_turn(session, f"[System: {msg.sender_id}] {msg.content}", result, final_content)
         
         return OutboundMessage(
             channel=origin_channel,
@@ -360,90 +499,90 @@ class AgentLoop:
             content=final_content
         )
     
-    async def _consolidate_memory(self, session, archive_all: bool = False) -> None:
-        """Consolidate old messages into MEMORY.md + HISTORY.md.
+    async def _consolidate_batch(self, jobs: list[ConsolidationJob]) -> None:
+        """Consolidate several sessions' pending messages into MEMORY.md + HISTORY.md.
 
-        Args:
-            archive_all: If True, clear all messages and reset session (for /new command).
-                       If False, only write to files without modifying session.
+        Runs on the consolidation worker, so only one batch touches the memory
+        files at a time. Raises on failure so the worker can retry the batch.
         """
-        memory = MemoryStore(self.workspace)
-
-        if archive_all:
-            old_messages = session.messages
-            keep_count = 0
-            logger.info(f"Memory consolidation (archive_all): {len(session.messages)} total messages archived")
+        memory = self.context.memory
+        structured = isinstance(memory, StructuredMemoryStore)
+        sections = []
+        for job in jobs:
+            lines = []
+            for m in job.messages:
+                if not m.get("content") or m["role"] == "tool":
+                    continue
+                tools = f" [tools: {', '.join(m['tools_used'])}]" if m.get("tools_used") else ""
+                lines.append(f"[{m.get('timestamp', '?')[:16]}] {m['role'].upper()}{tools}: {m['content']}")
+            sections.append(f"### Conversation {len(sections) + 1} ({job.key})\n" + "\n".join(lines))
+            logger.info(
+                f"Memory consolidation started for {job.key}: {len(job.messages)} messages"
+                + (" (archive all)" if job.archive_all else "")
+            )
+        conversations = "\n\n".join(sections)
+
+        if structured:
+            known = memory.search(conversations, limit=40) or memory.retrieve("", limit=40)
+            current_memory = memory.format_facts(known, with_ids=True)
+            memory_instruction = """2. "fact_updates": A list of changes to long-term memory facts. Each item is one of:
+   - {"content": "...", "tags": ["..."], "conversation": N} to add a new fact
+   - {"id": ID, "content": "...", "tags": ["..."]} to correct or refine an existing fact
+   - {"id": ID, "delete": true} to remove a fact that is now wrong
+   Facts are short standalone statements: user location, preferences, personal info, habits, project context, technical decisions, tools/services used. Use one or two lowercase tags (e.g. "profile", "preferences", "projects"). Return an empty list if nothing changed."""
+            memory_heading = "## Relevant Long-term Memory Facts ([id] content (tags))"
         else:
-            keep_count = self.memory_window // 2
-            if len(session.messages) <= keep_count:
-                logger.debug(f"Session {session.key}: No consolidation needed (messages={len(session.messages)}, keep={keep_count})")
-                return
-
-            messages_to_process = len(session.messages) - session.last_consolidated
-            if messages_to_process <= 0:
-                logger.debug(f"Session {session.key}: No new messages to consolidate (last_consolidated={session.last_consolidated}, total={len(session.messages)})")
-                return
-
-            old_messages = session.messages[session.last_consolidated:-keep_count]
-            if not old_messages:
-                return
-            logger.info(f"Memory consolidation started: {len(session.messages)} total, {len(old_messages)} new to consolidate, {keep_count} keep")
-
-        lines = []
-        for m in old_messages:
-            if not m.get("content"):
-                continue
-            tools = f" [tools: {', '.join(m['tools_used'])}]" if m.get("tools_used") else ""
-            lines.append(f"[{m.get('timestamp', '?')[:16]}] {m['role'].upper()}{tools}: {m['content']}")
-        conversation = "\n".join(lines)
-        current_memory = memory.read_long_term()
+            current_memory = memory.read_long_term()
+            memory_instruction = """2. "memory_update": The updated long-term memory content. Add any new facts: user location, preferences, personal info, habits, project context, technical decisions, tools/services used. If nothing new, return the existing content unchanged."""
+            memory_heading = "## Current Long-term Memory"
 
-        prompt = f"""You are a memory consolidation agent. Process this conversation and return a JSON object with exactly two keys:
+        prompt = f"""You are a memory consolidation agent. Process these {len(jobs)} conversation(s) and return a JSON object with exactly two keys:
 
-1. "history_entry": A paragraph (2-5 sentences) summarizing the key events/decisions/topics. Start with a timestamp like [YYYY-MM-DD HH:MM]. Include enough detail to be useful when found by grep search later.
+1. "history_entries": A list with one entry per conversation, in order. Each entry is a paragraph (2-5 sentences) summarizing the key events/decisions/topics. Start with a timestamp like [YYYY-MM-DD HH:MM]. Include enough detail to be useful when found by grep search later.
 
-2. "memory_update": The updated long-term memory content. Add any new facts: user location, preferences, personal info, habits, project context, technical decisions, tools/services used. If nothing new, return the existing content unchanged.
+{memory_instruction}
 
-## Current Long-term Memory
+{memory_heading}
 {current_memory or "(empty)"}
 
-## Conversation to Process
-{conversation}
+## Conversations to Process
+{conversations}
 
 Respond with ONLY valid JSON, no markdown fences."""
 
-        try:
-            response = await self.provider.chat(
-                messages=[
-                    {"role": "system", "content": "You are a memory consolidation agent. Respond only with valid JSON."},
-                    {"role": "user", "content": prompt},
-                ],
-                model=self.model,
-            )
-            text = (response.content or "").strip()
-            if not text:
-                logger.warning("Memory consolidation: LLM returned empty response, skipping")
-                return
-            if text.startswith("```"):
-                text = text.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
-            result = json_repair.loads(text)
-            if not isinstance(result, dict):
-                logger.warning(f"Memory consolidation: unexpected response type, skipping. Response: {text[:200]}")
-                return
-
-            if entry := result.get("history_entry"):
+        response = await self.provider.chat(
+            messages=[
+                {"role": "system", "content": "You are a memory consolidation agent. Respond only with valid JSON."},
+                {"role": "user", "content": prompt},
+            ],
+            model=self.model,
+        )
+        text = (response.content or "").strip()
+        if not text:
+            raise ValueError("LLM returned empty response")
+        if text.startswith("```"):
+            text = text.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
+        result = json_repair.loads(text)
+        if not isinstance(result, dict):
+            raise ValueError(f"unexpected response type: {text[:200]}")
+
+        entries = result.get("history_entries") or result.get("history_entry") or []
+        if isinstance(entries, str):
+            entries = [entries]
+        for entry in entries:
+            if isinstance(entry, str) and entry.strip():
                 memory.append_history(entry)
-            if update := result.get("memory_update"):
-                if update != current_memory:
-                    memory.write_long_term(update)
-
-            if archive_all:
-                session.last_consolidated = 0
-            else:
-                session.last_consolidated = len(session.messages) - keep_count
-            logger.info(f"Memory consolidation done: {len(session.messages)} messages, last_consolidated={session.last_consolidated}")
-        except Exception as e:
-            logger.error(f"Memory consolidation failed: {e}")
+        if structured:
+            updates = result.get("fact_updates") or []
+            for u in updates:
+                n = u.get("conversation") if isinstance(u, dict) else None
+                if isinstance(n, int) and 1 <= n <= len(jobs):
+                    u["source"] = jobs[n - 1].key
+            memory.apply_updates(updates, source=jobs[0].key if len(jobs) == 1 else "")
+        elif update := result.get("memory_update"):
+            if update != current_memory:
+                memory.write_long_term(update)
+        logger.info(f"Memory consolidation done: {len(jobs)} session(s), {len(entries)} history entries")
 
     async def process_direct(
         self,
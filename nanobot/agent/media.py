@@ -0,0 +1,211 @@
+"""Image preparation for LLM requests and media directory cleanup."""
+
+import asyncio
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.utils.helpers import ensure_dir
+
+# Longest image edge each provider family still processes at full detail
+_PROVIDER_MAX_DIM = (
+    (("claude", "anthropic"), 1568),
+    (("gpt", "openai", "o1", "o3", "o4"), 2048),
+    (("gemini",), 3072),
+)
+DEFAULT_MAX_DIM = 1568
+
+
+def max_dim_for_model(model: str) -> int:
+    """Resize target for a model, by provider family."""
+    name = model.lower()
+    for keys, dim in _PROVIDER_MAX_DIM:
+        if any(k in name for k in keys):
+            return dim
+    return DEFAULT_MAX_DIM
+
+
+class MediaPipeline:
+    """
+    Turns image files into ``image_url`` message parts.
+
+    Images larger than ``max_dim`` on their longest edge are downsized
+    (needs Pillow; without it images are sent as-is). Encoded parts are
+    cached by content hash in memory and in ``cache_dir``, so an image that
+    appears in several messages or chats is read and encoded once.
+    ``prepare()`` encodes on a thread pool and returns the parts, so the event
+    loop never touches the files.
+    ``gc()`` removes old files from the media directory and keeps it under a
+    size cap.
+    """
+
+    MEMORY_ITEMS = 64
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_dim: int = DEFAULT_MAX_DIM,
+        quality: int = 85,
+        workers: int = 2,
+        media_dir: Path | None = None,
+        max_age_days: float = 30,
+        max_size_mb: float = 500,
+    ):
+        self.cache_dir = cache_dir
+        self.max_dim = max_dim
+        self.quality = quality
+        self.media_dir = media_dir
+        self.max_age_days = max_age_days
+        self.max_size_mb = max_size_mb
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="media")
+        self._memory: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def encode(self, path: str | Path) -> dict[str, Any] | None:
+        """``image_url`` part for an image file, or None if it is not a readable image."""
+        p = Path(path)
+        mime, _ = mimetypes.guess_type(str(p))
+        if not mime or not mime.startswith("image/"):
+            return None
+        try:
+            data = p.read_bytes()
+        except OSError:
+            return None
+        key = f"{hashlib.sha256(data).hexdigest()[:32]}-{self.max_dim}"
+        with self._lock:
+            if (part := self._memory.get(key)) is not None:
+                self._memory.move_to_end(key)
+                return part
+
+        part = self._load_cached(key)
+        if part is None:
+            mime, data = self._resize(mime, data)
+            url = f"data:{mime};base64,{base64.b64encode(data).decode()}"
+            part = {"type": "image_url", "image_url": {"url": url}}
+            self._store_cached(key, url)
+
+        with self._lock:
+            self._memory[key] = part
+            while len(self._memory) > self.MEMORY_ITEMS:
+                self._memory.popitem(last=False)
+        return part
+
+    async def prepare(self, paths: list[str]) -> list[dict[str, Any] | None]:
+        """Encode several images concurrently on the thread pool; None for unreadable ones."""
+        loop = asyncio.get_running_loop()
+        return list(await asyncio.gather(*(
+            loop.run_in_executor(self._executor, self.encode, path) for path in paths
+        )))
+
+    def _resize(self, mime: str, data: bytes) -> tuple[str, bytes]:
+        if not self.max_dim or mime == "image/gif":
+            return mime, data
+        try:
+            from PIL import Image
+        except ImportError:
+            return mime, data
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                if max(img.size) <= self.max_dim:
+                    return mime, data
+                img.thumbnail((self.max_dim, self.max_dim))
+                out = io.BytesIO()
+                if img.mode in ("RGBA", "LA", "P"):
+                    img.save(out, format="PNG", optimize=True)
+                    return "image/png", out.getvalue()
+                img.convert("RGB").save(out, format="JPEG", quality=self.quality, optimize=True)
+                return "image/jpeg", out.getvalue()
+        except Exception as e:
+            logger.debug(f"Image resize failed, sending original: {e}")
+            return mime, data
+
+    def _load_cached(self, key: str) -> dict[str, Any] | None:
+        try:
+            url = (self.cache_dir / f"{key}.b64").read_text()
+        except OSError:
+            return None
+        return {"type": "image_url", "image_url": {"url": url}}
+
+    def _store_cached(self, key: str, url: str) -> None:
+        try:
+            ensure_dir(self.cache_dir)
+            tmp = self.cache_dir / f"{key}.tmp{threading.get_ident()}"
+            tmp.write_text(url)
+            os.replace(tmp, self.cache_dir / f"{key}.b64")
+        except OSError as e:
+            logger.debug(f"Image cache write failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Garbage collection
+    # ------------------------------------------------------------------
+
+    def gc(self) -> int:
+        """Apply the age and size limits to the media and cache directories; returns files removed."""
+        removed = 0
+        for directory in (self.media_dir, self.cache_dir):
+            if directory and directory.is_dir():
+                removed += _prune(directory, self.max_age_days * 86400, int(self.max_size_mb * 1024 * 1024))
+        if removed:
+            logger.info(f"Media GC: removed {removed} files")
+        return removed
+
+    def start(self, interval_s: float = 3600) -> None:
+        """Run ``gc()`` in the background every ``interval_s`` seconds."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._gc_loop(interval_s))
+
+    async def _gc_loop(self, interval_s: float) -> None:
+        while True:
+            try:
+                await asyncio.get_running_loop().run_in_executor(self._executor, self.gc)
+            except Exception as e:
+                logger.error(f"Media GC failed: {e}")
+            await asyncio.sleep(interval_s)
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+def _prune(directory: Path, max_age_s: float, max_bytes: int) -> int:
+    """Delete files older than ``max_age_s``, then the oldest until under ``max_bytes``."""
+    files = []
+    for p in directory.iterdir():
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        if p.is_file():
+            files.append((st.st_mtime, st.st_size, p))
+    files.sort()
+    cutoff = time.time() - max_age_s if max_age_s else None
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for mtime, size, p in files:
+        too_old = cutoff is not None and mtime < cutoff
+        too_big = bool(max_bytes) and total > max_bytes
+        if not (too_old or too_big):
+            continue
+        try:
+            p.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
@@ -1,7 +1,14 @@
 """Memory system for persistent agent memory."""
 
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
 
+from loguru import logger
+
+from nanobot.agent.history_index import HistoryIndex
 from nanobot.utils.helpers import ensure_dir
 
 
@@ -12,6 +19,15 @@ class MemoryStore:
         self.memory_dir = ensure_dir(workspace / "memory")
         self.memory_file = self.memory_dir / "MEMORY.md"
         self.history_file = self.memory_dir / "HISTORY.md"
+        self._history_index: HistoryIndex | None = None
+
+    @property
+    def history_index(self) -> HistoryIndex:
+        """FTS index over HISTORY.md, created (and back-filled) on first use."""
+        if self._history_index is None:
+            self._history_index = HistoryIndex(self.history_file, self.memory_dir / "history.db")
+            self._history_index.sync()
+        return self._history_index
 
     def read_long_term(self) -> str:
         if self.memory_file.exists():
@@ -24,7 +40,278 @@ class MemoryStore:
     def append_history(self, entry: str) -> None:
         with open(self.history_file, "a", encoding="utf-8") as f:
             f.write(entry.rstrip() + "\n\n")
+        self.history_index.sync()
 
-    def get_memory_context(self) -> str:
+    def get_memory_context(self, query: str = "") -> str:
         long_term = self.read_long_term()
         return f"## Long-term Memory\n{long_term}" if long_term else ""
+
+
+@dataclass
+class Fact:
+    """A single long-term memory fact."""
+
+    id: int
+    content: str
+    tags: list[str] = field(default_factory=list)
+    source: str = ""
+    created_at: str = ""
+    updated_at: str = ""
+
+
+class StructuredMemoryStore(MemoryStore):
+    """
+    Long-term memory as individual facts in SQLite, retrieved per turn.
+
+    Instead of injecting all of MEMORY.md into every prompt, the facts most
+    relevant to the current message (BM25 over an FTS5 index, topped up with
+    the most recently updated facts) are injected, and consolidation applies
+    fact-level upserts/deletes. MEMORY.md is kept as a rendered, editable view:
+    manual edits to it are synced back into the database on the next read.
+    """
+
+    def __init__(self, workspace: Path, top_k: int = 12):
+        super().__init__(workspace)
+        self.top_k = top_k
+        self.db_path = self.memory_dir / "memory.db"
+        self._db = sqlite3.connect(self.db_path)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(_FACTS_SCHEMA)
+        self._rendered_mtime: float | None = None
+        self._sync_from_markdown()
+
+    # ------------------------------------------------------------------
+    # Facts
+    # ------------------------------------------------------------------
+
+    def all_facts(self) -> list[Fact]:
+        rows = self._db.execute("SELECT * FROM facts ORDER BY id").fetchall()
+        return [self._row_to_fact(r) for r in rows]
+
+    def get_fact(self, fact_id: int) -> Fact | None:
+        row = self._db.execute("SELECT * FROM facts WHERE id = ?", (fact_id,)).fetchone()
+        return self._row_to_fact(row) if row else None
+
+    def upsert_fact(
+        self, content: str, tags: list[str] | None = None, source: str = "", fact_id: int | None = None
+    ) -> int:
+        """Insert a fact, or update it in place when ``fact_id`` exists."""
+        now = datetime.now().isoformat(timespec="seconds")
+        tag_text = " ".join(tags or [])
+        if fact_id is not None and self.get_fact(fact_id):
+            self._db.execute(
+                "UPDATE facts SET content = ?, tags = ?, source = COALESCE(NULLIF(?, ''), source), "
+                "updated_at = ? WHERE id = ?",
+                (content.strip(), tag_text, source, now, fact_id),
+            )
+        else:
+            existing = self._db.execute(
+                "SELECT id FROM facts WHERE content = ?", (content.strip(),)
+            ).fetchone()
+            if existing:
+                return existing["id"]
+            fact_id = self._db.execute(
+                "INSERT INTO facts (content, tags, source, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (content.strip(), tag_text, source, now, now),
+            ).lastrowid
+        self._db.commit()
+        return fact_id
+
+    def delete_fact(self, fact_id: int) -> bool:
+        deleted = self._db.execute("DELETE FROM facts WHERE id = ?", (fact_id,)).rowcount
+        self._db.commit()
+        return bool(deleted)
+
+    def apply_updates(self, updates: list[dict], source: str = "") -> int:
+        """
+        Apply consolidation results: ``{"content", "tags"}`` adds a fact,
+        ``{"id", "content", "tags"}`` updates one and ``{"id", "delete": true}``
+        removes one. Returns the number of changes applied.
+        """
+        applied = 0
+        for u in updates:
+            if not isinstance(u, dict):
+                continue
+            fact_id = u.get("id")
+            if isinstance(fact_id, str) and fact_id.isdigit():
+                fact_id = int(fact_id)
+            if u.get("delete"):
+                if isinstance(fact_id, int) and self.delete_fact(fact_id):
+                    applied += 1
+                continue
+            content = str(u.get("content") or "").strip()
+            if not content:
+                continue
+            tags = u.get("tags") or []
+            if isinstance(tags, str):
+                tags = tags.split()
+            self.upsert_fact(
+                content, [str(t).strip().lower() for t in tags if str(t).strip()],
+                source=u.get("source") or source,
+                fact_id=fact_id if isinstance(fact_id, int) else None,
+            )
+            applied += 1
+        if applied:
+            self.render_markdown()
+        return applied
+
+    def search(self, query: str, limit: int | None = None) -> list[Fact]:
+        """Facts ranked by BM25 relevance to ``query``."""
+        limit = limit or self.top_k
+        terms = [t for t in re.findall(r"\w+", query.lower()) if len(t) > 1]
+        if not terms:
+            return []
+        match = " OR ".join(f'"{t}"' for t in list(dict.fromkeys(terms))[:256])
+        rows = self._db.execute(
+            "SELECT facts.* FROM facts_fts JOIN facts ON facts.id = facts_fts.rowid "
+            "WHERE facts_fts MATCH ? ORDER BY bm25(facts_fts) LIMIT ?",
+            (match, limit),
+        ).fetchall()
+        return [self._row_to_fact(r) for r in rows]
+
+    def retrieve(self, query: str, limit: int | None = None) -> list[Fact]:
+        """Top-K facts for a turn: relevant ones first, then the most recent."""
+        limit = limit or self.top_k
+        facts = self.search(query, limit) if query else []
+        if len(facts) < limit:
+            seen = {f.id for f in facts}
+            rows = self._db.execute(
+                "SELECT * FROM facts ORDER BY updated_at DESC, id DESC LIMIT ?", (limit * 2,)
+            ).fetchall()
+            for r in rows:
+                if len(facts) >= limit:
+                    break
+                if r["id"] not in seen:
+                    facts.append(self._row_to_fact(r))
+        return facts
+
+    @staticmethod
+    def format_facts(facts: list[Fact], with_ids: bool = False) -> str:
+        lines = []
+        for f in facts:
+            prefix = f"[{f.id}] " if with_ids else ""
+            tags = f" ({', '.join(f.tags)})" if f.tags else ""
+            lines.append(f"- {prefix}{f.content}{tags}")
+        return "\n".join(lines)
+
+    # ------------------------------------------------------------------
+    # MemoryStore interface
+    # ------------------------------------------------------------------
+
+    def read_long_term(self) -> str:
+        self._sync_from_markdown()
+        return self.format_facts(self.all_facts())
+
+    def write_long_term(self, content: str) -> None:
+        """Replace all facts with the lines of a markdown document."""
+        self.memory_file.write_text(content, encoding="utf-8")
+        self._rendered_mtime = None
+        self._sync_from_markdown()
+
+    def get_memory_context(self, query: str = "") -> str:
+        self._sync_from_markdown()
+        facts = self.retrieve(query)
+        if not facts:
+            return ""
+        total = self._db.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+        header = "## Long-term Memory"
+        if total > len(facts):
+            header += f" ({len(facts)} of {total} facts most relevant to this message)"
+        return f"{header}\n{self.format_facts(facts)}"
+
+    # ------------------------------------------------------------------
+    # MEMORY.md view
+    # ------------------------------------------------------------------
+
+    def render_markdown(self) -> None:
+        """Write MEMORY.md grouped by each fact's first tag."""
+        groups: dict[str, list[Fact]] = {}
+        for f in self.all_facts():
+            groups.setdefault(f.tags[0] if f.tags else "general", []).append(f)
+        parts = ["# Long-term Memory", ""]
+        for tag in sorted(groups):
+            parts.append(f"## {tag}")
+            parts.extend(f"- {f.content}" for f in groups[tag])
+            parts.append("")
+        self.memory_file.write_text("\n".join(parts), encoding="utf-8")
+        self._rendered_mtime = self.memory_file.stat().st_mtime
+
+    def _sync_from_markdown(self) -> None:
+        """Import MEMORY.md when it was created or edited outside this store."""
+        if not self.memory_file.exists():
+            return
+        mtime = self.memory_file.stat().st_mtime
+        if mtime == self._rendered_mtime:
+            return
+
+        parsed: list[tuple[str, str]] = []
+        tag = ""
+        for line in self.memory_file.read_text(encoding="utf-8").splitlines():
+            stripped = line.strip()
+            if stripped.startswith("#"):
+                heading = stripped.lstrip("#").strip().lower()
+                tag = "" if stripped.startswith("# ") else re.sub(r"\W+", "-", heading).strip("-")
+                continue
+            text = re.sub(r"^([-*+]|\d+\.)\s+", "", stripped)
+            if text:
+                parsed.append((text, tag))
+
+        existing = {f.content: f for f in self.all_facts()}
+        wanted = {text for text, _ in parsed}
+        for content, fact in existing.items():
+            if content not in wanted:
+                self._db.execute("DELETE FROM facts WHERE id = ?", (fact.id,))
+        for text, tag in parsed:
+            if text not in existing:
+                self.upsert_fact(text, [tag] if tag and tag != "general" else [], source="MEMORY.md")
+        self._db.commit()
+        self.render_markdown()
+        logger.debug(f"Memory: synced {len(parsed)} facts from {self.memory_file}")
+
+    @staticmethod
+    def _row_to_fact(row: sqlite3.Row) -> Fact:
+        return Fact(
+            id=row["id"],
+            content=row["content"],
+            tags=row["tags"].split() if row["tags"] else [],
+            source=row["source"] or "",
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    def close(self) -> None:
+        self._db.close()
+
+
+_FACTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS facts (
+    id INTEGER PRIMARY KEY,
+    content TEXT NOT NULL,
+    tags TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(
+    content, tags, content='facts', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS facts_ai AFTER INSERT ON facts BEGIN
+    INSERT INTO facts_fts(rowid, content, tags) VALUES (new.id, new.content, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS facts_ad AFTER DELETE ON facts BEGIN
+    INSERT INTO facts_fts(facts_fts, rowid, content, tags) VALUES ('delete', old.id, old.content, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS facts_au AFTER UPDATE ON facts BEGIN
+    INSERT INTO facts_fts(facts_fts, rowid, content, tags) VALUES ('delete', old.id, old.content, old.tags);
+    INSERT INTO facts_fts(rowid, content, tags) VALUES (new.id, new.content, new.tags);
+END;
+"""
+
+
+def make_memory_store(workspace: Path, backend: str = "file", top_k: int = 12) -> MemoryStore:
+    """Create the configured long-term memory backend."""
+    if backend == "sqlite":
+        return StructuredMemoryStore(workspace, top_k=top_k)
+    if backend != "file":
+        logger.warning(f"Unknown memory backend '{backend}', using file")
+    return MemoryStore(workspace)
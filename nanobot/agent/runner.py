@@ -0,0 +1,288 @@
+"""Tool-calling engine shared by the main agent and subagents."""
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from loguru import logger
+
+from nanobot.agent.compaction import ToolResultCompactor
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.utils.usage import TokenUsage, record_usage
+
+
+@dataclass
+class TurnLimits:
+    """Per-run budgets; 0 disables a limit."""
+
+    max_tokens: int = 0  # Total prompt + completion tokens
+    max_seconds: float = 0  # Wall-clock time
+    max_tool_calls: int = 0  # Tool calls across all iterations
+    max_repeated_calls: int = 3  # Consecutive identical calls with identical results before stopping
+
+
+@dataclass
+class RunState:
+    """What a run has done so far; passed to every hook."""
+
+    messages: list[dict[str, Any]]
+    iteration: int = 0
+    tools_used: list[str] = field(default_factory=list)
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    response: LLMResponse | None = None
+    started_at: float = field(default_factory=time.monotonic)
+    last_call: str = ""  # Name + arguments of the last executed tool call
+    last_result: int = 0  # Hash of its result
+    repeat_streak: int = 0  # How many times in a row that call returned that result
+    seen_upto: int = 0  # messages[:seen_upto] were sent with the last LLM request
+    compacted_upto: int = 0
+    tool_messages: list[dict[str, Any]] = field(default_factory=list)  # Uncompacted, in order
+
+
+@dataclass
+class RunResult:
+    """Outcome of ``AgentRunner.run``."""
+
+    content: str | None
+    tools_used: list[str]
+    messages: list[dict[str, Any]]
+    iterations: int
+    stop_reason: str  # "final", "max_iterations", "max_tokens", "timeout", "max_tool_calls", "repeated" or "budget"
+    usage: TokenUsage
+    tool_messages: list[dict[str, Any]]  # Assistant tool-call and tool result messages of this run
+
+
+class AgentHooks:
+    """
+    Extension points of ``AgentRunner``. Subclass and override what you need;
+    the defaults do nothing.
+    """
+
+    def tool_definitions(self, state: RunState) -> list[dict[str, Any]] | None:
+        """Tools to offer on this iteration (None = every registered tool)."""
+        return None
+
+    async def before_llm(self, state: RunState) -> None:
+        """Called before each LLM request."""
+
+    async def after_llm(self, state: RunState, response: LLMResponse) -> None:
+        """Called with each LLM response, before its tool calls run."""
+
+    def check_budget(self, state: RunState) -> str | None:
+        """Return a message to stop the run before the next tool round."""
+        return None
+
+    async def after_tool(self, state: RunState, call: ToolCallRequest, result: str) -> str:
+        """Called with each tool result; the returned text is what the model sees."""
+        return result
+
+    async def after_iteration(self, state: RunState) -> None:
+        """Called after a full round of tool calls."""
+
+
+class AgentRunner:
+    """
+    Runs the LLM <-> tool loop over a message list.
+
+    Each iteration asks the model for a response; tool calls are executed
+    through ``tools`` and their results appended, until the model answers
+    without tools. A run that hits ``max_iterations``, one of ``limits``, a
+    hook's budget check, or that keeps repeating a call that returns the same result is
+    asked for a final answer without further tools instead of being cut off.
+    ``AgentLoop`` and ``SubagentManager`` both drive their turns through this
+    class, so changes to the loop apply to every agent.
+
+    ``reflect_mode`` controls the ``reflect_prompt`` user message after a
+    tool round: ``"always"``, ``"adaptive"`` (only when a tool returned an
+    error) or ``"off"``. With a ``compactor``, tool results are shortened
+    after the first LLM request that included them.
+    """
+
+    FINAL_ANSWER_PROMPT = (
+        "{reason} Do not call any more tools. Give your best final answer now "
+        "using the information you already have, and say what is left undone."
+    )
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        tools: ToolRegistry,
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        max_iterations: int = 20,
+        reflect_prompt: str | None = None,
+        reflect_mode: str = "always",
+        limits: TurnLimits | None = None,
+        compactor: ToolResultCompactor | None = None,
+        log_prefix: str = "",
+    ):
+        self.provider = provider
+        self.tools = tools
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.max_iterations = max_iterations
+        self.reflect_prompt = reflect_prompt
+        self.reflect_mode = reflect_mode
+        self.limits = limits or TurnLimits()
+        self.compactor = compactor
+        self.log_prefix = log_prefix
+
+    async def run(self, messages: list[dict[str, Any]], hooks: AgentHooks | None = None) -> RunResult:
+        """Run until the model gives a final answer; ``messages`` is extended in place."""
+        hooks = hooks or AgentHooks()
+        state = RunState(messages=messages)
+
+        while state.iteration < self.max_iterations:
+            state.iteration += 1
+
+            tool_defs = hooks.tool_definitions(state)
+            response = await self._chat(state, hooks, tool_defs)
+
+            if not response.has_tool_calls:
+                return self._result(state, response.content, "final")
+            if (stop := self._check_limits(state, response)) is not None:
+                return await self._finish(state, hooks, tool_defs, *stop)
+            if (reason := hooks.check_budget(state)) is not None:
+                return await self._finish(state, hooks, tool_defs, "budget", reason)
+
+            assistant = self._assistant_message(response)
+            messages.append(assistant)
+            state.tool_messages.append(assistant)
+            had_error = False
+            for call in response.tool_calls:
+                state.tools_used.append(call.name)
+                args_str = json.dumps(call.arguments, ensure_ascii=False)
+                logger.info(f"{self.log_prefix}Tool call: {call.name}({args_str[:200]})")
+                result = await self.tools.execute(call.name, call.arguments)
+                self._track_repeat(state, call, result)
+                had_error = had_error or result.startswith("Error")
+                result = await hooks.after_tool(state, call, result)
+                tool_msg = {
+                    "role": "tool",
+                    "tool_call_id": call.id,
+                    "name": call.name,
+                    "content": result,
+                }
+                messages.append(tool_msg)
+                state.tool_messages.append(tool_msg)
+            if self.reflect_prompt and (
+                self.reflect_mode == "always" or (self.reflect_mode == "adaptive" and had_error)
+            ):
+                messages.append({"role": "user", "content": self.reflect_prompt})
+            await hooks.after_iteration(state)
+
+        return await self._finish(
+            state, hooks, hooks.tool_definitions(state), "max_iterations",
+            f"You have reached the limit of {self.max_iterations} tool rounds.",
+        )
+
+    async def _chat(
+        self, state: RunState, hooks: AgentHooks, tool_defs: list[dict[str, Any]] | None
+    ) -> LLMResponse:
+        if self.compactor and state.seen_upto > state.compacted_upto:
+            saved = self.compactor.compact(state.messages, state.compacted_upto, state.seen_upto)
+            state.compacted_upto = state.seen_upto
+            if saved:
+                logger.debug(f"{self.log_prefix}Compacted tool results, saved {saved} chars")
+        await hooks.before_llm(state)
+        state.seen_upto = len(state.messages)
+        response = await self.provider.chat(
+            messages=state.messages,
+            tools=tool_defs if tool_defs is not None else self.tools.get_definitions(),
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+        )
+        record_usage(response.usage)
+        if response.usage:
+            state.usage.add(response.usage)
+        state.response = response
+        await hooks.after_llm(state, response)
+        return response
+
+    def _check_limits(self, state: RunState, response: LLMResponse) -> tuple[str, str] | None:
+        """(stop_reason, message) if the pending tool round would exceed a limit."""
+        limits = self.limits
+        if limits.max_tokens and state.usage.total_tokens >= limits.max_tokens:
+            return "max_tokens", f"This turn has used its token budget ({state.usage.total_tokens} tokens)."
+        if limits.max_seconds and time.monotonic() - state.started_at >= limits.max_seconds:
+            return "timeout", f"This turn has run out of time ({limits.max_seconds:.0f}s)."
+        if limits.max_tool_calls and len(state.tools_used) + len(response.tool_calls) > limits.max_tool_calls:
+            return "max_tool_calls", f"This turn has reached its limit of {limits.max_tool_calls} tool calls."
+        if limits.max_repeated_calls and state.repeat_streak >= limits.max_repeated_calls:
+            # Only a loop that keeps getting the same answer is stopped; re-running a
+            # stateful tool (tests, file reads) after a change yields a new result
+            for call in response.tool_calls:
+                if self._call_key(call) == state.last_call:
+                    logger.warning(f"{self.log_prefix}Repeated tool call stopped: {state.last_call[:200]}")
+                    return "repeated", (
+                        f"You called {call.name} with these exact arguments {state.repeat_streak} times "
+                        "in a row and got the same result each time."
+                    )
+        return None
+
+    @staticmethod
+    def _call_key(call: ToolCallRequest) -> str:
+        return f"{call.name}:{json.dumps(call.arguments, sort_keys=True, ensure_ascii=False)}"
+
+    def _track_repeat(self, state: RunState, call: ToolCallRequest, result: str) -> None:
+        key, digest = self._call_key(call), hash(result)
+        if key == state.last_call and digest == state.last_result:
+            state.repeat_streak += 1
+        else:
+            state.last_call, state.last_result, state.repeat_streak = key, digest, 1
+
+    async def _finish(
+        self,
+        state: RunState,
+        hooks: AgentHooks,
+        tool_defs: list[dict[str, Any]] | None,
+        stop_reason: str,
+        reason: str,
+    ) -> RunResult:
+        """Ask for a final answer without tools after a limit was hit."""
+        logger.info(f"{self.log_prefix}Turn stopped ({stop_reason}), requesting final answer")
+        state.messages.append({"role": "user", "content": self.FINAL_ANSWER_PROMPT.format(reason=reason)})
+        try:
+            # Tools stay declared: some providers reject tool history without them
+            response = await self._chat(state, hooks, tool_defs)
+        except Exception as e:
+            logger.warning(f"{self.log_prefix}Final answer request failed: {e}")
+            return self._result(state, f"I had to stop before finishing: {reason}", stop_reason)
+        content = response.content or f"I had to stop before finishing: {reason}"
+        return self._result(state, content, stop_reason)
+
+    @staticmethod
+    def _assistant_message(response: LLMResponse) -> dict[str, Any]:
+        msg: dict[str, Any] = {"role": "assistant"}
+        # Omit empty content — some backends reject empty text blocks
+        if response.content:
+            msg["content"] = response.content
+        msg["tool_calls"] = [
+            {
+                "id": tc.id,
+                "type": "function",
+                "function": {"name": tc.name, "arguments": json.dumps(tc.arguments)},
+            }
+            for tc in response.tool_calls
+        ]
+        # Required by some thinking models (Kimi, DeepSeek-R1, etc.)
+        if response.reasoning_content:
+            msg["reasoning_content"] = response.reasoning_content
+        return msg
+
+    @staticmethod
+    def _result(state: RunState, content: str | None, stop_reason: str) -> RunResult:
+        return RunResult(
+            content=content,
+            tools_used=state.tools_used,
+            messages=state.messages,
+            iterations=state.iteration,
+            stop_reason=stop_reason,
+            usage=state.usage,
+            tool_messages=state.tool_messages,
+        )
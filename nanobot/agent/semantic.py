@@ -0,0 +1,319 @@
+"""On-device semantic index over session messages and history entries."""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+from loguru import logger
+
+from nanobot.utils.helpers import ensure_dir
+
+
+class Embedder(Protocol):
+    """Turns texts into L2-normalized float32 vectors of a fixed dimension."""
+
+    name: str
+    dim: int
+
+    def embed(self, texts: list[str]) -> np.ndarray: ...
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-words embedder using signed feature hashing.
+
+    Unigrams and bigrams are hashed (blake2b, so results are stable across
+    processes) into ``dim`` buckets with log term-frequency weights. No model
+    download is needed; quality is lexical rather than truly semantic, which
+    makes it a good default for tests and small installs.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> Counter[str]:
+        words = re.findall(r"\w+", text.lower())
+        feats = Counter(words)
+        feats.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        return feats
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feat, tf in self._features(text).items():
+                h = int.from_bytes(hashlib.blake2b(feat.encode(), digest_size=8).digest(), "little")
+                sign = 1.0 if h & (1 << 63) else -1.0
+                out[row, h % self.dim] += sign * (1.0 + math.log(tf))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """Local sentence-transformers model (optional dependency)."""
+
+    def __init__(self, model: str):
+        from sentence_transformers import SentenceTransformer
+        self._model = SentenceTransformer(model)
+        self.dim = self._model.get_sentence_embedding_dimension()
+        self.name = f"st-{model}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vecs = self._model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+        return vecs.astype(np.float32)
+
+
+def make_embedder(spec: str, dim: int = 384) -> Embedder:
+    """``"hashing"`` or ``"sentence-transformers:<model name>"``."""
+    if spec.startswith("sentence-transformers:"):
+        return SentenceTransformerEmbedder(spec.split(":", 1)[1])
+    if spec != "hashing":
+        logger.warning(f"Unknown embedder '{spec}', using hashing")
+    return HashingEmbedder(dim)
+
+
+@dataclass
+class SemanticHit:
+    """A search result from the semantic index."""
+
+    score: float
+    source: str  # "session" or "history"
+    ref: str  # session key, or "HISTORY.md"
+    ts: str
+    text: str
+
+
+class SemanticIndex:
+    """
+    Brute-force cosine search over a memory-mapped float16 matrix.
+
+    Vectors live in ``vectors.f16`` (grown by doubling), per-row metadata in
+    ``meta.jsonl`` and the indexing cursors in ``state.json``. ``refresh()``
+    embeds only what is new since the previous call: messages appended to
+    each session file and entries appended to HISTORY.md. Search scans the
+    matrix in chunks, so memory use stays flat as the index grows.
+    """
+
+    CHUNK_ROWS = 65536
+    MAX_EMBED_CHARS = 2000
+    PREVIEW_CHARS = 300
+
+    def __init__(self, index_dir: Path, sessions_dir: Path, history_file: Path, embedder: Embedder):
+        self.index_dir = ensure_dir(index_dir)
+        self.sessions_dir = sessions_dir
+        self.history_file = history_file
+        self.embedder = embedder
+        self._vectors_path = self.index_dir / "vectors.f16"
+        self._meta_path = self.index_dir / "meta.jsonl"
+        self._state_path = self.index_dir / "state.json"
+        self._lock = threading.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        state = {}
+        if self._state_path.exists():
+            try:
+                state = json.loads(self._state_path.read_text())
+            except (OSError, json.JSONDecodeError):
+                state = {}
+        if state.get("embedder") != self.embedder.name or not self._vectors_path.exists():
+            if state:
+                logger.info(f"Semantic index: embedder changed to {self.embedder.name}, rebuilding")
+            state = {"embedder": self.embedder.name, "count": 0, "capacity": 0, "cursors": {}}
+            self._vectors_path.write_bytes(b"")
+            self._meta_path.write_text("")
+        self._state = state
+        self.count = state["count"]
+        lines = self._meta_path.read_text(encoding="utf-8").splitlines()
+        if len(lines) != self.count:
+            # Interrupted write: drop rows that state.json never committed
+            lines = lines[: self.count]
+            self._meta_path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+        self._meta: list[dict] = [json.loads(line) for line in lines]
+        self.count = len(self._meta)
+        self._sources = np.array([m["source"] == "history" for m in self._meta], dtype=bool)
+        self._open_matrix(state["capacity"])
+
+    def _open_matrix(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._matrix = (
+            np.memmap(self._vectors_path, dtype=np.float16, mode="r+", shape=(capacity, self.embedder.dim))
+            if capacity else None
+        )
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(self._capacity, 1024)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self._capacity:
+            return
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        with open(self._vectors_path, "r+b") as f:
+            f.truncate(capacity * self.embedder.dim * 2)
+        self._open_matrix(capacity)
+
+    def _append(self, items: list[dict]) -> None:
+        if not items:
+            return
+        vecs = self.embedder.embed([it.pop("embed_text") for it in items])
+        self._grow(self.count + len(items))
+        self._matrix[self.count:self.count + len(items)] = vecs.astype(np.float16)
+        self._matrix.flush()
+        with open(self._meta_path, "a", encoding="utf-8") as f:
+            for it in items:
+                f.write(json.dumps(it, ensure_ascii=False) + "\n")
+        self._meta.extend(items)
+        self._sources = np.concatenate([
+            self._sources, np.array([it["source"] == "history" for it in items], dtype=bool)
+        ])
+        self.count += len(items)
+
+    def _save_state(self) -> None:
+        self._state.update(count=self.count, capacity=self._capacity)
+        tmp = self._state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._state))
+        os.replace(tmp, self._state_path)
+
+    # ------------------------------------------------------------------
+    # Incremental indexing
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> int:
+        """Embed new session messages and history entries; returns how many rows were added."""
+        with self._lock:
+            before = self.count
+            cursors = self._state["cursors"]
+            if self.sessions_dir.exists():
+                for path in sorted(self.sessions_dir.glob("*.jsonl")):
+                    self._append(self._new_session_items(path, cursors))
+            self._append(self._new_history_items(cursors))
+            self._save_state()
+            added = self.count - before
+        if added:
+            logger.debug(f"Semantic index: added {added} rows ({self.count} total)")
+        return added
+
+    def _new_session_items(self, path: Path, cursors: dict) -> list[dict]:
+        cursor = cursors.get(path.name, {"lines": 0, "first": ""})
+        items = []
+        key = path.stem.replace("_", ":", 1)
+        with open(path, encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+        messages = [line for line in lines if '"_type": "metadata"' not in line[:40]]
+        first = hashlib.sha1(messages[0].encode()).hexdigest() if messages else ""
+        start = cursor["lines"]
+        # Session was cleared (/new) or rewritten: index it again from the top
+        if start > len(messages) or (start and first != cursor["first"]):
+            start = 0
+        for line in messages[start:]:
+            try:
+                msg = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            content = msg.get("content")
+            if msg.get("role") not in ("user", "assistant") or not isinstance(content, str) or not content.strip():
+                continue
+            items.append({
+                "source": "session",
+                "ref": key,
+                "ts": (msg.get("timestamp") or "")[:16].replace("T", " "),
+                "text": f"{msg['role']}: {content[:self.PREVIEW_CHARS]}",
+                "embed_text": content[:self.MAX_EMBED_CHARS],
+            })
+        cursors[path.name] = {"lines": len(messages), "first": first}
+        return items
+
+    def _new_history_items(self, cursors: dict) -> list[dict]:
+        if not self.history_file.exists():
+            return []
+        offset = cursors.get("HISTORY.md", 0)
+        if offset > self.history_file.stat().st_size:
+            offset = 0
+        with open(self.history_file, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n\n")
+        if end < 0:
+            return []
+        items = []
+        for block in data[: end + 2].decode("utf-8", errors="replace").split("\n\n"):
+            block = block.strip()
+            if not block:
+                continue
+            ts = block[1:17] if block.startswith("[") else ""
+            items.append({
+                "source": "history",
+                "ref": "HISTORY.md",
+                "ts": ts,
+                "text": block[:self.PREVIEW_CHARS],
+                "embed_text": block[:self.MAX_EMBED_CHARS],
+            })
+        cursors["HISTORY.md"] = offset + end + 2
+        return items
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 5, source: str = "all") -> list[SemanticHit]:
+        """Cosine-similarity top-``limit`` rows, optionally limited to one source."""
+        with self._lock:
+            if not self.count or not query.strip():
+                return []
+            q = self.embedder.embed([query])[0]
+            scores = np.empty(self.count, dtype=np.float32)
+            for start in range(0, self.count, self.CHUNK_ROWS):
+                end = min(start + self.CHUNK_ROWS, self.count)
+                scores[start:end] = np.asarray(self._matrix[start:end], dtype=np.float32) @ q
+            if source == "history":
+                scores[~self._sources] = -np.inf
+            elif source == "sessions":
+                scores[self._sources] = -np.inf
+            k = min(limit, self.count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                SemanticHit(score=float(scores[i]), **{f: self._meta[i][f] for f in ("source", "ref", "ts", "text")})
+                for i in top if np.isfinite(scores[i]) and scores[i] > 0
+            ]
+
+    # ------------------------------------------------------------------
+    # Background refresh
+    # ------------------------------------------------------------------
+
+    async def refresh_async(self) -> int:
+        return await asyncio.to_thread(self.refresh)
+
+    def start(self, interval_s: float = 300) -> None:
+        """Refresh in the background every ``interval_s`` seconds."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop(interval_s))
+
+    async def _refresh_loop(self, interval_s: float) -> None:
+        while True:
+            try:
+                await self.refresh_async()
+            except Exception as e:
+                logger.error(f"Semantic index refresh failed: {e}")
+            await asyncio.sleep(interval_s)
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
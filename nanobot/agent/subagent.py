@@ -1,20 +1,72 @@
 """Subagent manager for background task execution."""
 
 import asyncio
-import json
+import time
 import uuid
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 from loguru import logger
 
-from nanobot.bus.events import InboundMessage
+from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
-from nanobot.providers.base import LLMProvider
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.utils.usage import track_usage
+from nanobot.agent.compaction import make_compactor
+from nanobot.agent.runner import AgentHooks, AgentRunner, RunState, TurnLimits
 from nanobot.agent.tools.registry import ToolRegistry
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
 from nanobot.agent.tools.shell import ExecTool
+from nanobot.agent.tools.sandbox import make_sandbox
 from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
+from nanobot.agent.tools.history import ReadToolResultTool
+
+
+@dataclass
+class SubagentTask:
+    """A spawned subagent, queued or running."""
+
+    id: str
+    task: str
+    label: str
+    origin: dict[str, str]
+    status: str = "queued"  # queued, running
+    created_at: float = field(default_factory=time.monotonic)
+    started_at: float | None = None
+    iterations: int = 0
+    tokens: int = 0
+    handle: asyncio.Task[None] | None = None
+
+    @property
+    def origin_key(self) -> str:
+        return f"{self.origin['channel']}:{self.origin['chat_id']}"
+
+    def describe(self) -> str:
+        if self.status == "queued":
+            return f"[{self.id}] {self.label} — queued"
+        elapsed = int(time.monotonic() - (self.started_at or self.created_at))
+        return f"[{self.id}] {self.label} — running {elapsed}s, step {self.iterations}, {self.tokens} tokens"
+
+
+class _SubagentHooks(AgentHooks):
+    """Keeps a subagent's status current and reports its progress."""
+
+    def __init__(self, manager: "SubagentManager", entry: SubagentTask):
+        self.manager = manager
+        self.entry = entry
+        self.last_progress = time.monotonic()
+
+    async def after_llm(self, state: RunState, response: LLMResponse) -> None:
+        self.entry.iterations = state.iteration
+        self.entry.tokens = state.usage.total_tokens
+
+    async def after_iteration(self, state: RunState) -> None:
+        interval = self.manager.config.progress_interval
+        if interval and time.monotonic() - self.last_progress >= interval:
+            self.last_progress = time.monotonic()
+            tools_used = ", ".join(tc.name for tc in state.response.tool_calls)
+            await self.manager._report_progress(self.entry, f"step {state.iteration}: {tools_used}")
 
 
 class SubagentManager:
@@ -24,6 +76,12 @@ class SubagentManager:
     Subagents are lightweight agent instances that run in the background
     to handle specific tasks. They share the same LLM provider but have
     isolated context and a focused system prompt.
+
+    At most ``max_concurrent`` subagents run at once; the rest wait in a FIFO
+    queue of up to ``max_queued``. Each origin chat may have at most
+    ``per_session_limit`` subagents queued or running. A subagent is stopped
+    when it exceeds its wall-clock ``timeout`` or ``token_budget``, and can be
+    cancelled by id or per chat. All subagents share one tool registry.
     """
     
     def __init__(
@@ -37,8 +95,10 @@ class SubagentManager:
         brave_api_key: str | None = None,
         exec_config: "ExecToolConfig | None" = None,
         restrict_to_workspace: bool = False,
+        config: "SubagentConfig | None" = None,
+        compaction: "CompactionConfig | None" = None,
     ):
-        from nanobot.config.schema import ExecToolConfig
+        from nanobot.config.schema import ExecToolConfig, SubagentConfig
         self.provider = provider
         self.workspace = workspace
         self.bus = bus
@@ -48,7 +108,44 @@ class SubagentManager:
         self.brave_api_key = brave_api_key
         self.exec_config = exec_config or ExecToolConfig()
         self.restrict_to_workspace = restrict_to_workspace
-        self._running_tasks: dict[str, asyncio.Task[None]] = {}
+        self.config = config or SubagentConfig()
+        self._tasks: dict[str, SubagentTask] = {}
+        self._slots = asyncio.Semaphore(self.config.max_concurrent)
+        self.compactor = make_compactor(compaction)
+        self.tools = self._build_tools()
+        self.runner = AgentRunner(
+            provider=provider,
+            tools=self.tools,
+            model=self.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            max_iterations=self.config.max_iterations,
+            limits=TurnLimits(max_tokens=self.config.token_budget),
+            compactor=self.compactor,
+            log_prefix="Subagent: ",
+        )
+    
+    def _build_tools(self) -> ToolRegistry:
+        """Subagent tools (no message tool, no spawn tool), shared by every subagent."""
+        tools = ToolRegistry()
+        allowed_dir = self.workspace if self.restrict_to_workspace else None
+        tools.register(ReadFileTool(allowed_dir=allowed_dir))
+        tools.register(WriteFileTool(allowed_dir=allowed_dir))
+        tools.register(EditFileTool(allowed_dir=allowed_dir))
+        tools.register(ListDirTool(allowed_dir=allowed_dir))
+        tools.register(ExecTool(
+            working_dir=str(self.workspace),
+            timeout=self.exec_config.timeout,
+            restrict_to_workspace=self.restrict_to_workspace,
+            max_output_chars=self.exec_config.max_output_chars,
+            max_output_bytes=self.exec_config.max_output_bytes,
+            sandbox=make_sandbox(self.exec_config.sandbox),
+        ))
+        tools.register(WebSearchTool(api_key=self.brave_api_key))
+        tools.register(WebFetchTool())
+        if self.compactor:
+            tools.register(ReadToolResultTool(self.compactor.store))
+        return tools
     
     async def spawn(
         self,
@@ -67,121 +164,104 @@ class SubagentManager:
             origin_chat_id: The chat ID to announce results to.
         
         Returns:
-            Status message indicating the subagent was started.
+            Status message indicating the subagent was started or queued,
+            or why it was refused.
         """
-        task_id = str(uuid.uuid4())[:8]
-        display_label = label or task[:30] + ("..." if len(task) > 30 else "")
-        
         origin = {
             "channel": origin_channel,
             "chat_id": origin_chat_id,
         }
+        origin_key = f"{origin_channel}:{origin_chat_id}"
+        limit = self.config.per_session_limit
+        if limit and len(self.list_tasks(origin_key)) >= limit:
+            return (
+                f"Error: this chat already has {limit} subagents queued or running. "
+                "Wait for one to finish or cancel one first."
+            )
+        # Tasks that have not reached the semaphore yet still count as occupying a slot
+        will_queue = len(self._tasks) >= self.config.max_concurrent
+        if will_queue and len(self._tasks) - self.config.max_concurrent >= self.config.max_queued:
+            return "Error: the subagent queue is full, try again later."
+        
+        task_id = str(uuid.uuid4())[:8]
+        display_label = label or task[:30] + ("..." if len(task) > 30 else "")
+        entry = SubagentTask(id=task_id, task=task, label=display_label, origin=origin)
         
         # Create background task
-        bg_task = asyncio.create_task(
-            self._run_subagent(task_id, task, display_label, origin)
-        )
-        self._running_tasks[task_id] = bg_task
+        entry.handle = asyncio.create_task(self._run_subagent(entry))
+        self._tasks[task_id] = entry
         
         # Cleanup when done
-        bg_task.add_done_callback(lambda _: self._running_tasks.pop(task_id, None))
+        entry.handle.add_done_callback(lambda _: self._tasks.pop(task_id, None))
         
         logger.info(f"Spawned subagent [{task_id}]: {display_label}")
+        if will_queue:
+            return f"Subagent [{display_label}] queued (id: {task_id}). It will start when a slot frees up."
         return f"Subagent [{display_label}] started (id: {task_id}). I'll notify you when it completes."
     
-    async def _run_subagent(
-        self,
-        task_id: str,
-        task: str,
-        label: str,
-        origin: dict[str, str],
-    ) -> None:
-        """Execute the subagent task and announce the result."""
-        logger.info(f"Subagent [{task_id}] starting task: {label}")
-        
+    def list_tasks(self, origin_key: str | None = None) -> list[SubagentTask]:
+        """Queued and running subagents, optionally only those spawned from one chat."""
+        return [t for t in self._tasks.values() if origin_key is None or t.origin_key == origin_key]
+    
+    def cancel(self, task_id: str, origin_key: str | None = None) -> bool:
+        """Cancel a queued or running subagent (restricted to ``origin_key`` if given)."""
+        entry = self._tasks.get(task_id)
+        if not entry or (origin_key and entry.origin_key != origin_key) or not entry.handle:
+            return False
+        entry.handle.cancel()
+        logger.info(f"Subagent [{task_id}] cancelled")
+        return True
+    
+    def cancel_all(self, origin_key: str | None = None) -> int:
+        """Cancel every subagent (of one chat, if given); returns how many were cancelled."""
+        return sum(self.cancel(t.id) for t in self.list_tasks(origin_key))
+    
+    async def _run_subagent(self, entry: SubagentTask) -> None:
+        """Wait for a slot, execute the subagent task and announce the result."""
+        async with self._slots:
+            entry.status = "running"
+            entry.started_at = time.monotonic()
+            logger.info(f"Subagent [{entry.id}] starting task: {entry.label}")
+            timeout = self.config.timeout or None
+            try:
+                # Own usage scope, so a subagent spawned during a cron run is not billed to it
+                with track_usage():
+                    final_result = await asyncio.wait_for(self._run_loop(entry), timeout)
+                logger.info(f"Subagent [{entry.id}] completed successfully")
+                await self._announce_result(entry.id, entry.label, entry.task, final_result, entry.origin, "ok")
+            except asyncio.TimeoutError:
+                logger.warning(f"Subagent [{entry.id}] timed out after {timeout}s")
+                await self._announce_result(
+                    entry.id, entry.label, entry.task,
+                    f"Error: stopped after the {timeout}s time limit.", entry.origin, "error",
+                )
+            except Exception as e:
+                error_msg = f"Error: {str(e)}"
+                logger.error(f"Subagent [{entry.id}] failed: {e}")
+                await self._announce_result(entry.id, entry.label, entry.task, error_msg, entry.origin, "error")
+    
+    async def _run_loop(self, entry: SubagentTask) -> str:
+        """The subagent's tool-calling loop; returns its final answer."""
+        # Build messages with subagent-specific prompt
+        system_prompt = self._build_subagent_prompt(entry.task)
+        messages: list[dict[str, Any]] = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": entry.task},
+        ]
+        result = await self.runner.run(messages, _SubagentHooks(self, entry))
+        return result.content or "Task completed but no final response was generated."
+    
+    async def _report_progress(self, entry: SubagentTask, text: str) -> None:
+        """Send a short progress line straight to the origin chat."""
         try:
-            # Build subagent tools (no message tool, no spawn tool)
-            tools = ToolRegistry()
-            allowed_dir = self.workspace if self.restrict_to_workspace else None
-            tools.register(ReadFileTool(allowed_dir=allowed_dir))
-            tools.register(WriteFileTool(allowed_dir=allowed_dir))
-            tools.register(EditFileTool(allowed_dir=allowed_dir))
-            tools.register(ListDirTool(allowed_dir=allowed_dir))
-            tools.register(ExecTool(
-                working_dir=str(self.workspace),
-                timeout=self.exec_config.timeout,
-                restrict_to_workspace=self.restrict_to_workspace,
+            await self.bus.publish_outbound(OutboundMessage(
+                channel=entry.origin["channel"],
+                chat_id=entry.origin["chat_id"],
+                content=f"⏳ {entry.label} — {text}",
+                metadata={"subagent_id": entry.id, "progress": True},
             ))
-            tools.register(WebSearchTool(api_key=self.brave_api_key))
-            tools.register(WebFetchTool())
-            
-            # Build messages with subagent-specific prompt
-            system_prompt = self._build_subagent_prompt(task)
-            messages: list[dict[str, Any]] = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": task},
-            ]
-            
-            # Run agent loop (limited iterations)
-            max_iterations = 15
-            iteration = 0
-            final_result: str | None = None
-            
-            while iteration < max_iterations:
-                iteration += 1
-                
-                response = await self.provider.chat(
-                    messages=messages,
-                    tools=tools.get_definitions(),
-                    model=self.model,
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens,
-                )
-                
-                if response.has_tool_calls:
-                    # Add assistant message with tool calls
-                    tool_call_dicts = [
-                        {
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {
-                                "name": tc.name,
-                                "arguments": json.dumps(tc.arguments),
-                            },
-                        }
-                        for tc in response.tool_calls
-                    ]
-                    messages.append({
-                        "role": "assistant",
-                        "content": response.content or "",
-                        "tool_calls": tool_call_dicts,
-                    })
-                    
-                    # Execute tools
-                    for tool_call in response.tool_calls:
-                        args_str = json.dumps(tool_call.arguments)
-                        logger.debug(f"Subagent [{task_id}] executing: {tool_call.name} with arguments: {args_str}")
-                        result = await tools.execute(tool_call.name, tool_call.arguments)
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "name": tool_call.name,
-                            "content": result,
-                        })
-                else:
-                    final_result = response.content
-                    break
-            
-            if final_result is None:
-                final_result = "Task completed but no final response was generated."
-            
-            logger.info(f"Subagent [{task_id}] completed successfully")
-            await self._announce_result(task_id, label, task, final_result, origin, "ok")
-            
         except Exception as e:
-            error_msg = f"Error: {str(e)}"
-            logger.error(f"Subagent [{task_id}] failed: {e}")
-            await self._announce_result(task_id, label, task, error_msg, origin, "error")
+            logger.debug(f"Subagent [{entry.id}] progress update failed: {e}")
     
     async def _announce_result(
         self,
@@ -254,4 +334,4 @@ When you have completed the task, provide a clear summary of your findings or ac
     
     def get_running_count(self) -> int:
         """Return the number of currently running subagents."""
-        return len(self._running_tasks)
+        return sum(1 for t in self._tasks.values() if t.status == "running")
@@ -1,7 +1,35 @@
 """Base class for agent tools."""
 
 from abc import ABC, abstractmethod
-from typing import Any
+from contextvars import ContextVar
+from typing import Any, Callable
+
+Validator = Callable[[Any, str], list[str]]
+
+
+class RoutingContext:
+    """
+    The (channel, chat_id) a tool reports back to, scoped to the current task.
+
+    Backed by a ContextVar so turns running concurrently (e.g. several cron
+    jobs) each see the chat they were started for.
+    """
+
+    def __init__(self, channel: str = "", chat_id: str = ""):
+        self._var: ContextVar[tuple[str, str]] = ContextVar(
+            f"routing-{id(self)}", default=(channel, chat_id)
+        )
+
+    def set(self, channel: str, chat_id: str) -> None:
+        self._var.set((channel, chat_id))
+
+    @property
+    def channel(self) -> str:
+        return self._var.get()[0]
+
+    @property
+    def chat_id(self) -> str:
+        return self._var.get()[1]
 
 
 class Tool(ABC):
@@ -54,41 +82,82 @@ class Tool(ABC):
 
     def validate_params(self, params: dict[str, Any]) -> list[str]:
         """Validate tool parameters against JSON schema. Returns error list (empty if valid)."""
-        schema = self.parameters or {}
-        if schema.get("type", "object") != "object":
-            raise ValueError(f"Schema must be object type, got {schema.get('type')!r}")
-        return self._validate(params, {**schema, "type": "object"}, "")
-
-    def _validate(self, val: Any, schema: dict[str, Any], path: str) -> list[str]:
-        t, label = schema.get("type"), path or "parameter"
-        if t in self._TYPE_MAP and not isinstance(val, self._TYPE_MAP[t]):
-            return [f"{label} should be {t}"]
-        
-        errors = []
-        if "enum" in schema and val not in schema["enum"]:
-            errors.append(f"{label} must be one of {schema['enum']}")
+        validator = self.__dict__.get("_params_validator")
+        if validator is None:
+            schema = self.parameters or {}
+            if schema.get("type", "object") != "object":
+                raise ValueError(f"Schema must be object type, got {schema.get('type')!r}")
+            # Parameters are treated as static: the schema is compiled once per tool
+            validator = self._compile_validator({**schema, "type": "object"})
+            self._params_validator = validator
+        return validator(params, "")
+
+    @classmethod
+    def _compile_validator(cls, schema: dict[str, Any]) -> Validator:
+        """Compile a JSON schema into a closure that returns a list of errors."""
+        t = schema.get("type")
+        py_type = cls._TYPE_MAP.get(t)
+        checks: list[Callable[[Any, str, list[str]], None]] = []
+
+        if "enum" in schema:
+            enum = schema["enum"]
+
+            def check_enum(val: Any, path: str, errors: list[str]) -> None:
+                if val not in enum:
+                    errors.append(f"{path or 'parameter'} must be one of {enum}")
+            checks.append(check_enum)
+
         if t in ("integer", "number"):
-            if "minimum" in schema and val < schema["minimum"]:
-                errors.append(f"{label} must be >= {schema['minimum']}")
-            if "maximum" in schema and val > schema["maximum"]:
-                errors.append(f"{label} must be <= {schema['maximum']}")
+            lo, hi = schema.get("minimum"), schema.get("maximum")
+            if lo is not None or hi is not None:
+                def check_range(val: Any, path: str, errors: list[str]) -> None:
+                    if lo is not None and val < lo:
+                        errors.append(f"{path or 'parameter'} must be >= {lo}")
+                    if hi is not None and val > hi:
+                        errors.append(f"{path or 'parameter'} must be <= {hi}")
+                checks.append(check_range)
+
         if t == "string":
-            if "minLength" in schema and len(val) < schema["minLength"]:
-                errors.append(f"{label} must be at least {schema['minLength']} chars")
-            if "maxLength" in schema and len(val) > schema["maxLength"]:
-                errors.append(f"{label} must be at most {schema['maxLength']} chars")
+            min_len, max_len = schema.get("minLength"), schema.get("maxLength")
+            if min_len is not None or max_len is not None:
+                def check_length(val: Any, path: str, errors: list[str]) -> None:
+                    if min_len is not None and len(val) < min_len:
+                        errors.append(f"{path or 'parameter'} must be at least {min_len} chars")
+                    if max_len is not None and len(val) > max_len:
+                        errors.append(f"{path or 'parameter'} must be at most {max_len} chars")
+                checks.append(check_length)
+
         if t == "object":
-            props = schema.get("properties", {})
-            for k in schema.get("required", []):
-                if k not in val:
-                    errors.append(f"missing required {path + '.' + k if path else k}")
-            for k, v in val.items():
-                if k in props:
-                    errors.extend(self._validate(v, props[k], path + '.' + k if path else k))
+            required = tuple(schema.get("required", ()))
+            props = {k: cls._compile_validator(v) for k, v in schema.get("properties", {}).items()}
+
+            def check_object(val: Any, path: str, errors: list[str]) -> None:
+                for k in required:
+                    if k not in val:
+                        errors.append(f"missing required {path + '.' + k if path else k}")
+                for k, v in val.items():
+                    sub = props.get(k)
+                    if sub is not None:
+                        errors.extend(sub(v, path + '.' + k if path else k))
+            checks.append(check_object)
+
         if t == "array" and "items" in schema:
-            for i, item in enumerate(val):
-                errors.extend(self._validate(item, schema["items"], f"{path}[{i}]" if path else f"[{i}]"))
-        return errors
+            item_validator = cls._compile_validator(schema["items"])
+
+            def check_items(val: Any, path: str, errors: list[str]) -> None:
+                for i, item in enumerate(val):
+                    errors.extend(item_validator(item, f"{path}[{i}]" if path else f"[{i}]"))
+            checks.append(check_items)
+
+        def validate(val: Any, path: str) -> list[str]:
+            if py_type is not None and not isinstance(val, py_type):
+                return [f"{path or 'parameter'} should be {t}"]
+            errors: list[str] = []
+            for check in checks:
+                check(val, path, errors)
+            return errors
+
+        return validate
     
     def to_schema(self) -> dict[str, Any]:
         """Convert tool to OpenAI function schema format."""
@@ -0,0 +1,164 @@
+"""History recall tools."""
+
+from typing import TYPE_CHECKING, Any
+
+from nanobot.agent.history_index import HistoryIndex
+from nanobot.agent.tools.base import Tool
+
+if TYPE_CHECKING:
+    from nanobot.agent.compaction import ResultStore
+    from nanobot.agent.semantic import SemanticIndex
+
+
+class RecallHistoryTool(Tool):
+    """Tool to search past conversation summaries in HISTORY.md."""
+
+    def __init__(self, index: HistoryIndex):
+        self._index = index
+
+    @property
+    def name(self) -> str:
+        return "recall_history"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Search the history log of past conversations (HISTORY.md). "
+            "Returns the best-matching entries with highlighted snippets."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Keywords to search for (empty returns the most recent entries)"
+                },
+                "since": {
+                    "type": "string",
+                    "description": "Only entries on/after this ISO date or datetime (e.g. '2026-02-01')"
+                },
+                "until": {
+                    "type": "string",
+                    "description": "Only entries on/before this ISO date or datetime"
+                },
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 20,
+                    "description": "Maximum number of entries (default 5)"
+                },
+            },
+            "required": ["query"]
+        }
+
+    async def execute(
+        self,
+        query: str,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 5,
+        **kwargs: Any
+    ) -> str:
+        hits = self._index.search(query, since=since, until=until, limit=limit)
+        if not hits:
+            return f"No history entries match '{query}'."
+        return "\n\n".join(f"[{h.ts or 'undated'}] {h.snippet}" for h in hits)
+
+
+class SemanticSearchTool(Tool):
+    """Tool to find past messages and history entries by meaning."""
+
+    def __init__(self, index: "SemanticIndex"):
+        self._index = index
+
+    @property
+    def name(self) -> str:
+        return "semantic_search"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Find past conversation messages and history entries that are similar in meaning "
+            "to a description, even when they use different words."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "What you are trying to remember, in natural language"
+                },
+                "source": {
+                    "type": "string",
+                    "enum": ["all", "sessions", "history"],
+                    "description": "Restrict to chat messages or history entries (default all)"
+                },
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 20,
+                    "description": "Maximum number of results (default 5)"
+                },
+            },
+            "required": ["query"]
+        }
+
+    async def execute(self, query: str, source: str = "all", limit: int = 5, **kwargs: Any) -> str:
+        import asyncio
+        await self._index.refresh_async()
+        hits = await asyncio.to_thread(self._index.search, query, limit, source)
+        if not hits:
+            return f"Nothing similar to '{query}' found."
+        return "\n\n".join(
+            f"[{h.score:.2f}] {h.ref} {h.ts or ''}\n{h.text}".replace(" \n", "\n") for h in hits
+        )
+
+
+class ReadToolResultTool(Tool):
+    """Tool to page through a tool result that was shortened in the conversation."""
+
+    def __init__(self, store: "ResultStore"):
+        self._store = store
+
+    @property
+    def name(self) -> str:
+        return "read_tool_result"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Read part of an earlier tool result that was shortened to save space. "
+            "Use the ref and offset shown in the '[... chars omitted ...]' note."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "ref": {"type": "string", "description": "Reference from the omission note"},
+                "offset": {"type": "integer", "minimum": 0, "description": "Character offset to start at"},
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 20000,
+                    "description": "Maximum characters to return (default 8000)",
+                },
+            },
+            "required": ["ref"],
+        }
+
+    async def execute(self, ref: str, offset: int = 0, limit: int = 8000, **kwargs: Any) -> str:
+        text = self._store.get(ref)
+        if text is None:
+            return f"Error: no stored result '{ref}' (it may have expired)"
+        chunk = text[offset:offset + limit]
+        end = offset + len(chunk)
+        note = f"[chars {offset}-{end} of {len(text)}" + ("; more remains]" if end < len(text) else "]")
+        return f"{note}\n{chunk}"
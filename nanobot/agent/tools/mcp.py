@@ -1,7 +1,15 @@
 """MCP client: connects to MCP servers and wraps their tools as native nanobot tools."""
 
+import asyncio
+import hashlib
+import json
+import time
+from collections import deque
 from contextlib import AsyncExitStack
-from typing import Any
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
 
 from loguru import logger
 
@@ -9,11 +17,324 @@ from nanobot.agent.tools.base import Tool
 from nanobot.agent.tools.registry import ToolRegistry
 
 
+class MCPServerConnection:
+    """
+    A single MCP server session, owned by a dedicated runner task.
+
+    The MCP SDK transports use anyio cancel scopes that must be entered and
+    exited from the same task, so each server gets its own task that opens the
+    transport, publishes the session and keeps it open until ``close()``.
+    This also lets several servers connect concurrently, and lets lazy servers
+    connect from whichever tool call needs them first.
+    """
+
+    def __init__(self, name: str, cfg, timeout: float = 30):
+        self.name = name
+        self.cfg = cfg
+        self.timeout = timeout
+        self.session = None
+        self.tools: list = []
+        self.in_flight = 0
+        self._runner: asyncio.Task[None] | None = None
+        self._ready: asyncio.Future[None] | None = None
+        self._closing = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self.session is not None and self._runner is not None and not self._runner.done()
+
+    async def connect(self) -> list:
+        """Start the server (if needed) and return its tool definitions."""
+        async with self._lock:
+            if self.connected:
+                return self.tools
+            self._ready = asyncio.get_running_loop().create_future()
+            self._closing = asyncio.Event()
+            self._runner = asyncio.create_task(self._run())
+            try:
+                await asyncio.wait_for(asyncio.shield(self._ready), self.timeout)
+            except asyncio.TimeoutError:
+                await self._stop(cancel=True)
+                raise TimeoutError(f"connect timed out after {self.timeout}s")
+            except BaseException:
+                await self._stop(cancel=True)
+                raise
+        return self.tools
+
+    async def get_session(self):
+        """Return a live session, connecting on first use."""
+        if not self.connected:
+            await self.connect()
+        return self.session
+
+    async def _run(self) -> None:
+        try:
+            async with AsyncExitStack() as stack:
+                session = await self._open(stack)
+                self.tools = list((await session.list_tools()).tools)
+                self.session = session
+                self._ready.set_result(None)
+                await self._closing.wait()
+        except asyncio.CancelledError:
+            if not self._ready.done():
+                self._ready.cancel()
+            raise
+        except BaseException as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+            else:
+                # MCP SDK cancel scope cleanup is noisy but harmless
+                logger.debug(f"MCP server '{self.name}': session ended: {e}")
+        finally:
+            self.session = None
+
+    async def _open(self, stack: AsyncExitStack):
+        """Open the transport and initialize a client session."""
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+
+        if self.cfg.command:
+            params = StdioServerParameters(
+                command=self.cfg.command, args=self.cfg.args, env=self.cfg.env or None
+            )
+            read, write = await stack.enter_async_context(stdio_client(params))
+        else:
+            from mcp.client.streamable_http import streamable_http_client
+            read, write, _ = await stack.enter_async_context(
+                streamable_http_client(self.cfg.url)
+            )
+
+        session = await stack.enter_async_context(ClientSession(read, write))
+        await session.initialize()
+        return session
+
+    async def _stop(self, cancel: bool = False) -> None:
+        self._closing.set()
+        runner, self._runner = self._runner, None
+        if runner is None:
+            return
+        if cancel:
+            runner.cancel()
+        try:
+            await asyncio.wait_for(runner, timeout=5)
+        except BaseException:
+            runner.cancel()
+
+    async def restart(self) -> list:
+        """Tear down a broken session and connect again."""
+        async with self._lock:
+            await self._stop(cancel=True)
+        return await self.connect()
+
+    async def close(self) -> None:
+        """Shut down the session and its transport."""
+        async with self._lock:
+            await self._stop()
+
+
+@dataclass
+class ToolLatency:
+    """Call statistics for one MCP tool."""
+
+    calls: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    recent: deque[float] = field(default_factory=lambda: deque(maxlen=100))
+
+    def record(self, ms: float, ok: bool) -> None:
+        self.calls += 1
+        self.errors += 0 if ok else 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.recent.append(ms)
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    @property
+    def p95_ms(self) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+def _protocol_errors() -> tuple[type[BaseException], ...]:
+    """Errors reported by a healthy server (as opposed to a broken transport)."""
+    from mcp.shared import exceptions
+    return tuple(
+        getattr(exceptions, n) for n in ("McpError", "MCPError") if hasattr(exceptions, n)
+    )
+
+
+def _unsent_errors() -> tuple[type[BaseException], ...]:
+    """Transport errors raised while writing the request, so the server never saw it."""
+    import anyio
+    return (anyio.ClosedResourceError, anyio.BrokenResourceError)
+
+
+class MCPClient:
+    """
+    Supervised client for one configured MCP server.
+
+    Wraps one or more :class:`MCPServerConnection` instances (several when
+    ``pool_size`` > 1 for throughput-heavy stdio servers) and adds a
+    concurrency limit, per-call timeouts, reconnect on transport failures,
+    periodic health pings and per-tool latency metrics. A failed call is sent
+    again only if the request never reached the server, or if the tool is
+    listed in ``retry_tools`` (safe to run twice).
+    """
+
+    def __init__(self, name: str, cfg):
+        self.name = name
+        self.cfg = cfg
+        pool_size = max(1, cfg.pool_size) if cfg.command else 1
+        self.connections = [
+            MCPServerConnection(name, cfg, timeout=cfg.connect_timeout) for _ in range(pool_size)
+        ]
+        self.metrics: dict[str, ToolLatency] = {}
+        self.on_tools: Callable[[list], None] | None = None
+        self._semaphore = asyncio.Semaphore(cfg.max_concurrency) if cfg.max_concurrency > 0 else None
+        self._health: asyncio.Task[None] | None = None
+
+    @property
+    def primary(self) -> MCPServerConnection:
+        return self.connections[0]
+
+    async def connect(self) -> list:
+        """Connect every pooled instance; the first one's tool list is authoritative."""
+        results = await asyncio.gather(
+            *(c.connect() for c in self.connections), return_exceptions=True
+        )
+        if isinstance(results[0], BaseException):
+            raise results[0]
+        for i, r in enumerate(results[1:], start=2):
+            if isinstance(r, BaseException):
+                logger.warning(f"MCP server '{self.name}': pool instance {i} failed to connect: {r}")
+        self._start_health_checks()
+        self._notify_tools(self.primary.tools)
+        return self.primary.tools
+
+    def _notify_tools(self, tools: list) -> None:
+        if self.on_tools:
+            self.on_tools(tools)
+
+    def _pick(self) -> MCPServerConnection:
+        """Least-busy pooled instance, preferring ones that are already connected."""
+        return min(self.connections, key=lambda c: (not c.connected, c.in_flight))
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any]):
+        """Call a tool with concurrency limiting, timeout and reconnect on transport failure."""
+        if self._semaphore:
+            async with self._semaphore:
+                return await self._call(tool_name, arguments)
+        return await self._call(tool_name, arguments)
+
+    async def _call(self, tool_name: str, arguments: dict[str, Any]):
+        stats = self.metrics.setdefault(tool_name, ToolLatency())
+        conn = self._pick()
+        start = time.monotonic()
+        conn.in_flight += 1
+        try:
+            for attempt in (1, 2):
+                was_connected = conn.connected
+                session = await conn.get_session()
+                if not was_connected:
+                    self._start_health_checks()
+                    if conn is self.primary:
+                        self._notify_tools(conn.tools)
+                try:
+                    result = await asyncio.wait_for(
+                        session.call_tool(tool_name, arguments=arguments), self.cfg.call_timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise TimeoutError(
+                        f"MCP tool '{tool_name}' timed out after {self.cfg.call_timeout}s"
+                    )
+                except _protocol_errors():
+                    raise
+                except Exception as e:
+                    retry = attempt == 1 and (
+                        isinstance(e, _unsent_errors()) or self._may_resend(tool_name)
+                    )
+                    logger.warning(f"MCP server '{self.name}': call failed ({e}), reconnecting")
+                    try:
+                        await conn.restart()
+                    except Exception as restart_error:
+                        if retry:
+                            raise
+                        logger.error(f"MCP server '{self.name}': reconnect failed: {restart_error}")
+                    else:
+                        if conn is self.primary:
+                            self._notify_tools(conn.tools)
+                    if not retry:
+                        # The request may have reached the server; running it again could repeat side effects
+                        raise
+                    continue
+                stats.record((time.monotonic() - start) * 1000, ok=not getattr(result, "isError", False))
+                return result
+        except BaseException:
+            stats.record((time.monotonic() - start) * 1000, ok=False)
+            raise
+        finally:
+            conn.in_flight -= 1
+
+    def _may_resend(self, tool_name: str) -> bool:
+        retry_tools = self.cfg.retry_tools
+        return "*" in retry_tools or tool_name in retry_tools
+
+    def _start_health_checks(self) -> None:
+        if self.cfg.health_interval > 0 and (self._health is None or self._health.done()):
+            self._health = asyncio.create_task(self._health_loop())
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.cfg.health_interval)
+            await self.check_health()
+
+    async def check_health(self) -> None:
+        """Ping each connected instance; reconnect (and re-register tools) on failure."""
+        for conn in self.connections:
+            if conn.session is None:
+                continue
+            try:
+                await asyncio.wait_for(conn.session.send_ping(), timeout=10)
+                continue
+            except Exception as e:
+                logger.warning(f"MCP server '{self.name}': health check failed ({e}), reconnecting")
+            try:
+                tools = await conn.restart()
+            except Exception as e:
+                logger.error(f"MCP server '{self.name}': reconnect failed: {e}")
+                continue
+            if conn is self.primary:
+                self._notify_tools(tools)
+
+    def metrics_summary(self) -> str:
+        lines = [
+            f"{tool}: {m.calls} calls, {m.errors} errors, avg {m.avg_ms:.0f}ms, "
+            f"p95 {m.p95_ms:.0f}ms, max {m.max_ms:.0f}ms"
+            for tool, m in sorted(self.metrics.items())
+        ]
+        return "\n".join(lines)
+
+    async def close(self) -> None:
+        if self._health:
+            self._health.cancel()
+            self._health = None
+        if self.metrics:
+            logger.debug(f"MCP server '{self.name}' tool latency:\n{self.metrics_summary()}")
+        await asyncio.gather(*(c.close() for c in self.connections), return_exceptions=True)
+
+
 class MCPToolWrapper(Tool):
     """Wraps a single MCP server tool as a nanobot Tool."""
 
-    def __init__(self, session, server_name: str, tool_def):
-        self._session = session
+    def __init__(self, client: MCPClient, server_name: str, tool_def):
+        self._client = client
         self._original_name = tool_def.name
         self._name = f"mcp_{server_name}_{tool_def.name}"
         self._description = tool_def.description or tool_def.name
@@ -33,7 +354,7 @@ class MCPToolWrapper(Tool):
 
     async def execute(self, **kwargs: Any) -> str:
         from mcp import types
-        result = await self._session.call_tool(self._original_name, arguments=kwargs)
+        result = await self._client.call_tool(self._original_name, kwargs)
         parts = []
         for block in result.content:
             if isinstance(block, types.TextContent):
@@ -43,38 +364,110 @@ class MCPToolWrapper(Tool):
         return "\n".join(parts) or "(no output)"
 
 
+def _cache_path(cache_dir: Path, name: str) -> Path:
+    return cache_dir / f"{name}.json"
+
+
+def _config_fingerprint(cfg) -> str:
+    data = cfg.model_dump() if hasattr(cfg, "model_dump") else vars(cfg)
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def load_cached_tools(cache_dir: Path, name: str, cfg) -> list | None:
+    """Load tool definitions cached from the server's last run, if still valid."""
+    path = _cache_path(cache_dir, name)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("fingerprint") != _config_fingerprint(cfg):
+        return None
+    return [SimpleNamespace(**t) for t in data.get("tools", [])]
+
+
+def save_cached_tools(cache_dir: Path, name: str, cfg, tools: list) -> None:
+    """Persist tool definitions so the next start can skip the handshake."""
+    data = {
+        "fingerprint": _config_fingerprint(cfg),
+        "tools": [
+            {"name": t.name, "description": t.description, "inputSchema": t.inputSchema}
+            for t in tools
+        ],
+    }
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = _cache_path(cache_dir, name).with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(_cache_path(cache_dir, name))
+    except OSError as e:
+        logger.warning(f"MCP server '{name}': failed to cache tool schemas: {e}")
+
+
+def _sync_tools(registry: ToolRegistry, client: MCPClient, tools: list, owned: set[str]) -> None:
+    """Register a server's tools, dropping ones that disappeared since last time."""
+    current = set()
+    for tool_def in tools:
+        wrapper = MCPToolWrapper(client, client.name, tool_def)
+        registry.register(wrapper)
+        current.add(wrapper.name)
+        logger.debug(f"MCP: registered tool '{wrapper.name}' from server '{client.name}'")
+    for stale in owned - current:
+        registry.unregister(stale)
+    owned.clear()
+    owned.update(current)
+
+
 async def connect_mcp_servers(
-    mcp_servers: dict, registry: ToolRegistry, stack: AsyncExitStack
-) -> None:
-    """Connect to configured MCP servers and register their tools."""
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
+    mcp_servers: dict,
+    registry: ToolRegistry,
+    stack: AsyncExitStack,
+    cache_dir: Path | None = None,
+) -> dict[str, MCPClient]:
+    """
+    Connect to configured MCP servers concurrently and register their tools.
 
-    for name, cfg in mcp_servers.items():
-        try:
-            if cfg.command:
-                params = StdioServerParameters(
-                    command=cfg.command, args=cfg.args, env=cfg.env or None
-                )
-                read, write = await stack.enter_async_context(stdio_client(params))
-            elif cfg.url:
-                from mcp.client.streamable_http import streamable_http_client
-                read, write, _ = await stack.enter_async_context(
-                    streamable_http_client(cfg.url)
-                )
-            else:
-                logger.warning(f"MCP server '{name}': no command or url configured, skipping")
-                continue
+    Servers marked ``lazy`` with a valid schema cache register their tools
+    immediately and only start on the first call to one of them. Tools are
+    re-registered whenever a server reconnects.
+
+    Returns:
+        Clients by server name (including lazy, not-yet-started ones).
+    """
+    if cache_dir is None:
+        from nanobot.utils.helpers import get_data_path
+        cache_dir = get_data_path() / "mcp"
+    clients: dict[str, MCPClient] = {}
 
-            session = await stack.enter_async_context(ClientSession(read, write))
-            await session.initialize()
+    async def start(name: str, cfg) -> None:
+        if not cfg.command and not cfg.url:
+            logger.warning(f"MCP server '{name}': no command or url configured, skipping")
+            return
 
-            tools = await session.list_tools()
-            for tool_def in tools.tools:
-                wrapper = MCPToolWrapper(session, name, tool_def)
-                registry.register(wrapper)
-                logger.debug(f"MCP: registered tool '{wrapper.name}' from server '{name}'")
+        client = MCPClient(name, cfg)
+        stack.push_async_callback(client.close)
+        owned: set[str] = set()
 
-            logger.info(f"MCP server '{name}': connected, {len(tools.tools)} tools registered")
+        def refresh(tools: list) -> None:
+            _sync_tools(registry, client, tools, owned)
+            if cfg.lazy:
+                save_cached_tools(cache_dir, name, cfg, tools)
+        client.on_tools = refresh
+
+        if cfg.lazy:
+            cached = load_cached_tools(cache_dir, name, cfg)
+            if cached is not None:
+                _sync_tools(registry, client, cached, owned)
+                clients[name] = client
+                logger.info(f"MCP server '{name}': {len(cached)} tools from cache, connects on first use")
+                return
+
+        try:
+            tools = await client.connect()
         except Exception as e:
             logger.error(f"MCP server '{name}': failed to connect: {e}")
+            return
+        clients[name] = client
+        logger.info(f"MCP server '{name}': connected, {len(tools)} tools registered")
+
+    await asyncio.gather(*(start(name, cfg) for name, cfg in mcp_servers.items()))
+    return clients
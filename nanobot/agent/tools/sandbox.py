@@ -0,0 +1,312 @@
+"""Resource-limited execution backend for the exec tool."""
+
+import asyncio
+import os
+import shutil
+import signal
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from nanobot.config.schema import ExecSandboxConfig
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class ResourceUsage:
+    """Resources consumed by a single sandboxed command."""
+
+    wall_s: float
+    user_s: float
+    sys_s: float
+    max_rss_kb: int | None = None
+    limit_hit: str | None = None
+
+    def summary(self) -> str:
+        parts = [
+            f"wall {self.wall_s:.2f}s",
+            f"cpu {self.user_s:.2f}s user / {self.sys_s:.2f}s sys",
+        ]
+        if self.max_rss_kb is not None:
+            parts.append(f"peak mem {self.max_rss_kb / 1024:.1f} MB")
+        text = "[resources: " + ", ".join(parts) + "]"
+        if self.limit_hit:
+            text += f"\nError: {self.limit_hit} limit exceeded"
+        return text
+
+
+@dataclass
+class SandboxRun:
+    """A command started by ExecSandbox; call ``finish()`` once it has exited."""
+
+    process: asyncio.subprocess.Process
+    sandbox: "ExecSandbox"
+    started: float = field(default_factory=time.monotonic)
+    rusage_before: tuple[float, float] = (0.0, 0.0)
+    cgroup: Path | None = None
+
+    def finish(self) -> ResourceUsage:
+        return self.sandbox._collect_usage(self)
+
+    async def cleanup(self) -> None:
+        """Kill what is left of the process and remove its cgroup (no-op after ``finish()``)."""
+        if self.process.returncode is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+        if self.cgroup is not None:
+            self.sandbox._remove_cgroup(self.cgroup)
+            self.cgroup = None
+
+
+class ExecSandbox:
+    """
+    Runs shell commands under resource limits.
+
+    Always applies ``setrlimit`` (CPU seconds, address space, file size and
+    optionally process count) in the child. When requested it also places the
+    command in its own cgroup v2 group (if the current cgroup is delegated and
+    writable) and wraps it in Linux namespaces via bubblewrap or unshare.
+    Every feature beyond rlimits degrades gracefully when unavailable.
+    """
+
+    NAMESPACE_MODES = ("none", "auto", "bwrap", "unshare")
+    _CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+    def __init__(
+        self,
+        cpu_seconds: int = 60,
+        memory_mb: int = 2048,
+        file_size_mb: int = 256,
+        max_processes: int = 0,
+        namespace: str = "none",
+        network: bool = True,
+        cgroup: bool = False,
+    ):
+        if namespace not in self.NAMESPACE_MODES:
+            raise ValueError(f"Unknown sandbox namespace mode: {namespace!r}")
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.file_size_mb = file_size_mb
+        self.max_processes = max_processes
+        self.namespace = self._resolve_namespace(namespace)
+        self.network = network
+        self.cgroup = cgroup
+        self._cgroup_parent: Path | None = self._find_cgroup_parent() if cgroup else None
+
+    @staticmethod
+    def _resolve_namespace(mode: str) -> str:
+        if mode == "auto":
+            if shutil.which("bwrap"):
+                return "bwrap"
+            if shutil.which("unshare"):
+                return "unshare"
+            return "none"
+        if mode != "none" and not shutil.which(mode):
+            logger.warning(f"Sandbox: '{mode}' not found, running without namespaces")
+            return "none"
+        return mode
+
+    def preexec(self) -> None:
+        """Apply rlimits in the child process (runs between fork and exec)."""
+        if resource is None:
+            return
+        limits = [
+            (resource.RLIMIT_CPU, self.cpu_seconds),
+            (resource.RLIMIT_AS, self.memory_mb * 1024 * 1024),
+            (resource.RLIMIT_FSIZE, self.file_size_mb * 1024 * 1024),
+            (resource.RLIMIT_NPROC, self.max_processes),
+        ]
+        for which, value in limits:
+            if value and value > 0:
+                # One second of CPU grace so SIGXCPU arrives before the hard SIGKILL
+                hard = value + 1 if which == resource.RLIMIT_CPU else value
+                resource.setrlimit(which, (value, hard))
+
+    def wrap(self, command: str, cwd: str) -> list[str]:
+        """Build the argv that runs ``command`` inside the configured namespaces."""
+        return self.wrap_argv(["/bin/sh", "-c", command], cwd)
+
+    def wrap_argv(self, shell: list[str], cwd: str) -> list[str]:
+        """Build the argv that runs ``shell`` (a full argv) inside the configured namespaces."""
+        if self.namespace == "bwrap":
+            argv = [
+                "bwrap", "--ro-bind", "/", "/", "--dev", "/dev", "--proc", "/proc",
+                "--tmpfs", "/tmp", "--bind", cwd, cwd, "--unshare-all",
+                "--die-with-parent", "--chdir", cwd,
+            ]
+            if self.network:
+                argv.append("--share-net")
+            return argv + ["--"] + shell
+        if self.namespace == "unshare":
+            argv = [
+                "unshare", "--user", "--map-root-user", "--pid", "--fork",
+                "--mount-proc", "--ipc", "--uts",
+            ]
+            if not self.network:
+                argv.append("--net")
+            return argv + ["--"] + shell
+        return shell
+
+    async def spawn(self, command: str, cwd: str) -> SandboxRun:
+        """Start a command under the sandbox with piped stdout/stderr."""
+        return await self._start(self.wrap(command, cwd), cwd, stderr=asyncio.subprocess.PIPE)
+
+    async def spawn_shell(self, shell: str, cwd: str) -> SandboxRun:
+        """Start a long-lived shell under the sandbox, reading commands from stdin."""
+        return await self._start(
+            self.wrap_argv([shell], cwd), cwd,
+            stdin=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        )
+
+    async def _start(self, argv: list[str], cwd: str, **streams: int) -> SandboxRun:
+        cgroup = self._create_cgroup()
+
+        def preexec() -> None:
+            if cgroup is not None:
+                (cgroup / "cgroup.procs").write_text(str(os.getpid()))
+            self.preexec()
+
+        before = self._children_cpu()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *argv,
+                stdout=asyncio.subprocess.PIPE,
+                cwd=cwd,
+                start_new_session=True,
+                preexec_fn=preexec,
+                **streams,
+            )
+        except BaseException:
+            if cgroup is not None:
+                self._remove_cgroup(cgroup)
+            raise
+        return SandboxRun(process=process, sandbox=self, rusage_before=before, cgroup=cgroup)
+
+    @staticmethod
+    def _children_cpu() -> tuple[float, float]:
+        if resource is None:
+            return 0.0, 0.0
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime, usage.ru_stime
+
+    def _collect_usage(self, run: SandboxRun) -> ResourceUsage:
+        wall = time.monotonic() - run.started
+        user, sys_ = self._children_cpu()
+        # RUSAGE_CHILDREN is process-wide, so overlapping commands blur each
+        # other's CPU numbers; cgroup accounting below is exact when available.
+        usage = ResourceUsage(
+            wall_s=wall,
+            user_s=max(0.0, user - run.rusage_before[0]),
+            sys_s=max(0.0, sys_ - run.rusage_before[1]),
+        )
+        if run.cgroup is not None:
+            self._read_cgroup_usage(run.cgroup, usage)
+            self._remove_cgroup(run.cgroup)
+            run.cgroup = None
+
+        # Killed directly (-sig) or reported by the shell for its last child (128 + sig)
+        returncode = run.process.returncode
+        if returncode in (-signal.SIGXCPU, 128 + signal.SIGXCPU):
+            usage.limit_hit = "CPU time"
+        elif returncode in (-signal.SIGXFSZ, 128 + signal.SIGXFSZ):
+            usage.limit_hit = "file size"
+        return usage
+
+    # ------------------------------------------------------------------
+    # cgroup v2 (best effort)
+    # ------------------------------------------------------------------
+
+    def _find_cgroup_parent(self) -> Path | None:
+        """Locate our own cgroup v2 directory if we can create children in it."""
+        try:
+            for line in Path("/proc/self/cgroup").read_text().splitlines():
+                if line.startswith("0::"):
+                    parent = self._CGROUP_ROOT / line[3:].lstrip("/")
+                    if os.access(parent, os.W_OK):
+                        return parent
+        except OSError:
+            pass
+        logger.warning("Sandbox: cgroup v2 not writable, falling back to rlimits only")
+        return None
+
+    def _create_cgroup(self) -> Path | None:
+        if self._cgroup_parent is None:
+            return None
+        path = self._cgroup_parent / f"nanobot-exec-{uuid.uuid4().hex[:12]}"
+        try:
+            path.mkdir()
+            settings = {
+                "memory.max": str(self.memory_mb * 1024 * 1024) if self.memory_mb else "max",
+                "pids.max": str(self.max_processes) if self.max_processes else "max",
+            }
+            for name, value in settings.items():
+                if (path / name).exists():
+                    (path / name).write_text(value)
+            return path
+        except OSError as e:
+            logger.debug(f"Sandbox: cannot create cgroup {path}: {e}")
+            self._remove_cgroup(path)
+            return None
+
+    @staticmethod
+    def _read_cgroup_usage(path: Path, usage: ResourceUsage) -> None:
+        try:
+            stats = dict(
+                line.split() for line in (path / "cpu.stat").read_text().splitlines()
+            )
+            usage.user_s = int(stats.get("user_usec", 0)) / 1e6
+            usage.sys_s = int(stats.get("system_usec", 0)) / 1e6
+        except (OSError, ValueError):
+            pass
+        try:
+            usage.max_rss_kb = int((path / "memory.peak").read_text()) // 1024
+        except (OSError, ValueError):
+            pass
+        try:
+            events = dict(
+                line.split() for line in (path / "memory.events").read_text().splitlines()
+            )
+            if int(events.get("oom_kill", 0)) > 0:
+                usage.limit_hit = "memory"
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _remove_cgroup(path: Path) -> None:
+        try:
+            path.rmdir()
+        except OSError:
+            pass
+
+
+def make_sandbox(config: "ExecSandboxConfig") -> ExecSandbox | None:
+    """Create a sandbox from config, or None when disabled or unsupported."""
+    if not config.enabled:
+        return None
+    if resource is None:
+        logger.warning("Sandbox: resource limits are not supported on this platform")
+        return None
+    return ExecSandbox(
+        cpu_seconds=config.cpu_seconds,
+        memory_mb=config.memory_mb,
+        file_size_mb=config.file_size_mb,
+        max_processes=config.max_processes,
+        namespace=config.namespace,
+        network=config.network,
+        cgroup=config.cgroup,
+    )
@@ -0,0 +1,201 @@
+"""Per-request tool subset selection."""
+
+import math
+import re
+from collections import Counter, deque
+from typing import Any, Iterable
+
+from nanobot.agent.runner import AgentHooks, RunState
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.providers.base import ToolCallRequest
+
+# Built-in tools are small and broadly useful, so they are always sent.
+DEFAULT_PINNED = (
+    "read_file", "write_file", "edit_file", "list_dir", "exec",
+    "web_search", "web_fetch", "message", "spawn", "subagents", "cron",
+    "recall_history", "semantic_search", "read_tool_result", "list_tools",
+)
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it me my of on or please "
+    "that the this to use what when with you your mcp".split()
+)
+
+
+def _tokenize(text: str) -> list[str]:
+    tokens = []
+    for tok in re.findall(r"[a-z0-9]+", text.lower()):
+        if tok in _STOPWORDS:
+            continue
+        if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        tokens.append(tok)
+    return tokens
+
+
+class ToolSelector:
+    """
+    Chooses which tool definitions to send with each LLM request.
+
+    Pinned tools are always included. The remaining tools (typically MCP
+    wrappers) are ranked with BM25 over their name, description and parameter
+    names against the current user message, boosted by recent usage, and only
+    the top ``top_k`` are sent. The ``list_tools`` tool lets the model discover
+    and activate anything that was left out.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    RECENT_BOOST = 1.0
+
+    def __init__(
+        self,
+        registry: ToolRegistry,
+        top_k: int = 8,
+        pinned: Iterable[str] = (),
+        recent_size: int = 20,
+    ):
+        self.registry = registry
+        self.top_k = top_k
+        self.pinned = set(DEFAULT_PINNED) | set(pinned)
+        self._recent: deque[str] = deque(maxlen=recent_size)
+        self._indexed_defs: list[dict[str, Any]] | None = None
+        self._by_name: dict[str, dict[str, Any]] = {}
+        self._docs: dict[str, Counter[str]] = {}
+        self._doc_len: dict[str, int] = {}
+        self._idf: dict[str, float] = {}
+        self._avg_len = 1.0
+
+    def _ensure_index(self) -> None:
+        """(Re)build the BM25 index when the registry's definitions change."""
+        defs = self.registry.get_definitions()
+        if defs is self._indexed_defs:
+            return
+        self._indexed_defs = defs
+        self._by_name = {d["function"]["name"]: d for d in defs}
+        self._docs = {}
+        for name, d in self._by_name.items():
+            if name in self.pinned:
+                continue
+            fn = d["function"]
+            params = fn.get("parameters", {}).get("properties", {})
+            text = " ".join([
+                name, name,  # names are the strongest signal
+                fn.get("description", ""),
+                " ".join(params),
+                " ".join(str(p.get("description", "")) for p in params.values() if isinstance(p, dict)),
+            ])
+            self._docs[name] = Counter(_tokenize(text))
+
+        self._doc_len = {n: sum(c.values()) for n, c in self._docs.items()}
+        self._avg_len = (sum(self._doc_len.values()) / len(self._docs)) if self._docs else 1.0
+        df: Counter[str] = Counter()
+        for counts in self._docs.values():
+            df.update(counts.keys())
+        n = len(self._docs)
+        self._idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def rank(self, query: str) -> list[tuple[str, float]]:
+        """Score every non-pinned tool against a query, best first (zero scores dropped)."""
+        self._ensure_index()
+        terms = set(_tokenize(query))
+        recent = Counter(self._recent)
+        scores: list[tuple[str, float]] = []
+        for name, counts in self._docs.items():
+            score = 0.0
+            norm = self.K1 * (1 - self.B + self.B * self._doc_len[name] / self._avg_len)
+            for t in terms:
+                tf = counts.get(t)
+                if tf:
+                    score += self._idf[t] * tf * (self.K1 + 1) / (tf + norm)
+            if name in recent:
+                score += self.RECENT_BOOST * min(recent[name], 3)
+            if score > 0:
+                scores.append((name, score))
+        scores.sort(key=lambda x: -x[1])
+        return scores
+
+    def select(self, query: str, active: Iterable[str] = ()) -> list[dict[str, Any]]:
+        """Definitions to send: pinned + explicitly activated + top-K ranked tools."""
+        self._ensure_index()
+        if len(self._docs) <= self.top_k:
+            return self._indexed_defs
+        chosen = {name for name, _ in self.rank(query)[: self.top_k]}
+        chosen.update(active)
+        return [
+            d for name, d in self._by_name.items()
+            if name in self.pinned or name in chosen
+        ]
+
+    def search(self, query: str, limit: int = 20) -> list[str]:
+        """Find non-pinned tools for ``list_tools``; an empty query lists everything."""
+        self._ensure_index()
+        if not query.strip():
+            return sorted(self._docs)[:limit]
+        return [name for name, _ in self.rank(query)[:limit]]
+
+    def describe(self, names: list[str]) -> str:
+        lines = []
+        for name in names:
+            desc = self._by_name.get(name, {}).get("function", {}).get("description", "")
+            lines.append(f"- {name}: {desc.strip().splitlines()[0] if desc.strip() else ''}")
+        return "\n".join(lines)
+
+    def record_used(self, names: Iterable[str]) -> None:
+        """Remember tools used in a turn so follow-up turns keep them."""
+        self._recent.extend(n for n in names if n not in self.pinned)
+
+
+class SelectionHooks(AgentHooks):
+    """Runner hooks that send a ranked tool subset and widen it as tools get used."""
+
+    def __init__(self, selector: ToolSelector, query: str):
+        self.selector = selector
+        self.query = query
+        self.active: set[str] = set()
+
+    def tool_definitions(self, state: RunState) -> list[dict[str, Any]]:
+        return self.selector.select(self.query, self.active)
+
+    async def after_tool(self, state: RunState, call: ToolCallRequest, result: str) -> str:
+        self.active.add(call.name)
+        if call.name == "list_tools":
+            self.active.update(self.selector.search(call.arguments.get("query", "")))
+        return result
+
+
+class ListToolsTool(Tool):
+    """Escape hatch for tool selection: find and enable tools that were not sent."""
+
+    def __init__(self, selector: ToolSelector):
+        self._selector = selector
+
+    @property
+    def name(self) -> str:
+        return "list_tools"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Search additional tools that are available but not currently loaded "
+            "(e.g. MCP integrations). Matching tools become callable after this call."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Keywords describing the capability you need (empty lists all)"
+                },
+            },
+        }
+
+    async def execute(self, query: str = "", **kwargs: Any) -> str:
+        names = self._selector.search(query)
+        if not names:
+            return f"No additional tools match '{query}'."
+        return "Enabled tools:\n" + self._selector.describe(names)
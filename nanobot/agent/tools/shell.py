@@ -3,15 +3,77 @@
 import asyncio
 import os
 import re
+import shlex
+import signal
+import time
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 
-from nanobot.agent.tools.base import Tool
+from loguru import logger
+
+from nanobot.agent.tools.base import RoutingContext, Tool
+from nanobot.bus.events import OutboundMessage
+
+if TYPE_CHECKING:
+    from nanobot.agent.tools.sandbox import ExecSandbox, SandboxRun
+
+
+class OutputBuffer:
+    """
+    Bounded buffer that keeps the head and tail of a byte stream.
+
+    The first ``head_bytes`` are kept verbatim, after that only the most recent
+    ``tail_bytes`` are retained. Everything in between is counted but dropped,
+    so memory stays bounded no matter how much a command prints.
+    """
+
+    def __init__(self, head_bytes: int, tail_bytes: int):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.total = 0
+        self._head = bytearray()
+        self._tail = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        room = self.head_bytes - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if not data or self.tail_bytes <= 0:
+            return
+        self._tail += data
+        if len(self._tail) > self.tail_bytes:
+            del self._tail[: len(self._tail) - self.tail_bytes]
+
+    @property
+    def dropped(self) -> int:
+        """Number of bytes discarded between head and tail."""
+        return self.total - len(self._head) - len(self._tail)
+
+    def recent(self, n: int) -> str:
+        """Return (roughly) the last ``n`` bytes seen, decoded."""
+        data = bytes(self._tail[-n:])
+        if len(data) < n and not self.dropped:
+            data = bytes(self._head[-(n - len(data)):]) + data
+        return data.decode("utf-8", errors="replace")
+
+    def text(self) -> str:
+        head = self._head.decode("utf-8", errors="replace")
+        if not self._tail:
+            return head
+        tail = self._tail.decode("utf-8", errors="replace")
+        if self.dropped:
+            return f"{head}\n... (truncated, {self.dropped} bytes omitted) ...\n{tail}"
+        return head + tail
 
 
 class ExecTool(Tool):
     """Tool to execute shell commands."""
-    
+
+    _CHUNK_SIZE = 64 * 1024
+    _PROGRESS_TAIL = 500
+
     def __init__(
         self,
         timeout: int = 60,
@@ -19,6 +81,13 @@ class ExecTool(Tool):
         deny_patterns: list[str] | None = None,
         allow_patterns: list[str] | None = None,
         restrict_to_workspace: bool = False,
+        max_output_chars: int = 10000,
+        max_output_bytes: int = 16 * 1024 * 1024,
+        progress_interval: float = 0,
+        send_callback: Callable[[OutboundMessage], Awaitable[None]] | None = None,
+        persistent: bool = False,
+        session_ttl: float = 600,
+        sandbox: "ExecSandbox | None" = None,
     ):
         self.timeout = timeout
         self.working_dir = working_dir
@@ -34,15 +103,34 @@ class ExecTool(Tool):
         ]
         self.allow_patterns = allow_patterns or []
         self.restrict_to_workspace = restrict_to_workspace
-    
+        self.max_output_chars = max_output_chars
+        self.max_output_bytes = max_output_bytes
+        self.progress_interval = progress_interval
+        self._send_callback = send_callback
+        self._route = RoutingContext()
+        self.sandbox = sandbox
+        self._sessions = None
+        if persistent and os.name != "nt":
+            from nanobot.agent.tools.shell_session import ShellSessionPool
+            self._sessions = ShellSessionPool(working_dir or os.getcwd(), idle_ttl=session_ttl, sandbox=sandbox)
+            if sandbox:
+                logger.warning(
+                    "Sandbox: persistent shells run inside one sandbox per session; "
+                    "limits apply per session and per-command resource usage is not reported"
+                )
+
+    def set_context(self, channel: str, chat_id: str) -> None:
+        """Set the current chat (progress updates and persistent shell selection)."""
+        self._route.set(channel, chat_id)
+
     @property
     def name(self) -> str:
         return "exec"
-    
+
     @property
     def description(self) -> str:
         return "Execute a shell command and return its output. Use with caution."
-    
+
     @property
     def parameters(self) -> dict[str, Any]:
         return {
@@ -59,54 +147,198 @@ class ExecTool(Tool):
             },
             "required": ["command"]
         }
-    
+
     async def execute(self, command: str, working_dir: str | None = None, **kwargs: Any) -> str:
         cwd = working_dir or self.working_dir or os.getcwd()
         guard_error = self._guard_command(command, cwd)
         if guard_error:
             return guard_error
-        
+        if self._sessions is not None:
+            return await self._execute_in_session(command, working_dir)
+
+        run = None
+        try:
+            if self.sandbox:
+                run = await self.sandbox.spawn(command, cwd)
+                process = run.process
+            else:
+                process = await asyncio.create_subprocess_shell(
+                    command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=cwd,
+                    # Own process group, so timeouts can take down the whole tree
+                    start_new_session=os.name != "nt",
+                )
+        except Exception as e:
+            return f"Error executing command: {str(e)}"
+
+        try:
+            return await self._collect(command, process, run)
+        finally:
+            # Only does work if the command failed or was cancelled before finish()
+            if run:
+                await run.cleanup()
+
+    async def _collect(
+        self, command: str, process: asyncio.subprocess.Process, run: "SandboxRun | None"
+    ) -> str:
+        """Stream a started command's output into bounded buffers and build the result."""
+        # Both streams share the max_output_chars budget: a quarter each for head and tail
+        quarter = self.max_output_chars // 4
+        stdout = OutputBuffer(quarter, quarter)
+        stderr = OutputBuffer(quarter, quarter)
+        overflow = False
+
+        async def pump(stream: asyncio.StreamReader, buf: OutputBuffer) -> None:
+            nonlocal overflow
+            while chunk := await stream.read(self._CHUNK_SIZE):
+                buf.write(chunk)
+                if not overflow and stdout.total + stderr.total > self.max_output_bytes:
+                    overflow = True
+                    self._kill_process_group(process)
+
+        progress = self._start_progress(command, stdout, stderr)
         try:
-            process = await asyncio.create_subprocess_shell(
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=cwd,
+            await asyncio.wait_for(
+                asyncio.gather(
+                    pump(process.stdout, stdout),
+                    pump(process.stderr, stderr),
+                    process.wait(),
+                ),
+                timeout=self.timeout,
             )
-            
+        except asyncio.TimeoutError:
+            self._kill_process_group(process)
             try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=self.timeout
-                )
+                await asyncio.wait_for(process.wait(), timeout=5)
             except asyncio.TimeoutError:
-                process.kill()
-                return f"Error: Command timed out after {self.timeout} seconds"
-            
-            output_parts = []
-            
-            if stdout:
-                output_parts.append(stdout.decode("utf-8", errors="replace"))
-            
-            if stderr:
-                stderr_text = stderr.decode("utf-8", errors="replace")
-                if stderr_text.strip():
-                    output_parts.append(f"STDERR:\n{stderr_text}")
-            
-            if process.returncode != 0:
-                output_parts.append(f"\nExit code: {process.returncode}")
-            
-            result = "\n".join(output_parts) if output_parts else "(no output)"
-            
-            # Truncate very long output
-            max_len = 10000
-            if len(result) > max_len:
-                result = result[:max_len] + f"\n... (truncated, {len(result) - max_len} more chars)"
-            
+                pass
+            result = f"Error: Command timed out after {self.timeout} seconds"
+            if stdout.total or stderr.total:
+                result += "\n\nPartial output:\n" + self._format_output(stdout, stderr, None)
+            if run:
+                result += "\n" + run.finish().summary()
             return result
-            
+        except Exception as e:
+            self._kill_process_group(process)
+            return f"Error executing command: {str(e)}"
+        finally:
+            if progress:
+                progress.cancel()
+
+        result = self._format_output(stdout, stderr, process.returncode)
+        if overflow:
+            result += (
+                f"\nError: Output exceeded {self.max_output_bytes} bytes, command was killed"
+            )
+        if run:
+            result += "\n" + run.finish().summary()
+        return result
+
+    async def _execute_in_session(self, command: str, working_dir: str | None) -> str:
+        """Run a command in the persistent shell bound to the current chat."""
+        key = f"{self._route.channel}:{self._route.chat_id}" if self._route.channel else "default"
+        session = self._sessions.get(key)
+        if working_dir:
+            command = f"cd {shlex.quote(working_dir)} && {command}"
+
+        half = self.max_output_chars // 2
+        output = OutputBuffer(half, half)
+        progress = self._start_progress(command, output, OutputBuffer(0, 0))
+        try:
+            returncode, error = await session.run(
+                command, self.timeout, output, self.max_output_bytes
+            )
         except Exception as e:
             return f"Error executing command: {str(e)}"
+        finally:
+            if progress:
+                progress.cancel()
+
+        if error == "timeout":
+            result = f"Error: Command timed out after {self.timeout} seconds (shell session restarted)"
+            if output.total:
+                result += "\n\nPartial output:\n" + output.text()
+            return result
+
+        result = self._format_output(output, OutputBuffer(0, 0), returncode)
+        if error == "overflow":
+            result += (
+                f"\nError: Output exceeded {self.max_output_bytes} bytes, "
+                "command was killed (shell session restarted)"
+            )
+        elif error == "exited":
+            result += "\n(shell exited; a fresh session will be started on the next command)"
+        return result
+
+    async def close(self) -> None:
+        """Shut down persistent shell sessions, if any."""
+        if self._sessions is not None:
+            await self._sessions.close_all()
+
+    def kill(self) -> None:
+        """Kill persistent shell sessions without waiting (for exits that cannot await)."""
+        if self._sessions is not None:
+            self._sessions.kill_all()
+
+    def _format_output(
+        self, stdout: OutputBuffer, stderr: OutputBuffer, returncode: int | None
+    ) -> str:
+        """Assemble the tool result from captured streams."""
+        output_parts = []
+
+        if stdout.total:
+            output_parts.append(stdout.text())
+
+        if stderr.total:
+            stderr_text = stderr.text()
+            if stderr_text.strip():
+                output_parts.append(f"STDERR:\n{stderr_text}")
+
+        if returncode:
+            output_parts.append(f"\nExit code: {returncode}")
+
+        return "\n".join(output_parts) if output_parts else "(no output)"
+
+    def _start_progress(
+        self, command: str, stdout: OutputBuffer, stderr: OutputBuffer
+    ) -> asyncio.Task[None] | None:
+        """Start forwarding progress to the current chat, if configured."""
+        if self.progress_interval > 0 and self._send_callback and self._route.channel and self._route.chat_id:
+            return asyncio.create_task(self._report_progress(command, stdout, stderr))
+        return None
+
+    async def _report_progress(
+        self, command: str, stdout: OutputBuffer, stderr: OutputBuffer
+    ) -> None:
+        """Periodically forward the tail of a running command's output to the chat."""
+        started = time.monotonic()
+        label = command if len(command) <= 60 else command[:57] + "..."
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            elapsed = int(time.monotonic() - started)
+            tail = (stdout.recent(self._PROGRESS_TAIL) or stderr.recent(self._PROGRESS_TAIL)).strip()
+            content = f"⏳ `{label}` still running ({elapsed}s)"
+            if tail:
+                content += f"\n```\n{tail}\n```"
+            try:
+                await self._send_callback(OutboundMessage(
+                    channel=self._route.channel, chat_id=self._route.chat_id, content=content,
+                ))
+            except Exception:
+                return
+
+    @staticmethod
+    def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+        """Kill the shell and every child it spawned."""
+        try:
+            if os.name != "nt":
+                os.killpg(process.pid, signal.SIGKILL)
+            elif process.returncode is None:
+                process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
 
     def _guard_command(self, command: str, cwd: str) -> str | None:
         """Best-effort safety guard for potentially destructive commands."""
@@ -0,0 +1,240 @@
+"""Persistent shell sessions for the exec tool."""
+
+import asyncio
+import os
+import shlex
+import shutil
+import signal
+import time
+import uuid
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+from nanobot.agent.tools.shell import OutputBuffer
+
+if TYPE_CHECKING:
+    from nanobot.agent.tools.sandbox import ExecSandbox, SandboxRun
+
+
+class ShellSession:
+    """
+    A long-lived shell process that runs commands one at a time.
+
+    Each command is followed by a sentinel line carrying its exit code, so
+    output boundaries can be found without restarting the shell. State such as
+    the working directory, exported variables and activated virtualenvs
+    carries over between commands. With a ``sandbox`` the shell itself is
+    started inside its namespaces and cgroup, so every command inherits them.
+    """
+
+    _CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        cwd: str,
+        shell: str | None = None,
+        sandbox: "ExecSandbox | None" = None,
+    ):
+        self.cwd = cwd
+        self.shell = shell or shutil.which("bash") or "/bin/sh"
+        self.sandbox = sandbox
+        self.last_used = time.monotonic()
+        self._process: asyncio.subprocess.Process | None = None
+        self._run: "SandboxRun | None" = None
+        self._sentinel = f"__NANOBOT_DONE_{uuid.uuid4().hex}__"
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    async def start(self) -> None:
+        """Spawn the shell process."""
+        if self.sandbox:
+            self._run = await self.sandbox.spawn_shell(self.shell, self.cwd)
+            self._process = self._run.process
+            logger.debug(f"Sandboxed shell session started: {self.shell} (pid {self._process.pid})")
+            return
+        self._process = await asyncio.create_subprocess_exec(
+            self.shell,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=self.cwd,
+            start_new_session=True,
+        )
+        logger.debug(f"Shell session started: {self.shell} (pid {self._process.pid})")
+
+    async def run(
+        self, command: str, timeout: float, buf: OutputBuffer, max_bytes: int
+    ) -> tuple[int | None, str | None]:
+        """
+        Run a command in the session, streaming its output into ``buf``.
+
+        Returns:
+            Tuple of (exit_code, error). ``error`` is None on success, or one of
+            "timeout", "overflow" or "exited" when the shell had to be dropped.
+        """
+        async with self._lock:
+            self.last_used = time.monotonic()
+            if not self.alive:
+                await self.start()
+
+            # stdin is detached so the command cannot swallow the sentinel
+            script = (
+                f"eval {shlex.quote(command)} < /dev/null 2>&1\n"
+                f"printf '\\n{self._sentinel} %d\\n' $?\n"
+            )
+            try:
+                self._process.stdin.write(script.encode())
+                await self._process.stdin.drain()
+                result = await asyncio.wait_for(self._read_result(buf, max_bytes), timeout)
+            except asyncio.TimeoutError:
+                await self.close()
+                return None, "timeout"
+            except (BrokenPipeError, ConnectionResetError):
+                result = None
+            finally:
+                self.last_used = time.monotonic()
+
+            if result == "overflow":
+                await self.close()
+                return None, "overflow"
+            if result is None:
+                # The command ended the shell (e.g. `exit 3`); restart on next use
+                process = self._process
+                await self.close()
+                return process.returncode if process else None, "exited"
+            return result, None
+
+    async def _read_result(self, buf: OutputBuffer, max_bytes: int) -> int | str | None:
+        """Read output up to the sentinel; return its exit code, "overflow", or None on EOF."""
+        stdout = self._process.stdout
+        marker = f"\n{self._sentinel} ".encode()
+        keep = len(marker)
+        pending = bytearray()
+
+        while True:
+            chunk = await stdout.read(self._CHUNK_SIZE)
+            if not chunk:
+                buf.write(bytes(pending))
+                return None
+            pending += chunk
+
+            idx = pending.find(marker)
+            if idx >= 0:
+                buf.write(bytes(pending[:idx]))
+                rest = bytes(pending[idx + len(marker):])
+                while b"\n" not in rest:
+                    more = await stdout.read(self._CHUNK_SIZE)
+                    if not more:
+                        break
+                    rest += more
+                try:
+                    return int(rest.split(b"\n", 1)[0])
+                except ValueError:
+                    return -1
+
+            if len(pending) > keep:
+                buf.write(bytes(pending[:-keep]))
+                del pending[:-keep]
+            if buf.total > max_bytes:
+                return "overflow"
+
+    def kill(self) -> None:
+        """Send SIGKILL to the shell's process group; ``close()`` also reaps it."""
+        if self._process is not None:
+            try:
+                os.killpg(self._process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    async def close(self) -> None:
+        """Terminate the shell and everything it started."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        try:
+            await asyncio.wait_for(process.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            pass
+        run, self._run = self._run, None
+        if run:
+            await run.cleanup()
+
+
+class ShellSessionPool:
+    """
+    Keeps one persistent shell per session key and reaps idle ones.
+
+    Shells are created lazily on first use and restarted transparently after
+    a timeout or crash. A background task closes shells that have been idle
+    for longer than ``idle_ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        cwd: str,
+        idle_ttl: float = 600,
+        sandbox: "ExecSandbox | None" = None,
+    ):
+        self.cwd = cwd
+        self.idle_ttl = idle_ttl
+        self.sandbox = sandbox
+        self._sessions: dict[str, ShellSession] = {}
+        self._reaper: asyncio.Task[None] | None = None
+
+    def get(self, key: str) -> ShellSession:
+        """Get (or create) the shell for a session key."""
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._sessions[key] = ShellSession(self.cwd, sandbox=self.sandbox)
+        if self.idle_ttl > 0 and (self._reaper is None or self._reaper.done()):
+            self._reaper = asyncio.create_task(self._reap_loop())
+        return session
+
+    async def reap_idle(self) -> int:
+        """Close shells idle for longer than the TTL. Returns how many were closed."""
+        now = time.monotonic()
+        # Detach every stale shell before the first await, so a command started
+        # while an earlier one is closing gets a fresh shell instead of one we kill
+        stale = [
+            self._sessions.pop(key) for key, s in list(self._sessions.items())
+            if not s.busy and now - s.last_used > self.idle_ttl
+        ]
+        for session in stale:
+            await session.close()
+        if stale:
+            logger.debug(f"Reaped {len(stale)} idle shell session(s)")
+        return len(stale)
+
+    async def _reap_loop(self) -> None:
+        while self._sessions:
+            await asyncio.sleep(min(self.idle_ttl, 60))
+            await self.reap_idle()
+
+    async def close_all(self) -> None:
+        """Close every shell and stop the reaper."""
+        if self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+        sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            await session.close()
+
+    def kill_all(self) -> None:
+        """Kill every shell's process group immediately, without waiting for exit."""
+        for session in self._sessions.values():
+            session.kill()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
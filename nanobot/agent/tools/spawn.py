@@ -1,8 +1,8 @@
-"""Spawn tool for creating background subagents."""
+"""Tools for spawning and managing background subagents."""
 
 from typing import Any, TYPE_CHECKING
 
-from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.base import RoutingContext, Tool
 
 if TYPE_CHECKING:
     from nanobot.agent.subagent import SubagentManager
@@ -18,13 +18,11 @@ class SpawnTool(Tool):
     
     def __init__(self, manager: "SubagentManager"):
         self._manager = manager
-        self._origin_channel = "cli"
-        self._origin_chat_id = "direct"
+        self._route = RoutingContext("cli", "direct")
     
     def set_context(self, channel: str, chat_id: str) -> None:
         """Set the origin context for subagent announcements."""
-        self._origin_channel = channel
-        self._origin_chat_id = chat_id
+        self._route.set(channel, chat_id)
     
     @property
     def name(self) -> str:
@@ -60,6 +58,61 @@ class SpawnTool(Tool):
         return await self._manager.spawn(
             task=task,
             label=label,
-            origin_channel=self._origin_channel,
-            origin_chat_id=self._origin_chat_id,
+            origin_channel=self._route.channel,
+            origin_chat_id=self._route.chat_id,
         )
+
+
+class SubagentsTool(Tool):
+    """Tool to list or cancel the subagents spawned from the current chat."""
+    
+    def __init__(self, manager: "SubagentManager"):
+        self._manager = manager
+        self._route = RoutingContext("cli", "direct")
+    
+    def set_context(self, channel: str, chat_id: str) -> None:
+        """Set the chat whose subagents this tool manages."""
+        self._route.set(channel, chat_id)
+    
+    @property
+    def name(self) -> str:
+        return "subagents"
+    
+    @property
+    def description(self) -> str:
+        return "List or cancel background subagents started from this chat. Actions: list, cancel."
+    
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "action": {
+                    "type": "string",
+                    "enum": ["list", "cancel"],
+                    "description": "Action to perform",
+                },
+                "task_id": {
+                    "type": "string",
+                    "description": "Subagent id to cancel, or 'all'",
+                },
+            },
+            "required": ["action"],
+        }
+    
+    async def execute(self, action: str, task_id: str | None = None, **kwargs: Any) -> str:
+        origin = f"{self._route.channel}:{self._route.chat_id}"
+        if action == "list":
+            tasks = self._manager.list_tasks(origin)
+            if not tasks:
+                return "No subagents running."
+            return "Subagents:\n" + "\n".join(f"- {t.describe()}" for t in tasks)
+        if action == "cancel":
+            if not task_id:
+                return "Error: task_id is required for cancel"
+            if task_id == "all":
+                return f"Cancelled {self._manager.cancel_all(origin)} subagent(s)"
+            if self._manager.cancel(task_id, origin):
+                return f"Cancelled subagent {task_id}"
+            return f"Subagent {task_id} not found"
+        return f"Unknown action: {action}"
@@ -1,12 +1,14 @@
 """Base channel interface for chat platforms."""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 from loguru import logger
 
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
+from nanobot.channels.ratelimit import Outbox, RateLimit
 
 
 class BaseChannel(ABC):
@@ -15,9 +17,16 @@ class BaseChannel(ABC):
     
     Each channel (Telegram, Discord, etc.) should implement this interface
     to integrate with the nanobot message bus.
+
+    Outbound messages reach ``send()`` through ``deliver()``, which queues
+    them in an ``Outbox`` that applies ``rate_limit`` (the platform's
+    defaults, overridable per channel in config) and coalesces queued
+    messages to the same chat. ``send()`` raises ``RateLimitedError`` when the
+    platform pushes back, and the message is retried later.
     """
     
     name: str = "base"
+    rate_limit: RateLimit = RateLimit()
     
     def __init__(self, config: Any, bus: MessageBus):
         """
@@ -30,6 +39,8 @@ class BaseChannel(ABC):
         self.config = config
         self.bus = bus
         self._running = False
+        self._outbox: Outbox | None = None
+        self._inbound_tails: dict[str, asyncio.Task[None]] = {}  # chat_id -> last deferred message
     
     @abstractmethod
     async def start(self) -> None:
@@ -58,6 +69,22 @@ class BaseChannel(ABC):
         """
         pass
     
+    def split_outbound(self, msg: OutboundMessage) -> list[OutboundMessage]:
+        """Split a message into separately rate-limited sends (default: one)."""
+        return [msg]
+
+    def deliver(self, msg: OutboundMessage) -> None:
+        """Queue a message for rate-limited delivery through ``send()``; never blocks."""
+        if self._outbox is None:
+            self._outbox = Outbox(self.send, self.rate_limit, name=self.name, split=self.split_outbound)
+        self._outbox.put(msg)
+
+    async def close_outbox(self) -> None:
+        """Drop undelivered outbound messages and stop the scheduler."""
+        if self._outbox:
+            await self._outbox.close()
+            self._outbox = None
+    
     def is_allowed(self, sender_id: str) -> bool:
         """
         Check if a sender is allowed to use this bot.
@@ -119,8 +146,59 @@ class BaseChannel(ABC):
             metadata=metadata or {}
         )
         
+        if msg.chat_id in self._inbound_tails:
+            # An earlier message from this chat is still being prepared; keep the order
+            self._chain_inbound(msg, None)
+            return
         await self.bus.publish_inbound(msg)
     
+    def _handle_message_later(
+        self,
+        sender_id: str,
+        chat_id: str,
+        prepare: Callable[[], Awaitable[str]],
+        fallback: str,
+        media: list[str] | None = None,
+        metadata: dict[str, Any] | None = None
+    ) -> None:
+        """
+        Like ``_handle_message``, for content that takes a while to produce
+        (e.g. a voice transcription). ``prepare()`` runs in a background task,
+        so the receive loop keeps going; ``fallback`` is used if it fails or
+        returns nothing. Later messages from the same chat wait their turn.
+        """
+        if not self.is_allowed(sender_id):
+            logger.warning(f"Access denied for sender {sender_id} on channel {self.name}.")
+            return
+        msg = InboundMessage(
+            channel=self.name,
+            sender_id=str(sender_id),
+            chat_id=str(chat_id),
+            content=fallback,
+            media=media or [],
+            metadata=metadata or {}
+        )
+        self._chain_inbound(msg, prepare)
+    
+    def _chain_inbound(self, msg: InboundMessage, prepare: Callable[[], Awaitable[str]] | None) -> None:
+        previous = self._inbound_tails.get(msg.chat_id)
+        
+        async def forward() -> None:
+            if prepare:
+                try:
+                    msg.content = await prepare() or msg.content
+                except Exception as e:
+                    logger.error(f"{self.name}: preparing inbound message failed: {e}")
+            if previous:
+                await asyncio.wait([previous])
+            await self.bus.publish_inbound(msg)
+        
+        task = asyncio.create_task(forward())
+        self._inbound_tails[msg.chat_id] = task
+        task.add_done_callback(
+            lambda t: self._inbound_tails.pop(msg.chat_id, None) if self._inbound_tails.get(msg.chat_id) is t else None
+        )
+    
     @property
     def is_running(self) -> bool:
         """Check if the channel is running."""
@@ -11,6 +11,7 @@ import httpx
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.ratelimit import RateLimit, RateLimitedError
 from nanobot.config.schema import DingTalkConfig
 
 try:
@@ -95,6 +96,8 @@ class DingTalkChannel(BaseChannel):
     """
 
     name = "dingtalk"
+    # Robot messages are throttled per app; stay well under 20/s
+    rate_limit = RateLimit(rate=20, burst=20, chat_rate=1, chat_burst=3)
 
     def __init__(self, config: DingTalkConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -217,10 +220,14 @@ class DingTalkChannel(BaseChannel):
 
         try:
             resp = await self._http.post(url, json=data, headers=headers)
+            if resp.status_code == 429:
+                raise RateLimitedError(float(resp.headers.get("Retry-After", 1)), scope="global")
             if resp.status_code != 200:
                 logger.error(f"DingTalk send failed: {resp.text}")
             else:
                 logger.debug(f"DingTalk message sent to {msg.chat_id}")
+        except RateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error sending DingTalk message: {e}")
 
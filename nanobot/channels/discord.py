@@ -2,7 +2,6 @@
 
 import asyncio
 import json
-from pathlib import Path
 from typing import Any
 
 import httpx
@@ -12,7 +11,9 @@ from loguru import logger
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.ratelimit import RateLimit, RateLimitedError
 from nanobot.config.schema import DiscordConfig
+from nanobot.utils.helpers import get_media_path
 
 
 DISCORD_API_BASE = "https://discord.com/api/v10"
@@ -23,6 +24,8 @@ class DiscordChannel(BaseChannel):
     """Discord channel using Gateway websocket."""
 
     name = "discord"
+    # 5 messages per 5s per channel, 50 requests/s per bot; messages max 2000 chars
+    rate_limit = RateLimit(rate=50, burst=50, chat_rate=1, chat_burst=5, max_chars=2000)
 
     def __init__(self, config: DiscordConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -92,13 +95,14 @@ class DiscordChannel(BaseChannel):
                 try:
                     response = await self._http.post(url, headers=headers, json=payload)
                     if response.status_code == 429:
+                        # The outbox pauses this chat (or the whole bot) and retries
                         data = response.json()
-                        retry_after = float(data.get("retry_after", 1.0))
-                        logger.warning(f"Discord rate limited, retrying in {retry_after}s")
-                        await asyncio.sleep(retry_after)
-                        continue
+                        scope = "global" if data.get("global") else "chat"
+                        raise RateLimitedError(float(data.get("retry_after", 1.0)), scope)
                     response.raise_for_status()
                     return
+                except RateLimitedError:
+                    raise
                 except Exception as e:
                     if attempt == 2:
                         logger.error(f"Error sending Discord message: {e}")
@@ -199,7 +203,7 @@ class DiscordChannel(BaseChannel):
 
         content_parts = [content] if content else []
         media_paths: list[str] = []
-        media_dir = Path.home() / ".nanobot" / "media"
+        media_dir = get_media_path()
 
         for attachment in payload.get("attachments") or []:
             url = attachment.get("url")
@@ -211,7 +215,6 @@ class DiscordChannel(BaseChannel):
                 content_parts.append(f"[attachment: {filename} - too large]")
                 continue
             try:
-                media_dir.mkdir(parents=True, exist_ok=True)
                 file_path = media_dir / f"{attachment.get('id', 'file')}_{filename.replace('/', '_')}"
                 resp = await self._http.get(url)
                 resp.raise_for_status()
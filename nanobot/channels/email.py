@@ -1,25 +1,146 @@
-"""Email channel implementation using IMAP polling + SMTP replies."""
+"""Email channel implementation using IMAP (IDLE or polling) + SMTP replies."""
 
 import asyncio
 import html
 import imaplib
+import json
+import os
 import re
+import select
 import smtplib
 import ssl
+import time
 from datetime import date
 from email import policy
 from email.header import decode_header, make_header
 from email.message import EmailMessage
 from email.parser import BytesParser
 from email.utils import parseaddr
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable
 
 from loguru import logger
 
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.ratelimit import RateLimit
 from nanobot.config.schema import EmailConfig
+from nanobot.utils.helpers import ensure_dir, get_data_path, safe_filename
+
+
+class SMTPSender:
+    """
+    Queued SMTP delivery over kept-alive, authenticated connections.
+
+    ``send()`` enqueues a message and waits for its delivery result. Up to
+    ``pool_size`` workers each own one connection made by ``connect`` and
+    reuse it for consecutive messages, so a burst pays the TLS handshake and
+    login once. A connection idle for more than ``keepalive`` seconds is
+    replaced rather than trusted; a send that fails on a dropped connection
+    is retried on a fresh one. ``max_per_minute`` paces all workers together
+    to stay under provider rate limits.
+    """
+
+    RETRY_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+    def __init__(
+        self,
+        connect: Callable[[], smtplib.SMTP],
+        pool_size: int = 1,
+        max_queue: int = 100,
+        max_per_minute: int = 0,
+        keepalive: float = 60,
+        max_retries: int = 2,
+    ):
+        self.connect = connect
+        self.pool_size = max(1, pool_size)
+        self.max_queue = max_queue
+        self.interval = 60 / max_per_minute if max_per_minute > 0 else 0.0
+        self.keepalive = keepalive
+        self.max_retries = max_retries
+        self._queue: asyncio.Queue[tuple[EmailMessage, asyncio.Future[None]]] | None = None
+        self._workers: list[asyncio.Task[None]] = []
+        self._next_slot = 0.0
+
+    async def send(self, msg: EmailMessage) -> None:
+        """Deliver ``msg``; raises what the last delivery attempt raised."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.pool_size:
+            self._workers.append(asyncio.create_task(self._worker()))
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        await self._queue.put((msg, future))
+        await future
+
+    async def _worker(self) -> None:
+        conn: smtplib.SMTP | None = None
+        last_used = 0.0
+        try:
+            while True:
+                msg, future = await self._queue.get()
+                try:
+                    await self._pace()
+                    for attempt in range(self.max_retries + 1):
+                        if conn is not None and time.monotonic() - last_used > self.keepalive:
+                            conn = await self._drop(conn)
+                        try:
+                            if conn is None:
+                                conn = await asyncio.to_thread(self.connect)
+                            await asyncio.to_thread(conn.send_message, msg)
+                            last_used = time.monotonic()
+                            break
+                        except self.RETRY_ERRORS as e:
+                            conn = await self._drop(conn)
+                            if attempt == self.max_retries:
+                                raise
+                            logger.warning(f"SMTP connection lost ({e}), reconnecting")
+                    if not future.done():
+                        future.set_result(None)
+                except Exception as e:
+                    if isinstance(e, smtplib.SMTPException):
+                        # Server state after a rejected command is unknown
+                        conn = await self._drop(conn)
+                    if not future.done():
+                        future.set_exception(e)
+                finally:
+                    self._queue.task_done()
+        finally:
+            if conn is not None:
+                await self._drop(conn)
+
+    async def _pace(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _drop(self, conn: smtplib.SMTP | None) -> None:
+        if conn is None:
+            return None
+        try:
+            await asyncio.to_thread(conn.quit)
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        return None
+
+    async def close(self) -> None:
+        """Stop the workers and log out of every open connection."""
+        for worker in self._workers:
+            worker.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
 
 
 class EmailChannel(BaseChannel):
@@ -27,14 +148,22 @@ class EmailChannel(BaseChannel):
     Email channel.
 
     Inbound:
-    - Poll IMAP mailbox for unread messages.
+    - Keep one IMAP connection open and wait for new mail with IDLE
+      (or poll it when the server has no IDLE).
+    - Sync by UID: only unread messages above the last seen UID are fetched,
+      in batched UID FETCH commands. The UIDVALIDITY/last-UID checkpoint is
+      stored on disk, so restarts neither miss nor repeat messages.
     - Convert each message into an inbound event.
 
     Outbound:
-    - Send responses via SMTP back to the sender address.
+    - Send responses via SMTP back to the sender address, through a
+      ``SMTPSender`` that keeps authenticated connections open between
+      messages and paces bursts.
     """
 
     name = "email"
+    # Each reply is its own email; SMTPSender does the pacing
+    rate_limit = RateLimit(coalesce=False)
     _IMAP_MONTHS = (
         "Jan",
         "Feb",
@@ -50,16 +179,24 @@ class EmailChannel(BaseChannel):
         "Dec",
     )
 
-    def __init__(self, config: EmailConfig, bus: MessageBus):
+    def __init__(self, config: EmailConfig, bus: MessageBus, state_path: Path | None = None):
         super().__init__(config, bus)
         self.config: EmailConfig = config
         self._last_subject_by_chat: dict[str, str] = {}
         self._last_message_id_by_chat: dict[str, str] = {}
-        self._processed_uids: set[str] = set()  # Capped to prevent unbounded growth
-        self._MAX_PROCESSED_UIDS = 100000
+        mailbox_id = f"{config.imap_username}@{config.imap_host}_{config.imap_mailbox or 'INBOX'}"
+        self._state_path = state_path or get_data_path() / "email" / f"{safe_filename(mailbox_id)}.json"
+        self._checkpoint = self._load_checkpoint()
+        self._imap: imaplib.IMAP4 | None = None
+        self._smtp = SMTPSender(
+            self._smtp_connect,
+            pool_size=config.smtp_pool_size,
+            max_per_minute=config.smtp_max_per_minute,
+            keepalive=config.smtp_keepalive_seconds,
+        )
 
     async def start(self) -> None:
-        """Start polling IMAP for inbound emails."""
+        """Start syncing IMAP for inbound emails (IDLE push, or polling)."""
         if not self.config.consent_granted:
             logger.warning(
                 "Email channel disabled: consent_granted is false. "
@@ -71,7 +208,7 @@ class EmailChannel(BaseChannel):
             return
 
         self._running = True
-        logger.info("Starting Email channel (IMAP polling mode)...")
+        logger.info("Starting Email channel...")
 
         poll_seconds = max(5, int(self.config.poll_interval_seconds))
         while self._running:
@@ -93,14 +230,22 @@ class EmailChannel(BaseChannel):
                         content=item["content"],
                         metadata=item.get("metadata", {}),
                     )
+
+                if self._supports_idle():
+                    await asyncio.to_thread(self._idle_wait, self.config.idle_timeout_seconds)
+                    continue
             except Exception as e:
-                logger.error(f"Email polling error: {e}")
+                logger.error(f"Email sync error: {e}")
+                await asyncio.to_thread(self._close_imap)
 
             await asyncio.sleep(poll_seconds)
 
+        await asyncio.to_thread(self._close_imap)
+
     async def stop(self) -> None:
-        """Stop polling loop."""
+        """Stop the sync loop (an IDLE wait notices within a second) and close SMTP connections."""
         self._running = False
+        await self._smtp.close()
 
     async def send(self, msg: OutboundMessage) -> None:
         """Send email via SMTP."""
@@ -141,7 +286,7 @@ class EmailChannel(BaseChannel):
             email_msg["References"] = in_reply_to
 
         try:
-            await asyncio.to_thread(self._smtp_send, email_msg)
+            await self._smtp.send(email_msg)
         except Exception as e:
             logger.error(f"Error sending email to {to_addr}: {e}")
             raise
@@ -166,33 +311,196 @@ class EmailChannel(BaseChannel):
             return False
         return True
 
-    def _smtp_send(self, msg: EmailMessage) -> None:
+    def _smtp_connect(self) -> smtplib.SMTP:
+        """A new authenticated SMTP connection (used by the sender pool)."""
         timeout = 30
         if self.config.smtp_use_ssl:
-            with smtplib.SMTP_SSL(
-                self.config.smtp_host,
-                self.config.smtp_port,
-                timeout=timeout,
-            ) as smtp:
-                smtp.login(self.config.smtp_username, self.config.smtp_password)
-                smtp.send_message(msg)
-            return
-
-        with smtplib.SMTP(self.config.smtp_host, self.config.smtp_port, timeout=timeout) as smtp:
+            smtp = smtplib.SMTP_SSL(self.config.smtp_host, self.config.smtp_port, timeout=timeout)
+        else:
+            smtp = smtplib.SMTP(self.config.smtp_host, self.config.smtp_port, timeout=timeout)
             if self.config.smtp_use_tls:
                 smtp.starttls(context=ssl.create_default_context())
-            smtp.login(self.config.smtp_username, self.config.smtp_password)
-            smtp.send_message(msg)
+        try:
+            if self.config.smtp_username:
+                smtp.login(self.config.smtp_username, self.config.smtp_password)
+        except Exception:
+            smtp.close()
+            raise
+        return smtp
+
+    # ------------------------------------------------------------------
+    # IMAP connection and UID sync
+    # ------------------------------------------------------------------
+
+    def _connect_imap(self) -> imaplib.IMAP4:
+        if self.config.imap_use_ssl:
+            client = imaplib.IMAP4_SSL(self.config.imap_host, self.config.imap_port)
+        else:
+            client = imaplib.IMAP4(self.config.imap_host, self.config.imap_port)
+        client.login(self.config.imap_username, self.config.imap_password)
+        return client
+
+    def _open_mailbox(self) -> imaplib.IMAP4:
+        """The persistent connection, (re)connected and with the mailbox selected."""
+        if self._imap is not None:
+            return self._imap
+        client = self._connect_imap()
+        mailbox = self.config.imap_mailbox or "INBOX"
+        status, _ = client.select(mailbox)
+        if status != "OK":
+            self._logout(client)
+            raise RuntimeError(f"Cannot select mailbox {mailbox}")
+
+        _, data = client.response("UIDVALIDITY")
+        uidvalidity = int(data[0]) if data and data[0] else 0
+        if uidvalidity != self._checkpoint.get("uidvalidity"):
+            if self._checkpoint:
+                logger.info("Email: mailbox UIDVALIDITY changed, resyncing unread messages")
+            self._checkpoint = {"uidvalidity": uidvalidity, "last_uid": 0}
+            self._save_checkpoint()
+        self._imap = client
+        return client
+
+    def _close_imap(self) -> None:
+        if self._imap is not None:
+            self._logout(self._imap)
+            self._imap = None
+
+    @staticmethod
+    def _logout(client: imaplib.IMAP4) -> None:
+        try:
+            client.logout()
+        except Exception:
+            pass
+
+    def _load_checkpoint(self) -> dict[str, int]:
+        try:
+            return json.loads(self._state_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_checkpoint(self) -> None:
+        ensure_dir(self._state_path.parent)
+        tmp = self._state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._checkpoint))
+        os.replace(tmp, self._state_path)
 
     def _fetch_new_messages(self) -> list[dict[str, Any]]:
-        """Poll IMAP and return parsed unread messages."""
-        return self._fetch_messages(
-            search_criteria=("UNSEEN",),
-            mark_seen=self.config.mark_seen,
-            dedupe=True,
-            limit=0,
+        """Unread messages above the checkpoint UID; advances the checkpoint batch by batch."""
+        client = self._open_mailbox()
+        last_uid = self._checkpoint.get("last_uid", 0)
+        criteria = ("UID", f"{last_uid + 1}:*", "UNSEEN") if last_uid else ("UNSEEN",)
+        # "n:*" always matches the highest UID, even when it is below n
+        uids = [uid for uid in self._search_uids(client, criteria) if uid > last_uid]
+
+        messages: list[dict[str, Any]] = []
+        batch_size = max(1, self.config.fetch_batch_size)
+        for i in range(0, len(uids), batch_size):
+            batch = uids[i:i + batch_size]
+            messages.extend(self._fetch_uids(client, batch, mark_seen=self.config.mark_seen))
+            self._checkpoint["last_uid"] = batch[-1]
+            self._save_checkpoint()
+        return messages
+
+    def _supports_idle(self) -> bool:
+        return (
+            self.config.imap_idle
+            and self._imap is not None
+            and "IDLE" in getattr(self._imap, "capabilities", ())
         )
 
+    def _idle_wait(self, timeout: float) -> bool:
+        """
+        Block in IMAP IDLE until the mailbox changes, ``timeout`` passes or the
+        channel stops. Returns True if the server reported new mail.
+
+        imaplib has no IDLE before Python 3.14, so the command is spoken
+        directly on the connection.
+        """
+        client = self._open_mailbox()
+        tag = client._new_tag().decode()
+        client.tagged_commands.pop(tag, None)  # Completion is read here, not by imaplib
+        client.send(f"{tag} IDLE\r\n".encode())
+        if not client.readline().startswith(b"+"):
+            raise imaplib.IMAP4.error("IDLE rejected by server")
+
+        changed = False
+        deadline = time.monotonic() + timeout
+        while self._running and time.monotonic() < deadline:
+            # imaplib's reader or TLS may hold bytes the socket no longer signals,
+            # e.g. an EXISTS that arrived in the same packet as the "+" reply
+            pending = getattr(client.sock, "pending", lambda: 0)()
+            if not pending and not self._buffered(client) and not select.select([client.sock], [], [], 1.0)[0]:
+                continue
+            line = client.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("Connection closed during IDLE")
+            if re.match(rb"\* \d+ (EXISTS|RECENT)", line):
+                changed = True
+                break
+
+        client.send(b"DONE\r\n")
+        while True:
+            line = client.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("Connection closed during IDLE")
+            if line.startswith(tag.encode()):
+                break
+        return changed
+
+    @staticmethod
+    def _buffered(client: imaplib.IMAP4) -> bool:
+        """Whether a line can be read without blocking; peeks at imaplib's buffered reader."""
+        timeout = client.sock.gettimeout()
+        client.sock.setblocking(False)
+        try:
+            return bool(client.file.peek(1))
+        except (BlockingIOError, ssl.SSLWantReadError):
+            return False
+        finally:
+            client.sock.settimeout(timeout)
+
+    @staticmethod
+    def _search_uids(client: imaplib.IMAP4, criteria: tuple[str, ...]) -> list[int]:
+        status, data = client.uid("SEARCH", *criteria)
+        if status != "OK" or not data or not data[0]:
+            return []
+        return sorted(int(uid) for uid in data[0].split())
+
+    @staticmethod
+    def _uid_set(uids: list[int]) -> str:
+        """Compact IMAP sequence set, e.g. [1, 2, 3, 7] -> "1:3,7"."""
+        parts: list[str] = []
+        start = prev = uids[0]
+        for uid in uids[1:] + [0]:
+            if uid == prev + 1:
+                prev = uid
+                continue
+            parts.append(str(start) if start == prev else f"{start}:{prev}")
+            start = prev = uid
+        return ",".join(parts)
+
+    def _fetch_uids(self, client: imaplib.IMAP4, uids: list[int], mark_seen: bool) -> list[dict[str, Any]]:
+        """Fetch and parse ``uids`` with one UID FETCH (and one UID STORE for \\Seen)."""
+        if not uids:
+            return []
+        uid_set = self._uid_set(uids)
+        status, fetched = client.uid("FETCH", uid_set, "(UID BODY.PEEK[])")
+        if status != "OK" or not fetched:
+            return []
+
+        messages = []
+        for item in fetched:
+            if not (isinstance(item, tuple) and len(item) >= 2 and isinstance(item[1], (bytes, bytearray))):
+                continue
+            parsed = self._parse_message(bytes(item[1]), self._extract_uid([item]))
+            if parsed:
+                messages.append(parsed)
+
+        if mark_seen:
+            client.uid("STORE", uid_set, "+FLAGS", "(\\Seen)")
+        return messages
+
     def fetch_messages_between_dates(
         self,
         start_date: date,
@@ -215,7 +523,6 @@ class EmailChannel(BaseChannel):
                 self._format_imap_date(end_date),
             ),
             mark_seen=False,
-            dedupe=False,
             limit=max(1, int(limit)),
         )
 
@@ -223,98 +530,58 @@ class EmailChannel(BaseChannel):
         self,
         search_criteria: tuple[str, ...],
         mark_seen: bool,
-        dedupe: bool,
         limit: int,
     ) -> list[dict[str, Any]]:
-        """Fetch messages by arbitrary IMAP search criteria."""
-        messages: list[dict[str, Any]] = []
-        mailbox = self.config.imap_mailbox or "INBOX"
-
-        if self.config.imap_use_ssl:
-            client = imaplib.IMAP4_SSL(self.config.imap_host, self.config.imap_port)
-        else:
-            client = imaplib.IMAP4(self.config.imap_host, self.config.imap_port)
-
+        """Fetch messages by arbitrary IMAP search criteria on a short-lived connection."""
+        client = self._connect_imap()
         try:
-            client.login(self.config.imap_username, self.config.imap_password)
-            status, _ = client.select(mailbox)
+            status, _ = client.select(self.config.imap_mailbox or "INBOX")
             if status != "OK":
-                return messages
-
-            status, data = client.search(None, *search_criteria)
-            if status != "OK" or not data:
-                return messages
-
-            ids = data[0].split()
-            if limit > 0 and len(ids) > limit:
-                ids = ids[-limit:]
-            for imap_id in ids:
-                status, fetched = client.fetch(imap_id, "(BODY.PEEK[] UID)")
-                if status != "OK" or not fetched:
-                    continue
-
-                raw_bytes = self._extract_message_bytes(fetched)
-                if raw_bytes is None:
-                    continue
-
-                uid = self._extract_uid(fetched)
-                if dedupe and uid and uid in self._processed_uids:
-                    continue
-
-                parsed = BytesParser(policy=policy.default).parsebytes(raw_bytes)
-                sender = parseaddr(parsed.get("From", ""))[1].strip().lower()
-                if not sender:
-                    continue
-
-                subject = self._decode_header_value(parsed.get("Subject", ""))
-                date_value = parsed.get("Date", "")
-                message_id = parsed.get("Message-ID", "").strip()
-                body = self._extract_text_body(parsed)
-
-                if not body:
-                    body = "(empty email body)"
-
-                body = body[: self.config.max_body_chars]
-                content = (
-                    f"Email received.\n"
-                    f"From: {sender}\n"
-                    f"Subject: {subject}\n"
-                    f"Date: {date_value}\n\n"
-                    f"{body}"
-                )
-
-                metadata = {
-                    "message_id": message_id,
-                    "subject": subject,
-                    "date": date_value,
-                    "sender_email": sender,
-                    "uid": uid,
-                }
-                messages.append(
-                    {
-                        "sender": sender,
-                        "subject": subject,
-                        "message_id": message_id,
-                        "content": content,
-                        "metadata": metadata,
-                    }
-                )
-
-                if dedupe and uid:
-                    self._processed_uids.add(uid)
-                    # mark_seen is the primary dedup; this set is a safety net
-                    if len(self._processed_uids) > self._MAX_PROCESSED_UIDS:
-                        self._processed_uids.clear()
-
-                if mark_seen:
-                    client.store(imap_id, "+FLAGS", "\\Seen")
+                return []
+            uids = self._search_uids(client, search_criteria)
+            if limit > 0 and len(uids) > limit:
+                uids = uids[-limit:]
+            return self._fetch_uids(client, uids, mark_seen=mark_seen)
         finally:
-            try:
-                client.logout()
-            except Exception:
-                pass
+            self._logout(client)
+
+    def _parse_message(self, raw_bytes: bytes, uid: str) -> dict[str, Any] | None:
+        parsed = BytesParser(policy=policy.default).parsebytes(raw_bytes)
+        sender = parseaddr(parsed.get("From", ""))[1].strip().lower()
+        if not sender:
+            return None
+
+        subject = self._decode_header_value(parsed.get("Subject", ""))
+        date_value = parsed.get("Date", "")
+        message_id = parsed.get("Message-ID", "").strip()
+        body = self._extract_text_body(parsed)
+
+        if not body:
+            body = "(empty email body)"
+
+        body = body[: self.config.max_body_chars]
+        content = (
+            f"Email received.\n"
+            f"From: {sender}\n"
+            f"Subject: {subject}\n"
+            f"Date: {date_value}\n\n"
+            f"{body}"
+        )
 
-        return messages
+        metadata = {
+            "message_id": message_id,
+            "subject": subject,
+            "date": date_value,
+            "sender_email": sender,
+            "uid": uid,
+        }
+        return {
+            "sender": sender,
+            "subject": subject,
+            "message_id": message_id,
+            "content": content,
+            "metadata": metadata,
+        }
 
     @classmethod
     def _format_imap_date(cls, value: date) -> str:
@@ -322,13 +589,6 @@ class EmailChannel(BaseChannel):
         month = cls._IMAP_MONTHS[value.month - 1]
         return f"{value.day:02d}-{month}-{value.year}"
 
-    @staticmethod
-    def _extract_message_bytes(fetched: list[Any]) -> bytes | None:
-        for item in fetched:
-            if isinstance(item, tuple) and len(item) >= 2 and isinstance(item[1], (bytes, bytearray)):
-                return bytes(item[1])
-        return None
-
     @staticmethod
     def _extract_uid(fetched: list[Any]) -> str:
         for item in fetched:
@@ -12,6 +12,7 @@ from loguru import logger
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.ratelimit import RateLimit, RateLimitedError
 from nanobot.config.schema import FeishuConfig
 
 try:
@@ -30,6 +31,9 @@ except ImportError:
     lark = None
     Emoji = None
 
+# Open API error code for "request trigger frequency limit"
+FEISHU_RATE_LIMITED = 99991400
+
 # Message type display mapping
 MSG_TYPE_MAP = {
     "image": "[image]",
@@ -99,6 +103,8 @@ class FeishuChannel(BaseChannel):
     """
     
     name = "feishu"
+    # Message API: 50 requests/s per app, 5/s to the same user or group
+    rate_limit = RateLimit(rate=50, burst=50, chat_rate=5, chat_burst=5)
     
     def __init__(self, config: FeishuConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -318,6 +324,8 @@ class FeishuChannel(BaseChannel):
             
             response = self._client.im.v1.message.create(request)
             
+            if response.code == FEISHU_RATE_LIMITED:
+                raise RateLimitedError(1.0)
             if not response.success():
                 logger.error(
                     f"Failed to send Feishu message: code={response.code}, "
@@ -326,6 +334,8 @@ class FeishuChannel(BaseChannel):
             else:
                 logger.debug(f"Feishu message sent to {msg.chat_id}")
                 
+        except RateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error sending Feishu message: {e}")
     
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import asyncio
+import dataclasses
 from typing import Any
 
 from loguru import logger
@@ -11,6 +12,8 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import Config
+from nanobot.providers.transcription import make_transcription_service
+from nanobot.utils.helpers import get_data_path
 
 
 class ChannelManager:
@@ -28,8 +31,14 @@ class ChannelManager:
         self.bus = bus
         self.channels: dict[str, BaseChannel] = {}
         self._dispatch_task: asyncio.Task | None = None
+        self.transcriber = make_transcription_service(
+            config.transcription,
+            groq_api_key=config.providers.groq.api_key,
+            cache_dir=get_data_path() / "cache" / "transcripts",
+        )
         
         self._init_channels()
+        self._apply_rate_limits()
     
     def _init_channels(self) -> None:
         """Initialize channels based on config."""
@@ -42,6 +51,7 @@ class ChannelManager:
                     self.config.channels.telegram,
                     self.bus,
                     groq_api_key=self.config.providers.groq.api_key,
+                    transcriber=self.transcriber,
                 )
                 logger.info("Telegram channel enabled")
             except ImportError as e:
@@ -52,7 +62,7 @@ class ChannelManager:
             try:
                 from nanobot.channels.whatsapp import WhatsAppChannel
                 self.channels["whatsapp"] = WhatsAppChannel(
-                    self.config.channels.whatsapp, self.bus
+                    self.config.channels.whatsapp, self.bus, transcriber=self.transcriber
                 )
                 logger.info("WhatsApp channel enabled")
             except ImportError as e:
@@ -137,6 +147,14 @@ class ChannelManager:
             except ImportError as e:
                 logger.warning(f"QQ channel not available: {e}")
     
+    def _apply_rate_limits(self) -> None:
+        """Override platform rate-limit defaults with ``channels.rateLimits`` entries."""
+        for name, override in self.config.channels.rate_limits.items():
+            channel = self.channels.get(name)
+            if channel:
+                fields = override.model_dump(exclude_unset=True)
+                channel.rate_limit = dataclasses.replace(channel.rate_limit, **fields)
+
     async def _start_channel(self, name: str, channel: BaseChannel) -> None:
         """Start a channel and log any exceptions."""
         try:
@@ -178,9 +196,13 @@ class ChannelManager:
         for name, channel in self.channels.items():
             try:
                 await channel.stop()
+                await channel.close_outbox()
                 logger.info(f"Stopped {name} channel")
             except Exception as e:
                 logger.error(f"Error stopping {name}: {e}")
+
+        if self.transcriber:
+            await self.transcriber.close()
     
     async def _dispatch_outbound(self) -> None:
         """Dispatch outbound messages to the appropriate channel."""
@@ -195,10 +217,8 @@ class ChannelManager:
                 
                 channel = self.channels.get(msg.channel)
                 if channel:
-                    try:
-                        await channel.send(msg)
-                    except Exception as e:
-                        logger.error(f"Error sending to {msg.channel}: {e}")
+                    # Queued per chat; rate limits never hold up the dispatcher
+                    channel.deliver(msg)
                 else:
                     logger.warning(f"Unknown channel: {msg.channel}")
                     
@@ -0,0 +1,200 @@
+"""Outbound rate limiting and message coalescing shared by all channels."""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from nanobot.bus.events import OutboundMessage
+
+
+class RateLimitedError(Exception):
+    """
+    Raised by ``BaseChannel.send`` when the platform asks to slow down
+    (HTTP 429 and similar). The outbox retries the message after
+    ``retry_after`` seconds; ``scope`` says whether only this chat
+    (``"chat"``) or the whole channel (``"global"``) is paused.
+    """
+
+    def __init__(self, retry_after: float, scope: str = "chat"):
+        super().__init__(f"rate limited for {retry_after:.1f}s ({scope})")
+        self.retry_after = max(0.0, retry_after)
+        self.scope = scope
+
+
+@dataclass
+class RateLimit:
+    """Send limits of a platform; a rate of 0 means unlimited."""
+
+    rate: float = 0  # Sends per second across all chats
+    burst: int = 1
+    chat_rate: float = 0  # Sends per second to one chat
+    chat_burst: int = 1
+    coalesce: bool = True  # Merge queued text messages to the same chat into one send
+    max_chars: int = 4000  # Never coalesce beyond this many characters
+
+
+class TokenBucket:
+    """Classic token bucket; ``pause()`` empties it for a server-imposed wait."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 = now)."""
+        blocked = max(0.0, self.blocked_until - now)
+        if not self.rate:
+            return blocked
+        self._refill(now)
+        return max(blocked, (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0)
+
+    def take(self, now: float) -> None:
+        if self.rate:
+            self._refill(now)
+            self.tokens -= 1
+
+    def pause(self, seconds: float, now: float) -> None:
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class Outbox:
+    """
+    Per-channel outbound scheduler.
+
+    ``put()`` never blocks: messages are queued per chat and a scheduler task
+    sends them as the global and per-chat token buckets allow. Sends to
+    different chats run concurrently, sends to one chat stay in order. When a
+    chat has several text messages waiting, they are coalesced into one send.
+    A ``RateLimitedError`` from the channel pauses the matching bucket and
+    the message is retried, so the dispatcher is never held up by a slow or
+    throttled platform.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[OutboundMessage], Awaitable[None]],
+        limits: RateLimit,
+        name: str = "",
+        split: Callable[[OutboundMessage], list[OutboundMessage]] | None = None,
+        max_retries: int = 5,
+    ):
+        self._send = send
+        self.limits = limits
+        self.name = name
+        self._split = split or (lambda msg: [msg])
+        self.max_retries = max_retries
+        self._global = TokenBucket(limits.rate, limits.burst)
+        self._chat_buckets: dict[str, TokenBucket] = {}
+        self._queues: dict[str, deque[tuple[OutboundMessage, int]]] = {}  # chat_id -> (message, rate-limited attempts)
+        self._busy: set[str] = set()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._sends: set[asyncio.Task[None]] = set()
+
+    def put(self, msg: OutboundMessage) -> None:
+        """Queue ``msg`` for delivery."""
+        self._queues.setdefault(msg.chat_id, deque()).extend((part, 0) for part in self._split(msg))
+        self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    @property
+    def pending(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.limits.chat_rate, self.limits.chat_burst)
+        return bucket
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            wait = self._dispatch_ready()
+            if wait is None and not self._queues and not self._sends:
+                return
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch_ready(self) -> float | None:
+        """Start every send the buckets allow; returns seconds until the next one could start."""
+        now = time.monotonic()
+        next_wait: float | None = None
+        for chat_id in list(self._queues):
+            if chat_id in self._busy:
+                continue
+            wait = max(self._global.wait_time(now), self._chat_bucket(chat_id).wait_time(now))
+            if wait > 0:
+                next_wait = wait if next_wait is None else min(next_wait, wait)
+                continue
+            msg, attempt = self._next_message(chat_id)
+            self._global.take(now)
+            self._chat_bucket(chat_id).take(now)
+            self._busy.add(chat_id)
+            task = asyncio.create_task(self._deliver(chat_id, msg, attempt))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+        return next_wait
+
+    def _next_message(self, chat_id: str) -> tuple[OutboundMessage, int]:
+        queue = self._queues[chat_id]
+        msg, attempt = queue.popleft()
+        if self.limits.coalesce:
+            merged = 0
+            while queue and self._can_merge(msg, queue[0][0]):
+                msg = replace(msg, content=f"{msg.content}\n\n{queue.popleft()[0].content}")
+                merged += 1
+            if merged:
+                logger.debug(f"{self.name}: coalesced {merged + 1} messages to {chat_id}")
+        if not queue:
+            del self._queues[chat_id]
+        return msg, attempt
+
+    def _can_merge(self, a: OutboundMessage, b: OutboundMessage) -> bool:
+        return (
+            not a.media and not b.media
+            and a.metadata == b.metadata
+            and b.reply_to in (None, a.reply_to)
+            and len(a.content) + len(b.content) + 2 <= self.limits.max_chars
+        )
+
+    async def _deliver(self, chat_id: str, msg: OutboundMessage, attempt: int) -> None:
+        try:
+            await self._send(msg)
+        except RateLimitedError as e:
+            bucket = self._global if e.scope == "global" else self._chat_bucket(chat_id)
+            bucket.pause(e.retry_after, time.monotonic())
+            if attempt < self.max_retries:
+                logger.warning(f"{self.name}: rate limited, retrying in {e.retry_after:.1f}s")
+                self._queues.setdefault(chat_id, deque()).appendleft((msg, attempt + 1))
+            else:
+                logger.error(f"{self.name}: giving up on message to {chat_id} after {attempt + 1} rate limits")
+        except Exception as e:
+            logger.error(f"Error sending to {self.name}: {e}")
+        finally:
+            self._busy.discard(chat_id)
+            self._wake.set()
+
+    async def close(self) -> None:
+        """Stop scheduling; queued messages are dropped."""
+        for task in [self._task, *self._sends]:
+            if task:
+                task.cancel()
+        self._task = None
+        self._queues.clear()
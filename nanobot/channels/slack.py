@@ -8,6 +8,7 @@ from loguru import logger
 from slack_sdk.socket_mode.websockets import SocketModeClient
 from slack_sdk.socket_mode.request import SocketModeRequest
 from slack_sdk.socket_mode.response import SocketModeResponse
+from slack_sdk.errors import SlackApiError
 from slack_sdk.web.async_client import AsyncWebClient
 
 from slackify_markdown import slackify_markdown
@@ -15,6 +16,7 @@ from slackify_markdown import slackify_markdown
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.ratelimit import RateLimit, RateLimitedError
 from nanobot.config.schema import SlackConfig
 
 
@@ -22,6 +24,8 @@ class SlackChannel(BaseChannel):
     """Slack channel using Socket Mode."""
 
     name = "slack"
+    # chat.postMessage: about one message per second per channel
+    rate_limit = RateLimit(chat_rate=1, chat_burst=3)
 
     def __init__(self, config: SlackConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -89,6 +93,10 @@ class SlackChannel(BaseChannel):
                 text=self._to_mrkdwn(msg.content),
                 thread_ts=thread_ts if use_thread else None,
             )
+        except SlackApiError as e:
+            if e.response.status_code == 429:
+                raise RateLimitedError(float(e.response.headers.get("Retry-After", 1))) from e
+            logger.error(f"Error sending Slack message: {e}")
         except Exception as e:
             logger.error(f"Error sending Slack message: {e}")
 
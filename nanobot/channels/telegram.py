@@ -4,15 +4,19 @@ from __future__ import annotations
 
 import asyncio
 import re
+from dataclasses import replace
 from loguru import logger
 from telegram import BotCommand, Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from telegram.error import RetryAfter
 from telegram.request import HTTPXRequest
 
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.ratelimit import RateLimit, RateLimitedError
 from nanobot.config.schema import TelegramConfig
+from nanobot.providers.transcription import TranscriptionService, make_transcription_service
 
 
 def _markdown_to_telegram_html(text: str) -> str:
@@ -78,6 +82,11 @@ def _markdown_to_telegram_html(text: str) -> str:
     return text
 
 
+def _retry_seconds(retry_after) -> float:
+    """RetryAfter.retry_after is an int or, in newer versions, a timedelta."""
+    return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+
+
 def _split_message(content: str, max_len: int = 4000) -> list[str]:
     """Split content into chunks within max_len, preferring line breaks."""
     if len(content) <= max_len:
@@ -106,11 +115,14 @@ class TelegramChannel(BaseChannel):
     """
     
     name = "telegram"
+    # Bot API: ~30 messages/s overall, about one per second in a single chat
+    rate_limit = RateLimit(rate=30, burst=30, chat_rate=1, chat_burst=3, max_chars=4000)
     
     # Commands registered with Telegram's command menu
     BOT_COMMANDS = [
         BotCommand("start", "Start the bot"),
         BotCommand("new", "Start a new conversation"),
+        BotCommand("cancel", "Cancel background tasks"),
         BotCommand("help", "Show available commands"),
     ]
     
@@ -119,10 +131,12 @@ class TelegramChannel(BaseChannel):
         config: TelegramConfig,
         bus: MessageBus,
         groq_api_key: str = "",
+        transcriber: TranscriptionService | None = None,
     ):
         super().__init__(config, bus)
         self.config: TelegramConfig = config
         self.groq_api_key = groq_api_key
+        self.transcriber = transcriber or make_transcription_service(None, groq_api_key)
         self._app: Application | None = None
         self._chat_ids: dict[str, int] = {}  # Map sender_id to chat_id for replies
         self._typing_tasks: dict[str, asyncio.Task] = {}  # chat_id -> typing loop task
@@ -146,6 +160,7 @@ class TelegramChannel(BaseChannel):
         # Add command handlers
         self._app.add_handler(CommandHandler("start", self._on_start))
         self._app.add_handler(CommandHandler("new", self._forward_command))
+        self._app.add_handler(CommandHandler("cancel", self._forward_command))
         self._app.add_handler(CommandHandler("help", self._forward_command))
         
         # Add message handler for text, photos, voice, documents
@@ -224,9 +239,24 @@ class TelegramChannel(BaseChannel):
             logger.error(f"Invalid chat_id: {msg.chat_id}")
             return
 
+        # The outbox retries a RateLimitedError by re-sending the whole message, so only
+        # raise it while nothing has gone out; later pushback is waited out here
+        sent = False
+
+        async def call(send_once) -> None:
+            nonlocal sent
+            try:
+                await send_once()
+            except RetryAfter as e:
+                if not sent:
+                    raise RateLimitedError(_retry_seconds(e.retry_after)) from e
+                await asyncio.sleep(_retry_seconds(e.retry_after))
+                await send_once()
+            sent = True
+
         # Send media files
         for media_path in (msg.media or []):
-            try:
+            async def upload() -> None:
                 media_type = self._get_media_type(media_path)
                 sender = {
                     "photo": self._app.bot.send_photo,
@@ -236,24 +266,45 @@ class TelegramChannel(BaseChannel):
                 param = "photo" if media_type == "photo" else media_type if media_type in ("voice", "audio") else "document"
                 with open(media_path, 'rb') as f:
                     await sender(chat_id=chat_id, **{param: f})
+
+            try:
+                await call(upload)
+            except RateLimitedError:
+                raise
             except Exception as e:
                 filename = media_path.rsplit("/", 1)[-1]
                 logger.error(f"Failed to send media {media_path}: {e}")
                 await self._app.bot.send_message(chat_id=chat_id, text=f"[Failed to send: {filename}]")
+                sent = True
 
         # Send text content
         if msg.content and msg.content != "[empty message]":
             for chunk in _split_message(msg.content):
                 try:
                     html = _markdown_to_telegram_html(chunk)
-                    await self._app.bot.send_message(chat_id=chat_id, text=html, parse_mode="HTML")
+                    await call(lambda: self._app.bot.send_message(chat_id=chat_id, text=html, parse_mode="HTML"))
+                except RateLimitedError:
+                    raise
                 except Exception as e:
                     logger.warning(f"HTML parse failed, falling back to plain text: {e}")
                     try:
-                        await self._app.bot.send_message(chat_id=chat_id, text=chunk)
+                        await call(lambda: self._app.bot.send_message(chat_id=chat_id, text=chunk))
+                    except RateLimitedError:
+                        raise
                     except Exception as e2:
                         logger.error(f"Error sending Telegram message: {e2}")
     
+    def split_outbound(self, msg: OutboundMessage) -> list[OutboundMessage]:
+        """One rate-limited send per media file and per 4000-char text chunk."""
+        chunks = _split_message(msg.content) if msg.content else []
+        media = msg.media or []
+        if len(chunks) + len(media) <= 1:
+            return [msg]
+        # Separate sends, so a rate-limited retry never repeats a part that already went out
+        return [replace(msg, content="", media=[path]) for path in media] + [
+            replace(msg, content=chunk, media=[]) for chunk in chunks
+        ]
+
     async def _on_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /start command."""
         if not update.message or not update.effective_user:
@@ -308,6 +359,7 @@ class TelegramChannel(BaseChannel):
         # Handle media files
         media_file = None
         media_type = None
+        voice_path = None  # Transcribed after the message is handed off
         
         if message.photo:
             media_file = message.photo[-1]  # Largest photo
@@ -328,28 +380,19 @@ class TelegramChannel(BaseChannel):
                 file = await self._app.bot.get_file(media_file.file_id)
                 ext = self._get_extension(media_type, getattr(media_file, 'mime_type', None))
                 
-                # Save to workspace/media/
-                from pathlib import Path
-                media_dir = Path.home() / ".nanobot" / "media"
-                media_dir.mkdir(parents=True, exist_ok=True)
+                # Save to ~/.nanobot/media/
+                from nanobot.utils.helpers import get_media_path
+                media_dir = get_media_path()
                 
                 file_path = media_dir / f"{media_file.file_id[:16]}{ext}"
                 await file.download_to_drive(str(file_path))
                 
                 media_paths.append(str(file_path))
                 
-                # Handle voice transcription
-                if media_type == "voice" or media_type == "audio":
-                    from nanobot.providers.transcription import GroqTranscriptionProvider
-                    transcriber = GroqTranscriptionProvider(api_key=self.groq_api_key)
-                    transcription = await transcriber.transcribe(file_path)
-                    if transcription:
-                        logger.info(f"Transcribed {media_type}: {transcription[:50]}...")
-                        content_parts.append(f"[transcription: {transcription}]")
-                    else:
-                        content_parts.append(f"[{media_type}: {file_path}]")
-                else:
-                    content_parts.append(f"[{media_type}: {file_path}]")
+                # Voice transcription runs off the update handler, see below
+                if (media_type == "voice" or media_type == "audio") and self.transcriber:
+                    voice_path = file_path
+                content_parts.append(f"[{media_type}: {file_path}]")
                     
                 logger.debug(f"Downloaded {media_type} to {file_path}")
             except Exception as e:
@@ -365,19 +408,41 @@ class TelegramChannel(BaseChannel):
         # Start typing indicator before processing
         self._start_typing(str_chat_id)
         
+        metadata = {
+            "message_id": message.message_id,
+            "user_id": user.id,
+            "username": user.username,
+            "first_name": user.first_name,
+            "is_group": message.chat.type != "private"
+        }
+        
+        if voice_path is not None:
+            # Updates are handled one at a time, so don't hold them up while transcribing
+            async def with_transcription() -> str:
+                transcription = await self.transcriber.transcribe(voice_path)
+                if not transcription:
+                    return ""
+                logger.info(f"Transcribed {media_type}: {transcription[:50]}...")
+                parts = content_parts[:-1] + [f"[transcription: {transcription}]"]
+                return "\n".join(parts)
+            
+            self._handle_message_later(
+                sender_id=sender_id,
+                chat_id=str_chat_id,
+                prepare=with_transcription,
+                fallback=content,
+                media=media_paths,
+                metadata=metadata,
+            )
+            return
+        
         # Forward to the message bus
         await self._handle_message(
             sender_id=sender_id,
             chat_id=str_chat_id,
             content=content,
             media=media_paths,
-            metadata={
-                "message_id": message.message_id,
-                "user_id": user.id,
-                "username": user.username,
-                "first_name": user.first_name,
-                "is_group": message.chat.type != "private"
-            }
+            metadata=metadata,
         )
     
     def _start_typing(self, chat_id: str) -> None:
@@ -1,7 +1,9 @@
 """WhatsApp channel implementation using Node.js bridge."""
 
 import asyncio
+import base64
 import json
+import mimetypes
 from typing import Any
 
 from loguru import logger
@@ -9,7 +11,13 @@ from loguru import logger
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.ratelimit import RateLimit
 from nanobot.config.schema import WhatsAppConfig
+from nanobot.providers.transcription import TranscriptionService
+from nanobot.utils.helpers import get_media_path
+
+# Voice notes arrive base64-encoded inside one frame; websockets' default is 1 MiB
+BRIDGE_MAX_FRAME_BYTES = 64 * 1024 * 1024
 
 
 class WhatsAppChannel(BaseChannel):
@@ -21,10 +29,13 @@ class WhatsAppChannel(BaseChannel):
     """
     
     name = "whatsapp"
+    # Bursts from a linked device look like spam to WhatsApp
+    rate_limit = RateLimit(chat_rate=1, chat_burst=3)
     
-    def __init__(self, config: WhatsAppConfig, bus: MessageBus):
+    def __init__(self, config: WhatsAppConfig, bus: MessageBus, transcriber: TranscriptionService | None = None):
         super().__init__(config, bus)
         self.config: WhatsAppConfig = config
+        self.transcriber = transcriber
         self._ws = None
         self._connected = False
     
@@ -40,7 +51,7 @@ class WhatsAppChannel(BaseChannel):
         
         while self._running:
             try:
-                async with websockets.connect(bridge_url) as ws:
+                async with websockets.connect(bridge_url, max_size=BRIDGE_MAX_FRAME_BYTES) as ws:
                     self._ws = ws
                     # Send auth token if configured
                     if self.config.bridge_token:
@@ -114,20 +125,34 @@ class WhatsAppChannel(BaseChannel):
             sender_id = user_id.split("@")[0] if "@" in user_id else user_id
             logger.info(f"Sender {sender}")
             
-            # Handle voice transcription if it's a voice message
+            metadata = {
+                "message_id": data.get("id"),
+                "timestamp": data.get("timestamp"),
+                "is_group": data.get("isGroup", False)
+            }
+            
             if content == "[Voice Message]":
-                logger.info(f"Voice message received from {sender_id}, but direct download from bridge is not yet supported.")
-                content = "[Voice Message: Transcription not available for WhatsApp yet]"
+                content, media_paths = self._save_voice(data, sender_id)
+                if media_paths and self.transcriber:
+                    # Transcribe in the background so the websocket keeps being read
+                    self._handle_message_later(
+                        sender_id=sender_id,
+                        chat_id=sender,
+                        prepare=lambda: self._transcribe(media_paths[0]),
+                        fallback=content,
+                        media=media_paths,
+                        metadata=metadata,
+                    )
+                    return
+            else:
+                media_paths = []
             
             await self._handle_message(
                 sender_id=sender_id,
                 chat_id=sender,  # Use full LID for replies
                 content=content,
-                metadata={
-                    "message_id": data.get("id"),
-                    "timestamp": data.get("timestamp"),
-                    "is_group": data.get("isGroup", False)
-                }
+                media=media_paths,
+                metadata=metadata,
             )
         
         elif msg_type == "status":
@@ -146,3 +171,26 @@ class WhatsAppChannel(BaseChannel):
         
         elif msg_type == "error":
             logger.error(f"WhatsApp bridge error: {data.get('error')}")
+
+    def _save_voice(self, data: dict[str, Any], sender_id: str) -> tuple[str, list[str]]:
+        """Save the audio the bridge sent (base64); returns placeholder content and media paths."""
+        audio = data.get("audio")
+        if not audio:
+            logger.info(f"Voice message from {sender_id} arrived without audio (bridge too old?)")
+            return "[Voice Message: audio not available]", []
+        mime = (data.get("mimetype") or "audio/ogg").split(";")[0].strip()
+        ext = ".ogg" if mime == "audio/ogg" else mimetypes.guess_extension(mime) or ".ogg"
+        file_path = get_media_path() / f"wa_{data.get('id') or 'voice'}{ext}"
+        try:
+            file_path.write_bytes(base64.b64decode(audio))
+        except (ValueError, OSError) as e:
+            logger.error(f"Failed to save WhatsApp voice message: {e}")
+            return "[Voice Message: download failed]", []
+        return f"[voice: {file_path}]", [str(file_path)]
+
+    async def _transcribe(self, file_path: str) -> str:
+        transcription = await self.transcriber.transcribe(file_path)
+        if not transcription:
+            return ""
+        logger.info(f"Transcribed voice: {transcription[:50]}...")
+        return f"[transcription: {transcription}]"
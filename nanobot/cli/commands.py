@@ -349,8 +349,15 @@ def gateway(
     session_manager = SessionManager(config.workspace_path)
     
     # Create cron service first (callback set after agent creation)
-    cron_store_path = get_data_dir() / "cron" / "jobs.json"
-    cron = CronService(cron_store_path)
+    cron_store_path = get_data_dir() / "cron" / "jobs.db"
+    cron = CronService(
+        cron_store_path,
+        max_concurrent=config.cron.max_concurrent,
+        job_timeout_s=config.cron.job_timeout,
+        misfire_policy=config.cron.misfire_policy,
+        misfire_grace_s=config.cron.misfire_grace,
+        jitter_s=config.cron.jitter,
+    )
     
     # Create agent with cron service
     agent = AgentLoop(
@@ -362,12 +369,27 @@ def gateway(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        memory_backend=config.agents.defaults.memory_backend,
+        memory_top_k=config.agents.defaults.memory_top_k,
+        max_turn_tokens=config.agents.defaults.max_turn_tokens,
+        max_turn_seconds=config.agents.defaults.max_turn_seconds,
+        max_tool_calls=config.agents.defaults.max_tool_calls,
+        max_repeated_calls=config.agents.defaults.max_repeated_calls,
+        reflect_mode=config.agents.defaults.reflect_mode,
+        reflect_prompt=config.agents.defaults.reflect_prompt,
+        subagents=config.agents.subagents,
+        compaction=config.tools.compaction,
+        media=config.agents.media,
+        persist_tool_calls=config.agents.defaults.persist_tool_calls,
+        tool_blob_threshold=config.agents.defaults.tool_blob_threshold,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
         session_manager=session_manager,
         mcp_servers=config.tools.mcp_servers,
+        tool_selection=config.tools.selection,
+        semantic_search=config.tools.semantic_search,
     )
     
     # Set cron callback (needs agent)
@@ -397,8 +419,10 @@ def gateway(
     heartbeat = HeartbeatService(
         workspace=config.workspace_path,
         on_heartbeat=on_heartbeat,
-        interval_s=30 * 60,  # 30 minutes
-        enabled=True
+        interval_s=config.heartbeat.interval,
+        enabled=config.heartbeat.enabled,
+        mode=config.heartbeat.mode,
+        poll_interval_s=config.heartbeat.poll_interval,
     )
     
     # Create channel manager
@@ -413,7 +437,8 @@ def gateway(
     if cron_status["jobs"] > 0:
         console.print(f"[green]✓[/green] Cron: {cron_status['jobs']} scheduled jobs")
     
-    console.print(f"[green]✓[/green] Heartbeat: every 30m")
+    if config.heartbeat.enabled:
+        console.print(f"[green]✓[/green] Heartbeat: every {config.heartbeat.interval // 60}m ({config.heartbeat.mode})")
     
     async def run():
         try:
@@ -426,7 +451,9 @@ def gateway(
         except KeyboardInterrupt:
             console.print("\nShutting down...")
         finally:
+            await agent.flush_consolidation()
             await agent.close_mcp()
+            await agent.close_tools()
             heartbeat.stop()
             cron.stop()
             agent.stop()
@@ -462,7 +489,7 @@ def agent(
     provider = _make_provider(config)
 
     # Create cron service for tool usage (no callback needed for CLI unless running)
-    cron_store_path = get_data_dir() / "cron" / "jobs.json"
+    cron_store_path = get_data_dir() / "cron" / "jobs.db"
     cron = CronService(cron_store_path)
 
     if logs:
@@ -479,11 +506,26 @@ def agent(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        memory_backend=config.agents.defaults.memory_backend,
+        memory_top_k=config.agents.defaults.memory_top_k,
+        max_turn_tokens=config.agents.defaults.max_turn_tokens,
+        max_turn_seconds=config.agents.defaults.max_turn_seconds,
+        max_tool_calls=config.agents.defaults.max_tool_calls,
+        max_repeated_calls=config.agents.defaults.max_repeated_calls,
+        reflect_mode=config.agents.defaults.reflect_mode,
+        reflect_prompt=config.agents.defaults.reflect_prompt,
+        subagents=config.agents.subagents,
+        compaction=config.tools.compaction,
+        media=config.agents.media,
+        persist_tool_calls=config.agents.defaults.persist_tool_calls,
+        tool_blob_threshold=config.agents.defaults.tool_blob_threshold,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
         mcp_servers=config.tools.mcp_servers,
+        tool_selection=config.tools.selection,
+        semantic_search=config.tools.semantic_search,
     )
     
     # Show spinner when logs are off (no output to miss); skip when logs are on
@@ -500,7 +542,9 @@ def agent(
             with _thinking_ctx():
                 response = await agent_loop.process_direct(message, session_id)
             _print_agent_response(response, render_markdown=markdown)
+            await agent_loop.flush_consolidation()
             await agent_loop.close_mcp()
+            await agent_loop.close_tools()
         
         asyncio.run(run_once())
     else:
@@ -509,6 +553,7 @@ def agent(
         console.print(f"{__logo__} Interactive mode (type [bold]exit[/bold] or [bold]Ctrl+C[/bold] to quit)\n")
 
         def _exit_on_sigint(signum, frame):
+            agent_loop.kill_tools()
             _restore_terminal()
             console.print("\nGoodbye!")
             os._exit(0)
@@ -542,7 +587,9 @@ def agent(
                         console.print("\nGoodbye!")
                         break
             finally:
+                await agent_loop.flush_consolidation()
                 await agent_loop.close_mcp()
+                await agent_loop.close_tools()
         
         asyncio.run(run_interactive())
 
@@ -720,7 +767,7 @@ def cron_list(
     from nanobot.config.loader import get_data_dir
     from nanobot.cron.service import CronService
     
-    store_path = get_data_dir() / "cron" / "jobs.json"
+    store_path = get_data_dir() / "cron" / "jobs.db"
     service = CronService(store_path)
     
     jobs = service.list_jobs(include_disabled=all)
@@ -793,23 +840,31 @@ def cron_add(
         schedule = CronSchedule(kind="cron", expr=cron_expr, tz=tz)
     elif at:
         import datetime
-        dt = datetime.datetime.fromisoformat(at)
+        try:
+            dt = datetime.datetime.fromisoformat(at)
+        except ValueError:
+            console.print(f"[red]Error: invalid ISO datetime '{at}'[/red]")
+            raise typer.Exit(1)
         schedule = CronSchedule(kind="at", at_ms=int(dt.timestamp() * 1000))
     else:
         console.print("[red]Error: Must specify --every, --cron, or --at[/red]")
         raise typer.Exit(1)
     
-    store_path = get_data_dir() / "cron" / "jobs.json"
+    store_path = get_data_dir() / "cron" / "jobs.db"
     service = CronService(store_path)
     
-    job = service.add_job(
-        name=name,
-        schedule=schedule,
-        message=message,
-        deliver=deliver,
-        to=to,
-        channel=channel,
-    )
+    try:
+        job = service.add_job(
+            name=name,
+            schedule=schedule,
+            message=message,
+            deliver=deliver,
+            to=to,
+            channel=channel,
+        )
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
     
     console.print(f"[green]✓[/green] Added job '{job.name}' ({job.id})")
 
@@ -822,7 +877,7 @@ def cron_remove(
     from nanobot.config.loader import get_data_dir
     from nanobot.cron.service import CronService
     
-    store_path = get_data_dir() / "cron" / "jobs.json"
+    store_path = get_data_dir() / "cron" / "jobs.db"
     service = CronService(store_path)
     
     if service.remove_job(job_id):
@@ -840,7 +895,7 @@ def cron_enable(
     from nanobot.config.loader import get_data_dir
     from nanobot.cron.service import CronService
     
-    store_path = get_data_dir() / "cron" / "jobs.json"
+    store_path = get_data_dir() / "cron" / "jobs.db"
     service = CronService(store_path)
     
     job = service.enable_job(job_id, enabled=not disable)
@@ -860,7 +915,7 @@ def cron_run(
     from nanobot.config.loader import get_data_dir
     from nanobot.cron.service import CronService
     
-    store_path = get_data_dir() / "cron" / "jobs.json"
+    store_path = get_data_dir() / "cron" / "jobs.db"
     service = CronService(store_path)
     
     async def run():
@@ -872,6 +927,83 @@ def cron_run(
         console.print(f"[red]Failed to run job {job_id}[/red]")
 
 
+@cron_app.command("preview")
+def cron_preview(
+    job_id: str = typer.Argument(None, help="Job ID (or use --cron/--every)"),
+    cron_expr: str = typer.Option(None, "--cron", "-c", help="Cron expression to preview"),
+    every: int = typer.Option(None, "--every", "-e", help="Interval in seconds to preview"),
+    tz: str | None = typer.Option(None, "--tz", help="IANA timezone for --cron"),
+    count: int = typer.Option(5, "--count", "-n", help="Number of fire times to show"),
+):
+    """Show upcoming fire times of a job or schedule."""
+    from datetime import datetime as _dt
+
+    from nanobot.config.loader import get_data_dir
+    from nanobot.cron.schedule import compile_schedule
+    from nanobot.cron.service import CronService
+    from nanobot.cron.types import CronSchedule
+
+    if job_id:
+        service = CronService(get_data_dir() / "cron" / "jobs.db")
+        job = next((j for j in service.list_jobs(include_disabled=True) if j.id == job_id), None)
+        if not job:
+            console.print(f"[red]Job {job_id} not found[/red]")
+            raise typer.Exit(1)
+        schedule = job.schedule
+    elif cron_expr:
+        schedule = CronSchedule(kind="cron", expr=cron_expr, tz=tz)
+    elif every:
+        schedule = CronSchedule(kind="every", every_ms=every * 1000)
+    else:
+        console.print("[red]Error: Must specify a job ID, --cron, or --every[/red]")
+        raise typer.Exit(1)
+
+    try:
+        compiled = compile_schedule(schedule)
+        fires = compiled.next_n(int(_dt.now().timestamp() * 1000), count)
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    if not fires:
+        console.print("No upcoming runs.")
+        return
+    for ms in fires:
+        console.print(_dt.fromtimestamp(ms / 1000, compiled.tz).strftime("%Y-%m-%d %H:%M:%S %Z").strip())
+
+
+@cron_app.command("history")
+def cron_history(
+    job_id: str = typer.Argument(None, help="Job ID (all jobs if omitted)"),
+    limit: int = typer.Option(20, "--limit", "-l", help="Number of runs to show"),
+):
+    """Show recent job executions."""
+    from nanobot.config.loader import get_data_dir
+    from nanobot.cron.service import CronService
+    
+    store_path = get_data_dir() / "cron" / "jobs.db"
+    service = CronService(store_path)
+    
+    runs = service.runs(job_id, limit=limit)
+    if not runs:
+        console.print("No runs recorded.")
+        return
+    
+    import time
+    table = Table(title="Cron Runs")
+    table.add_column("Job", style="cyan")
+    table.add_column("Started")
+    table.add_column("Duration")
+    table.add_column("Status")
+    table.add_column("Tokens")
+    for run in runs:
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run.started_at_ms / 1000))
+        status = "[green]ok[/green]" if run.status == "ok" else f"[red]{run.status}[/red] {run.error or ''}"
+        table.add_row(run.job_id, started, f"{run.duration_ms / 1000:.1f}s", status, str(run.tokens or ""))
+    
+    console.print(table)
+
+
 # ============================================================================
 # Status Commands
 # ============================================================================
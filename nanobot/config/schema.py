@@ -81,11 +81,17 @@ class EmailConfig(Base):
     smtp_password: str = ""
     smtp_use_tls: bool = True
     smtp_use_ssl: bool = False
+    smtp_pool_size: int = 1  # Kept-alive SMTP connections sending in parallel
+    smtp_max_per_minute: int = 0  # Pace outgoing mail to this rate (0 = unlimited)
+    smtp_keepalive_seconds: int = 60  # Reconnect instead of reusing a connection idle this long
     from_address: str = ""
 
     # Behavior
     auto_reply_enabled: bool = True  # If false, inbound email is read but no automatic reply is sent
-    poll_interval_seconds: int = 30
+    poll_interval_seconds: int = 30  # Used when the server has no IDLE (or imap_idle is off)
+    imap_idle: bool = True  # Wait for new mail with IMAP IDLE on a persistent connection
+    idle_timeout_seconds: int = 1500  # Re-issue IDLE this often (servers drop idle clients after ~30 min)
+    fetch_batch_size: int = 50  # Messages per UID FETCH
     mark_seen: bool = True
     max_body_chars: int = 12000
     subject_prefix: str = "Re: "
@@ -164,6 +170,17 @@ class QQConfig(Base):
     allow_from: list[str] = Field(default_factory=list)  # Allowed user openids (empty = public access)
 
 
+class RateLimitConfig(Base):
+    """Outbound rate limit override for one channel (unset fields keep the platform default)."""
+
+    rate: float = 0  # Sends per second across all chats (0 = unlimited)
+    burst: int = 1
+    chat_rate: float = 0  # Sends per second to one chat (0 = unlimited)
+    chat_burst: int = 1
+    coalesce: bool = True  # Merge queued messages to the same chat into one send
+    max_chars: int = 4000  # Upper size of a coalesced message
+
+
 class ChannelsConfig(Base):
     """Configuration for chat channels."""
 
@@ -176,6 +193,7 @@ class ChannelsConfig(Base):
     email: EmailConfig = Field(default_factory=EmailConfig)
     slack: SlackConfig = Field(default_factory=SlackConfig)
     qq: QQConfig = Field(default_factory=QQConfig)
+    rate_limits: dict[str, RateLimitConfig] = Field(default_factory=dict)  # Keyed by channel name
 
 
 class AgentDefaults(Base):
@@ -187,12 +205,47 @@ class AgentDefaults(Base):
     temperature: float = 0.7
     max_tool_iterations: int = 20
     memory_window: int = 50
+    memory_backend: str = "file"  # "file" (whole MEMORY.md in every prompt) or "sqlite" (facts, top-K retrieval)
+    memory_top_k: int = 12  # sqlite backend: facts injected per turn
+    max_turn_tokens: int = 0  # Ask for a final answer once a turn has used this many tokens (0 = no limit)
+    max_turn_seconds: int = 0  # Same, for wall-clock time per turn (0 = no limit)
+    max_tool_calls: int = 0  # Same, for tool calls per turn (0 = no limit)
+    max_repeated_calls: int = 3  # Identical tool calls in a row with identical results before the turn stops (0 = no limit)
+    reflect_mode: str = "adaptive"  # Reflection prompt after tool rounds: "always", "adaptive" (after tool errors) or "off"
+    reflect_prompt: str = "Reflect on the results and decide next steps."
+    persist_tool_calls: bool = False  # Keep tool calls and results in session history for follow-up turns
+    tool_blob_threshold: int = 2000  # Persisted tool results longer than this are stored in sessions/blobs
+
+
+class SubagentConfig(Base):
+    """Background subagent limits."""
+
+    max_concurrent: int = Field(default=3, ge=1)  # Subagents running at once; others wait in the queue
+    max_queued: int = 10  # Waiting subagents before spawn is refused
+    per_session_limit: int = 3  # Queued + running subagents per origin chat (0 = unlimited)
+    max_iterations: int = 15  # Tool-call rounds per subagent
+    timeout: int = 900  # Wall-clock seconds per subagent, not counting queue time (0 = no limit)
+    token_budget: int = 200000  # Total tokens per subagent (0 = no limit)
+    progress_interval: int = 0  # Min seconds between progress updates to the chat (0 = off)
+
+
+class MediaConfig(Base):
+    """Image handling for inbound media."""
+
+    max_dimension: int = 0  # Longest image edge sent to the model (0 = pick by provider)
+    jpeg_quality: int = 85  # Quality of re-encoded downsized images
+    workers: int = 2  # Threads for image encoding
+    max_age_days: float = 30  # Downloaded media older than this is deleted (0 = keep)
+    max_size_mb: float = 500  # Oldest media is deleted above this size (0 = unlimited)
+    gc_interval: int = 3600  # Seconds between media cleanups
 
 
 class AgentsConfig(Base):
     """Agent configuration."""
 
     defaults: AgentDefaults = Field(default_factory=AgentDefaults)
+    subagents: SubagentConfig = Field(default_factory=SubagentConfig)
+    media: MediaConfig = Field(default_factory=MediaConfig)
 
 
 class ProviderConfig(Base):
@@ -244,10 +297,29 @@ class WebToolsConfig(Base):
     search: WebSearchConfig = Field(default_factory=WebSearchConfig)
 
 
+class ExecSandboxConfig(Base):
+    """Resource limits and isolation for shell commands."""
+
+    enabled: bool = False
+    cpu_seconds: int = 60  # RLIMIT_CPU per process
+    memory_mb: int = 2048  # RLIMIT_AS (and cgroup memory.max)
+    file_size_mb: int = 256  # RLIMIT_FSIZE
+    max_processes: int = 0  # RLIMIT_NPROC / pids.max (0 = unlimited; RLIMIT_NPROC counts all of the user's processes)
+    namespace: str = "none"  # "none", "auto", "bwrap" or "unshare"
+    network: bool = True  # Keep network access inside namespaces
+    cgroup: bool = False  # Use a cgroup v2 child group (needs a delegated, writable cgroup)
+
+
 class ExecToolConfig(Base):
     """Shell exec tool configuration."""
 
     timeout: int = 60
+    max_output_chars: int = 10000  # Head + tail of output returned to the model
+    max_output_bytes: int = 16 * 1024 * 1024  # Hard ceiling; the command is killed beyond this
+    progress_interval: int = 0  # Seconds between progress updates to the chat (0 = off)
+    persistent_shell: bool = False  # Keep one long-lived shell per chat (cd/export persist)
+    shell_idle_ttl: int = 600  # Seconds before an idle persistent shell is closed
+    sandbox: ExecSandboxConfig = Field(default_factory=ExecSandboxConfig)
 
 
 class MCPServerConfig(Base):
@@ -257,6 +329,40 @@ class MCPServerConfig(Base):
     args: list[str] = Field(default_factory=list)  # Stdio: command arguments
     env: dict[str, str] = Field(default_factory=dict)  # Stdio: extra env vars
     url: str = ""  # HTTP: streamable HTTP endpoint URL
+    lazy: bool = False  # Register tools from the on-disk schema cache; start the server on first use
+    connect_timeout: int = 30  # Seconds allowed for spawn + initialize + list_tools
+    call_timeout: int = 60  # Seconds per tool call
+    max_concurrency: int = 4  # Concurrent calls to this server (0 = unlimited)
+    health_interval: int = 60  # Seconds between pings; failed pings trigger a reconnect (0 = off)
+    pool_size: int = 1  # Stdio only: number of server processes to spread calls across
+    retry_tools: list[str] = Field(default_factory=list)  # Tools safe to re-send after a transport failure ("*" = all)
+
+
+class ToolSelectionConfig(Base):
+    """Per-request tool subset selection (shrinks payloads with many MCP tools)."""
+
+    enabled: bool = False
+    top_k: int = 8  # Ranked non-core tools sent per request
+    pinned: list[str] = Field(default_factory=list)  # Extra tools always sent (built-ins always are)
+
+
+class SemanticSearchConfig(Base):
+    """On-device semantic index over sessions and HISTORY.md (requires numpy)."""
+
+    enabled: bool = False
+    embedder: str = "hashing"  # "hashing" or "sentence-transformers:<model>"
+    dim: int = 384  # Vector size for the hashing embedder
+    refresh_interval: int = 300  # Seconds between background index updates
+
+
+class CompactionConfig(Base):
+    """Shortening of tool results after the model has read them once."""
+
+    enabled: bool = True
+    threshold: int = 4000  # Results longer than this many chars are compacted
+    thresholds: dict[str, int] = Field(default_factory=lambda: {"read_file": 16000})  # Per-tool overrides (0 = never)
+    head_chars: int = 1500  # Kept from the start of a compacted result
+    tail_chars: int = 500  # Kept from the end of a compacted result
 
 
 class ToolsConfig(Base):
@@ -266,6 +372,39 @@ class ToolsConfig(Base):
     exec: ExecToolConfig = Field(default_factory=ExecToolConfig)
     restrict_to_workspace: bool = False  # If true, restrict all tool access to workspace directory
     mcp_servers: dict[str, MCPServerConfig] = Field(default_factory=dict)
+    selection: ToolSelectionConfig = Field(default_factory=ToolSelectionConfig)
+    semantic_search: SemanticSearchConfig = Field(default_factory=SemanticSearchConfig)
+    compaction: CompactionConfig = Field(default_factory=CompactionConfig)
+
+
+class CronConfig(Base):
+    """Cron scheduler configuration."""
+
+    max_concurrent: int = 4  # Jobs allowed to run at the same time (0 = unlimited)
+    job_timeout: int = 600  # Seconds before a running job is cancelled (0 = no limit)
+    misfire_policy: str = "coalesce"  # "skip", "coalesce" or "run_late" for runs that start late
+    misfire_grace: int = 300  # Seconds late a run may start before the misfire policy applies
+    jitter: int = 0  # Max random delay in seconds added to recurring jobs
+
+
+class HeartbeatConfig(Base):
+    """Heartbeat (periodic HEARTBEAT.md check) configuration."""
+
+    enabled: bool = True
+    interval: int = 1800  # Seconds between periodic checks
+    mode: str = "watch"  # "watch" (watchfiles, falls back to polling), "poll" or "interval"
+    poll_interval: float = 5.0  # Seconds between file checks in poll mode
+
+
+class TranscriptionConfig(Base):
+    """Voice message transcription."""
+
+    enabled: bool = True
+    backend: str = "auto"  # "auto" (Groq if a key is set, then local), "groq" or "local"
+    local_model: str = "base"  # faster-whisper model for the local backend
+    compute_type: str = "int8"  # faster-whisper compute type on CPU
+    workers: int = 2  # Transcriptions running at once
+    max_queue: int = 20  # Waiting transcriptions before new ones are skipped
 
 
 class Config(BaseSettings):
@@ -276,6 +415,9 @@ class Config(BaseSettings):
     providers: ProvidersConfig = Field(default_factory=ProvidersConfig)
     gateway: GatewayConfig = Field(default_factory=GatewayConfig)
     tools: ToolsConfig = Field(default_factory=ToolsConfig)
+    cron: CronConfig = Field(default_factory=CronConfig)
+    heartbeat: HeartbeatConfig = Field(default_factory=HeartbeatConfig)
+    transcription: TranscriptionConfig = Field(default_factory=TranscriptionConfig)
 
     @property
     def workspace_path(self) -> Path:
@@ -0,0 +1,86 @@
+"""Compiled cron schedules."""
+
+from datetime import datetime, tzinfo
+from functools import lru_cache
+
+from nanobot.cron.types import CronSchedule
+
+
+class ScheduleError(ValueError):
+    """A schedule that can never fire (bad expression, timezone or interval)."""
+
+
+class CompiledSchedule:
+    """
+    A validated schedule with its expression and timezone parsed once.
+
+    Cron expressions keep a single ``croniter`` that is re-positioned for
+    each query instead of being rebuilt, so computing next fire times costs
+    only the calendar walk.
+    """
+
+    def __init__(self, schedule: CronSchedule):
+        self.kind = schedule.kind
+        self.at_ms = schedule.at_ms
+        self.every_ms = schedule.every_ms
+        self.tz: tzinfo | None = None
+        self._cron = None
+
+        if self.kind == "at":
+            if not self.at_ms:
+                raise ScheduleError("one-time schedule needs a time")
+        elif self.kind == "every":
+            if not self.every_ms or self.every_ms <= 0:
+                raise ScheduleError("interval must be a positive number of seconds")
+        elif self.kind == "cron":
+            from croniter import croniter
+            if not schedule.expr or not croniter.is_valid(schedule.expr):
+                raise ScheduleError(f"invalid cron expression '{schedule.expr}'")
+            self.tz = _zone(schedule.tz) if schedule.tz else None
+            self._cron = croniter(schedule.expr, datetime.now(self.tz or _local_tz()))
+        else:
+            raise ScheduleError(f"unknown schedule kind '{self.kind}'")
+
+    def next_after(self, now_ms: int) -> int | None:
+        """First fire time strictly after ``now_ms`` (None if it never fires again)."""
+        fires = self.next_n(now_ms, 1)
+        return fires[0] if fires else None
+
+    def next_n(self, now_ms: int, n: int) -> list[int]:
+        """The next ``n`` fire times (ms) after ``now_ms``."""
+        if n <= 0:
+            return []
+        if self.kind == "at":
+            return [self.at_ms] if self.at_ms > now_ms else []
+        if self.kind == "every":
+            return [now_ms + self.every_ms * k for k in range(1, n + 1)]
+        tz = self.tz or _local_tz()
+        self._cron.set_current(datetime.fromtimestamp(now_ms / 1000, tz=tz), force=True)
+        return [int(self._cron.get_next(datetime).timestamp() * 1000) for _ in range(n)]
+
+
+def _local_tz() -> tzinfo:
+    return datetime.now().astimezone().tzinfo
+
+
+@lru_cache(maxsize=64)
+def _zone(name: str) -> tzinfo:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ScheduleError(f"unknown timezone '{name}'") from None
+
+
+@lru_cache(maxsize=1024)
+def _compile(kind: str, at_ms: int | None, every_ms: int | None, expr: str | None, tz: str | None) -> CompiledSchedule:
+    return CompiledSchedule(CronSchedule(kind=kind, at_ms=at_ms, every_ms=every_ms, expr=expr, tz=tz))
+
+
+def compile_schedule(schedule: CronSchedule) -> CompiledSchedule:
+    """Parse and validate a schedule; results are cached per distinct schedule.
+
+    Raises:
+        ScheduleError: if the schedule is invalid.
+    """
+    return _compile(schedule.kind, schedule.at_ms, schedule.every_ms, schedule.expr, schedule.tz)
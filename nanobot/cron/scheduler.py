@@ -0,0 +1,71 @@
+"""Due-time queue for the cron service."""
+
+import heapq
+import itertools
+
+
+class DueQueue:
+    """
+    Min-heap of job ids keyed on their next run time.
+
+    Rescheduling or removing a job leaves its old heap entry in place and
+    marks it stale (lazy deletion), so push/remove/pop are all O(log n).
+    The heap is compacted when stale entries outnumber live ones.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[int, int, str]] = []
+        self._live: dict[str, tuple[int, int]] = {}  # job_id -> (when_ms, seq)
+        self._seq = itertools.count()
+
+    def push(self, job_id: str, when_ms: int) -> None:
+        """Schedule (or reschedule) a job."""
+        seq = next(self._seq)
+        self._live[job_id] = (when_ms, seq)
+        heapq.heappush(self._heap, (when_ms, seq, job_id))
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._live):
+            self._compact()
+
+    def remove(self, job_id: str) -> bool:
+        return self._live.pop(job_id, None) is not None
+
+    def _is_live(self, entry: tuple[int, int, str]) -> bool:
+        when_ms, seq, job_id = entry
+        return self._live.get(job_id) == (when_ms, seq)
+
+    def _discard_stale(self) -> None:
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def peek(self) -> tuple[int, str] | None:
+        """Earliest (when_ms, job_id) without removing it."""
+        self._discard_stale()
+        if not self._heap:
+            return None
+        when_ms, _, job_id = self._heap[0]
+        return when_ms, job_id
+
+    def pop_due(self, now_ms: int) -> list[tuple[int, str]]:
+        """Remove and return every (scheduled_ms, job_id) due at ``now_ms``, earliest first."""
+        due = []
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now_ms:
+                return due
+            when_ms, _, job_id = heapq.heappop(self._heap)
+            del self._live[job_id]
+            due.append((when_ms, job_id))
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._live.clear()
+
+    def _compact(self) -> None:
+        self._heap = [e for e in self._heap if self._is_live(e)]
+        heapq.heapify(self._heap)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._live
+
+    def __len__(self) -> int:
+        return len(self._live)
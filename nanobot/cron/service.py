@@ -1,16 +1,20 @@
 """Cron service for scheduling agent tasks."""
 
 import asyncio
-import json
+import contextlib
+import random
 import time
 import uuid
-from datetime import datetime
 from pathlib import Path
 from typing import Any, Callable, Coroutine
 
 from loguru import logger
 
+from nanobot.cron.schedule import ScheduleError, compile_schedule
+from nanobot.cron.scheduler import DueQueue
+from nanobot.cron.store import CronRun, open_cron_store
 from nanobot.cron.types import CronJob, CronJobState, CronPayload, CronSchedule, CronStore
+from nanobot.utils.usage import track_usage
 
 
 def _now_ms() -> int:
@@ -18,137 +22,79 @@ def _now_ms() -> int:
 
 
 def _compute_next_run(schedule: CronSchedule, now_ms: int) -> int | None:
-    """Compute next run time in ms."""
-    if schedule.kind == "at":
-        return schedule.at_ms if schedule.at_ms and schedule.at_ms > now_ms else None
-    
-    if schedule.kind == "every":
-        if not schedule.every_ms or schedule.every_ms <= 0:
-            return None
-        # Next interval from now
-        return now_ms + schedule.every_ms
-    
-    if schedule.kind == "cron" and schedule.expr:
-        try:
-            from croniter import croniter
-            from zoneinfo import ZoneInfo
-            # Use caller-provided reference time for deterministic scheduling
-            base_time = now_ms / 1000
-            tz = ZoneInfo(schedule.tz) if schedule.tz else datetime.now().astimezone().tzinfo
-            base_dt = datetime.fromtimestamp(base_time, tz=tz)
-            cron = croniter(schedule.expr, base_dt)
-            next_dt = cron.get_next(datetime)
-            return int(next_dt.timestamp() * 1000)
-        except Exception:
-            return None
-    
-    return None
+    """Compute next run time in ms (raises ScheduleError for an invalid schedule)."""
+    return compile_schedule(schedule).next_after(now_ms)
 
 
 class CronService:
-    """Service for managing and executing scheduled jobs."""
-    
+    """
+    Service for managing and executing scheduled jobs.
+
+    Enabled jobs sit in a min-heap keyed on their next run time, so waking up
+    and (re)scheduling are O(log n) in the number of jobs, and jobs are looked
+    up by id through a dict index rather than a scan of the list. Due jobs run
+    concurrently (up to ``max_concurrent``) with a per-job timeout. A job that
+    starts more than ``misfire_grace_s`` late (the process was down, or all
+    slots were busy) follows ``misfire_policy``:
+
+    - ``skip``: drop the missed run and wait for the next one
+    - ``coalesce``: run once, then schedule from now (missed runs collapse)
+    - ``run_late``: run, then schedule from the missed slot so every missed
+      run is replayed
+
+    Recurring jobs get up to ``jitter_s`` of random delay so jobs sharing a
+    schedule do not all fire in the same instant.
+    """
+
+    MISFIRE_POLICIES = ("skip", "coalesce", "run_late")
+
     def __init__(
         self,
         store_path: Path,
-        on_job: Callable[[CronJob], Coroutine[Any, Any, str | None]] | None = None
+        on_job: Callable[[CronJob], Coroutine[Any, Any, str | None]] | None = None,
+        max_concurrent: int = 4,
+        job_timeout_s: float = 600,
+        misfire_policy: str = "coalesce",
+        misfire_grace_s: float = 300,
+        jitter_s: float = 0,
     ):
+        if misfire_policy not in self.MISFIRE_POLICIES:
+            raise ValueError(f"Unknown misfire policy: {misfire_policy!r}")
         self.store_path = store_path
+        self._backend = open_cron_store(store_path)
         self.on_job = on_job  # Callback to execute job, returns response text
+        self.job_timeout_s = job_timeout_s
+        self.misfire_policy = misfire_policy
+        self.misfire_grace_ms = int(misfire_grace_s * 1000)
+        self.jitter_ms = int(jitter_s * 1000)
         self._store: CronStore | None = None
+        self._jobs: dict[str, CronJob] = {}  # id -> job, mirrors self._store.jobs
         self._timer_task: asyncio.Task | None = None
         self._running = False
+        self._queue = DueQueue()
+        self._active: dict[str, asyncio.Task] = {}
+        self._slots = asyncio.Semaphore(max_concurrent) if max_concurrent > 0 else None
     
     def _load_store(self) -> CronStore:
-        """Load jobs from disk."""
+        """Load jobs from disk (once); ``start()`` builds the due queue."""
         if self._store:
             return self._store
         
-        if self.store_path.exists():
-            try:
-                data = json.loads(self.store_path.read_text())
-                jobs = []
-                for j in data.get("jobs", []):
-                    jobs.append(CronJob(
-                        id=j["id"],
-                        name=j["name"],
-                        enabled=j.get("enabled", True),
-                        schedule=CronSchedule(
-                            kind=j["schedule"]["kind"],
-                            at_ms=j["schedule"].get("atMs"),
-                            every_ms=j["schedule"].get("everyMs"),
-                            expr=j["schedule"].get("expr"),
-                            tz=j["schedule"].get("tz"),
-                        ),
-                        payload=CronPayload(
-                            kind=j["payload"].get("kind", "agent_turn"),
-                            message=j["payload"].get("message", ""),
-                            deliver=j["payload"].get("deliver", False),
-                            channel=j["payload"].get("channel"),
-                            to=j["payload"].get("to"),
-                        ),
-                        state=CronJobState(
-                            next_run_at_ms=j.get("state", {}).get("nextRunAtMs"),
-                            last_run_at_ms=j.get("state", {}).get("lastRunAtMs"),
-                            last_status=j.get("state", {}).get("lastStatus"),
-                            last_error=j.get("state", {}).get("lastError"),
-                        ),
-                        created_at_ms=j.get("createdAtMs", 0),
-                        updated_at_ms=j.get("updatedAtMs", 0),
-                        delete_after_run=j.get("deleteAfterRun", False),
-                    ))
-                self._store = CronStore(jobs=jobs)
-            except Exception as e:
-                logger.warning(f"Failed to load cron store: {e}")
-                self._store = CronStore()
-        else:
-            self._store = CronStore()
-        
+        self._store = CronStore(jobs=self._backend.load())
+        self._jobs = {job.id: job for job in self._store.jobs}
         return self._store
     
     def _save_store(self) -> None:
-        """Save jobs to disk."""
-        if not self._store:
-            return
-        
-        self.store_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        data = {
-            "version": self._store.version,
-            "jobs": [
-                {
-                    "id": j.id,
-                    "name": j.name,
-                    "enabled": j.enabled,
-                    "schedule": {
-                        "kind": j.schedule.kind,
-                        "atMs": j.schedule.at_ms,
-                        "everyMs": j.schedule.every_ms,
-                        "expr": j.schedule.expr,
-                        "tz": j.schedule.tz,
-                    },
-                    "payload": {
-                        "kind": j.payload.kind,
-                        "message": j.payload.message,
-                        "deliver": j.payload.deliver,
-                        "channel": j.payload.channel,
-                        "to": j.payload.to,
-                    },
-                    "state": {
-                        "nextRunAtMs": j.state.next_run_at_ms,
-                        "lastRunAtMs": j.state.last_run_at_ms,
-                        "lastStatus": j.state.last_status,
-                        "lastError": j.state.last_error,
-                    },
-                    "createdAtMs": j.created_at_ms,
-                    "updatedAtMs": j.updated_at_ms,
-                    "deleteAfterRun": j.delete_after_run,
-                }
-                for j in self._store.jobs
-            ]
-        }
-        
-        self.store_path.write_text(json.dumps(data, indent=2))
+        """Save every job to disk."""
+        if self._store:
+            self._backend.save_jobs(self._store.jobs)
+
+    def _persist(self, job: CronJob) -> None:
+        """Write (or delete) a single job after it changed."""
+        if job.id in self._jobs:
+            self._backend.save_job(job)
+        else:
+            self._backend.delete_job(job.id)
     
     async def start(self) -> None:
         """Start the cron service."""
@@ -156,6 +102,7 @@ class CronService:
         self._load_store()
         self._recompute_next_runs()
         self._save_store()
+        self._rebuild_queue()
         self._arm_timer()
         logger.info(f"Cron service started with {len(self._store.jobs if self._store else [])} jobs")
     
@@ -165,23 +112,51 @@ class CronService:
         if self._timer_task:
             self._timer_task.cancel()
             self._timer_task = None
+        for task in self._active.values():
+            task.cancel()
     
     def _recompute_next_runs(self) -> None:
-        """Recompute next run times for all enabled jobs."""
+        """Fill in missing next run times; overdue ones are kept for the misfire policy."""
         if not self._store:
             return
         now = _now_ms()
         for job in self._store.jobs:
-            if job.enabled:
-                job.state.next_run_at_ms = _compute_next_run(job.schedule, now)
+            if job.enabled and job.state.next_run_at_ms is None:
+                job.state.next_run_at_ms = self._next_run(job, now)
+
+    def _next_run(self, job: CronJob, base_ms: int) -> int | None:
+        """Next run after ``base_ms``, with jitter for recurring jobs."""
+        try:
+            next_ms = _compute_next_run(job.schedule, base_ms)
+        except ScheduleError as e:
+            # Stored before validation existed, or the tz database changed
+            logger.error(f"Cron: job '{job.name}' ({job.id}) has an invalid schedule: {e}")
+            job.state.last_status = "error"
+            job.state.last_error = str(e)
+            return None
+        if next_ms is not None and self.jitter_ms and job.schedule.kind != "at":
+            next_ms += random.randint(0, self.jitter_ms)
+        return next_ms
+
+    def _rebuild_queue(self) -> None:
+        self._queue.clear()
+        for job in self._store.jobs if self._store else []:
+            self._schedule(job)
+
+    def _schedule(self, job: CronJob) -> None:
+        """Put a job in (or take it out of) the due queue to match its state."""
+        if job.enabled and job.state.next_run_at_ms and job.id not in self._active:
+            self._queue.push(job.id, job.state.next_run_at_ms)
+        else:
+            self._queue.remove(job.id)
+
+    def _get_job(self, job_id: str) -> CronJob | None:
+        return self._jobs.get(job_id)
     
     def _get_next_wake_ms(self) -> int | None:
         """Get the earliest next run time across all jobs."""
-        if not self._store:
-            return None
-        times = [j.state.next_run_at_ms for j in self._store.jobs 
-                 if j.enabled and j.state.next_run_at_ms]
-        return min(times) if times else None
+        head = self._queue.peek()
+        return head[0] if head else None
     
     def _arm_timer(self) -> None:
         """Schedule the next timer tick."""
@@ -203,54 +178,100 @@ class CronService:
         self._timer_task = asyncio.create_task(tick())
     
     async def _on_timer(self) -> None:
-        """Handle timer tick - run due jobs."""
+        """Handle timer tick - start every due job without waiting for it."""
         if not self._store:
             return
         
-        now = _now_ms()
-        due_jobs = [
-            j for j in self._store.jobs
-            if j.enabled and j.state.next_run_at_ms and now >= j.state.next_run_at_ms
-        ]
+        for scheduled_ms, job_id in self._queue.pop_due(_now_ms()):
+            job = self._get_job(job_id)
+            if not job or not job.enabled or job_id in self._active:
+                continue
+            self._active[job_id] = asyncio.create_task(self._run_scheduled(job, scheduled_ms))
         
-        for job in due_jobs:
-            await self._execute_job(job)
-        
-        self._save_store()
         self._arm_timer()
+
+    async def _run_scheduled(self, job: CronJob, scheduled_ms: int) -> None:
+        """Run one due job under the concurrency limit, applying the misfire policy."""
+        try:
+            async with self._slots or contextlib.nullcontext():
+                late_ms = _now_ms() - scheduled_ms
+                if late_ms > self.misfire_grace_ms and self.misfire_policy == "skip":
+                    logger.warning(f"Cron: skipping job '{job.name}' ({job.id}), {late_ms // 1000}s late")
+                    job.state.last_status = "skipped"
+                    self._advance(job, scheduled_ms)
+                else:
+                    if late_ms > self.misfire_grace_ms:
+                        logger.info(f"Cron: job '{job.name}' ({job.id}) starting {late_ms // 1000}s late")
+                    await self._execute_job(job, scheduled_ms)
+        finally:
+            self._active.pop(job.id, None)
+            if self._get_job(job.id):
+                self._schedule(job)
+            self._persist(job)
+            self._arm_timer()
     
-    async def _execute_job(self, job: CronJob) -> None:
+    async def _execute_job(self, job: CronJob, scheduled_ms: int | None = None) -> None:
         """Execute a single job."""
         start_ms = _now_ms()
         logger.info(f"Cron: executing job '{job.name}' ({job.id})")
         
-        try:
-            response = None
-            if self.on_job:
-                response = await self.on_job(job)
-            
-            job.state.last_status = "ok"
-            job.state.last_error = None
-            logger.info(f"Cron: job '{job.name}' completed")
-            
-        except Exception as e:
-            job.state.last_status = "error"
-            job.state.last_error = str(e)
-            logger.error(f"Cron: job '{job.name}' failed: {e}")
+        with track_usage() as usage:
+            try:
+                response = None
+                if self.on_job:
+                    if self.job_timeout_s and self.job_timeout_s > 0:
+                        response = await asyncio.wait_for(self.on_job(job), self.job_timeout_s)
+                    else:
+                        response = await self.on_job(job)
+                
+                job.state.last_status = "ok"
+                job.state.last_error = None
+                logger.info(f"Cron: job '{job.name}' completed")
+                
+            except asyncio.TimeoutError:
+                job.state.last_status = "error"
+                job.state.last_error = f"timed out after {self.job_timeout_s}s"
+                logger.error(f"Cron: job '{job.name}' timed out after {self.job_timeout_s}s")
+            except Exception as e:
+                job.state.last_status = "error"
+                job.state.last_error = str(e)
+                logger.error(f"Cron: job '{job.name}' failed: {e}")
         
         job.state.last_run_at_ms = start_ms
+        self._backend.record_run(CronRun(
+            job_id=job.id,
+            started_at_ms=start_ms,
+            duration_ms=_now_ms() - start_ms,
+            status=job.state.last_status,
+            error=job.state.last_error,
+            tokens=usage.total_tokens or None,
+        ))
+        self._advance(job, scheduled_ms)
+
+    def _advance(self, job: CronJob, scheduled_ms: int | None) -> None:
+        """Move a job past the run that just happened (or was skipped)."""
         job.updated_at_ms = _now_ms()
         
         # Handle one-shot jobs
         if job.schedule.kind == "at":
             if job.delete_after_run:
-                self._store.jobs = [j for j in self._store.jobs if j.id != job.id]
+                self._drop(job.id)
             else:
                 job.enabled = False
                 job.state.next_run_at_ms = None
         else:
-            # Compute next run
-            job.state.next_run_at_ms = _compute_next_run(job.schedule, _now_ms())
+            # run_late replays from the missed slot; otherwise continue from now
+            base = scheduled_ms if scheduled_ms and self.misfire_policy == "run_late" else _now_ms()
+            job.state.next_run_at_ms = self._next_run(job, base)
+    
+    def _drop(self, job_id: str) -> bool:
+        """Remove a job from memory and the due queue; True if it existed."""
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        self._store.jobs.remove(job)
+        self._queue.remove(job_id)
+        return True
     
     # ========== Public API ==========
     
@@ -270,9 +291,15 @@ class CronService:
         to: str | None = None,
         delete_after_run: bool = False,
     ) -> CronJob:
-        """Add a new job."""
-        store = self._load_store()
+        """Add a new job.
+
+        Raises:
+            ValueError: if the schedule is invalid or will never fire.
+        """
         now = _now_ms()
+        if compile_schedule(schedule).next_after(now) is None:
+            raise ScheduleError("scheduled time is in the past")
+        store = self._load_store()
         
         job = CronJob(
             id=str(uuid.uuid4())[:8],
@@ -286,14 +313,17 @@ class CronService:
                 channel=channel,
                 to=to,
             ),
-            state=CronJobState(next_run_at_ms=_compute_next_run(schedule, now)),
+            state=CronJobState(),
             created_at_ms=now,
             updated_at_ms=now,
             delete_after_run=delete_after_run,
         )
         
+        job.state.next_run_at_ms = self._next_run(job, now)
         store.jobs.append(job)
-        self._save_store()
+        self._jobs[job.id] = job
+        self._schedule(job)
+        self._persist(job)
         self._arm_timer()
         
         logger.info(f"Cron: added job '{name}' ({job.id})")
@@ -301,13 +331,11 @@ class CronService:
     
     def remove_job(self, job_id: str) -> bool:
         """Remove a job by ID."""
-        store = self._load_store()
-        before = len(store.jobs)
-        store.jobs = [j for j in store.jobs if j.id != job_id]
-        removed = len(store.jobs) < before
+        self._load_store()
+        removed = self._drop(job_id)
         
         if removed:
-            self._save_store()
+            self._backend.delete_job(job_id)
             self._arm_timer()
             logger.info(f"Cron: removed job {job_id}")
         
@@ -315,33 +343,38 @@ class CronService:
     
     def enable_job(self, job_id: str, enabled: bool = True) -> CronJob | None:
         """Enable or disable a job."""
-        store = self._load_store()
-        for job in store.jobs:
-            if job.id == job_id:
-                job.enabled = enabled
-                job.updated_at_ms = _now_ms()
-                if enabled:
-                    job.state.next_run_at_ms = _compute_next_run(job.schedule, _now_ms())
-                else:
-                    job.state.next_run_at_ms = None
-                self._save_store()
-                self._arm_timer()
-                return job
-        return None
+        self._load_store()
+        job = self._get_job(job_id)
+        if job is None:
+            return None
+        job.enabled = enabled
+        job.updated_at_ms = _now_ms()
+        if enabled:
+            job.state.next_run_at_ms = self._next_run(job, _now_ms())
+        else:
+            job.state.next_run_at_ms = None
+        self._schedule(job)
+        self._persist(job)
+        self._arm_timer()
+        return job
     
     async def run_job(self, job_id: str, force: bool = False) -> bool:
         """Manually run a job."""
-        store = self._load_store()
-        for job in store.jobs:
-            if job.id == job_id:
-                if not force and not job.enabled:
-                    return False
-                await self._execute_job(job)
-                self._save_store()
-                self._arm_timer()
-                return True
-        return False
+        self._load_store()
+        job = self._get_job(job_id)
+        if job is None or (not force and not job.enabled):
+            return False
+        await self._execute_job(job)
+        if self._get_job(job.id):
+            self._schedule(job)
+        self._persist(job)
+        self._arm_timer()
+        return True
     
+    def runs(self, job_id: str | None = None, limit: int = 20) -> list[CronRun]:
+        """Recent executions, newest first."""
+        return self._backend.runs(job_id, limit)
+
     def status(self) -> dict:
         """Get service status."""
         store = self._load_store()
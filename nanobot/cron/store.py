@@ -0,0 +1,273 @@
+"""Persistence backends for cron jobs."""
+
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+
+from nanobot.cron.types import CronJob, CronJobState, CronPayload, CronSchedule
+
+
+def job_to_dict(j: CronJob) -> dict:
+    """Serialize a job in the jobs.json (camelCase) format."""
+    return {
+        "id": j.id,
+        "name": j.name,
+        "enabled": j.enabled,
+        "schedule": {
+            "kind": j.schedule.kind,
+            "atMs": j.schedule.at_ms,
+            "everyMs": j.schedule.every_ms,
+            "expr": j.schedule.expr,
+            "tz": j.schedule.tz,
+        },
+        "payload": {
+            "kind": j.payload.kind,
+            "message": j.payload.message,
+            "deliver": j.payload.deliver,
+            "channel": j.payload.channel,
+            "to": j.payload.to,
+        },
+        "state": {
+            "nextRunAtMs": j.state.next_run_at_ms,
+            "lastRunAtMs": j.state.last_run_at_ms,
+            "lastStatus": j.state.last_status,
+            "lastError": j.state.last_error,
+        },
+        "createdAtMs": j.created_at_ms,
+        "updatedAtMs": j.updated_at_ms,
+        "deleteAfterRun": j.delete_after_run,
+    }
+
+
+def job_from_dict(j: dict) -> CronJob:
+    return CronJob(
+        id=j["id"],
+        name=j["name"],
+        enabled=j.get("enabled", True),
+        schedule=CronSchedule(
+            kind=j["schedule"]["kind"],
+            at_ms=j["schedule"].get("atMs"),
+            every_ms=j["schedule"].get("everyMs"),
+            expr=j["schedule"].get("expr"),
+            tz=j["schedule"].get("tz"),
+        ),
+        payload=CronPayload(
+            kind=j["payload"].get("kind", "agent_turn"),
+            message=j["payload"].get("message", ""),
+            deliver=j["payload"].get("deliver", False),
+            channel=j["payload"].get("channel"),
+            to=j["payload"].get("to"),
+        ),
+        state=CronJobState(
+            next_run_at_ms=j.get("state", {}).get("nextRunAtMs"),
+            last_run_at_ms=j.get("state", {}).get("lastRunAtMs"),
+            last_status=j.get("state", {}).get("lastStatus"),
+            last_error=j.get("state", {}).get("lastError"),
+        ),
+        created_at_ms=j.get("createdAtMs", 0),
+        updated_at_ms=j.get("updatedAtMs", 0),
+        delete_after_run=j.get("deleteAfterRun", False),
+    )
+
+
+@dataclass
+class CronRun:
+    """One recorded execution of a job."""
+    job_id: str
+    started_at_ms: int
+    duration_ms: int
+    status: str
+    error: str | None = None
+    tokens: int | None = None
+
+
+class JsonCronStore:
+    """
+    All jobs in a single JSON file (the original format).
+
+    Every change rewrites the file, but atomically: the new content goes to a
+    temporary file that is fsynced and renamed over the old one, so a crash
+    never leaves a truncated store. Run history is not kept.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._jobs: dict[str, CronJob] = {}
+
+    def load(self) -> list[CronJob]:
+        self._jobs = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+                for j in data.get("jobs", []):
+                    job = job_from_dict(j)
+                    self._jobs[job.id] = job
+            except Exception as e:
+                logger.warning(f"Failed to load cron store: {e}")
+        return list(self._jobs.values())
+
+    def save_job(self, job: CronJob) -> None:
+        self._jobs[job.id] = job
+        self._write()
+
+    def save_jobs(self, jobs: list[CronJob]) -> None:
+        self._jobs = {j.id: j for j in jobs}
+        self._write()
+
+    def delete_job(self, job_id: str) -> None:
+        if self._jobs.pop(job_id, None) is not None:
+            self._write()
+
+    def record_run(self, run: CronRun) -> None:
+        pass
+
+    def runs(self, job_id: str | None = None, limit: int = 20) -> list[CronRun]:
+        return []
+
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": 1, "jobs": [job_to_dict(j) for j in self._jobs.values()]}
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteCronStore:
+    """
+    Jobs and run history in SQLite.
+
+    Each job is a row holding its JSON document, so a tick that ran one job
+    writes one row. Every execution is appended to ``runs`` (duration,
+    status, error, tokens); history is compacted to the newest
+    ``keep_runs`` rows per job. A legacy ``jobs.json`` next to the database is
+    imported on first open.
+    """
+
+    def __init__(self, path: Path, keep_runs: int = 100):
+        self.path = path
+        self.keep_runs = keep_runs
+        self._db: sqlite3.Connection | None = None
+        self._inserts_since_compact = 0
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """Opened on first use, so listing commands that never touch cron stay cheap."""
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    updated_at_ms INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY,
+                    job_id TEXT NOT NULL,
+                    started_at_ms INTEGER NOT NULL,
+                    duration_ms INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    tokens INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS runs_job ON runs(job_id, started_at_ms);
+            """)
+            self._import_legacy()
+        return self._db
+
+    def _import_legacy(self) -> None:
+        legacy = self.path.with_suffix(".json")
+        if not legacy.exists() or self._db.execute("SELECT 1 FROM jobs LIMIT 1").fetchone():
+            return
+        jobs = JsonCronStore(legacy).load()
+        self.save_jobs(jobs)
+        legacy.rename(legacy.with_suffix(".json.migrated"))
+        logger.info(f"Cron: imported {len(jobs)} jobs from {legacy}")
+
+    def load(self) -> list[CronJob]:
+        rows = self.db.execute("SELECT data FROM jobs ORDER BY rowid").fetchall()
+        jobs = []
+        for (data,) in rows:
+            try:
+                jobs.append(job_from_dict(json.loads(data)))
+            except Exception as e:
+                logger.warning(f"Cron: skipping unreadable job: {e}")
+        return jobs
+
+    def save_job(self, job: CronJob) -> None:
+        self.db.execute(
+            "INSERT INTO jobs (id, data, updated_at_ms) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET data = excluded.data, updated_at_ms = excluded.updated_at_ms",
+            (job.id, json.dumps(job_to_dict(job)), job.updated_at_ms),
+        )
+        self.db.commit()
+
+    def save_jobs(self, jobs: list[CronJob]) -> None:
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO jobs (id, data, updated_at_ms) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data, updated_at_ms = excluded.updated_at_ms",
+                [(j.id, json.dumps(job_to_dict(j)), j.updated_at_ms) for j in jobs],
+            )
+
+    def delete_job(self, job_id: str) -> None:
+        with self.db:
+            self.db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self.db.execute("DELETE FROM runs WHERE job_id = ?", (job_id,))
+
+    def record_run(self, run: CronRun) -> None:
+        self.db.execute(
+            "INSERT INTO runs (job_id, started_at_ms, duration_ms, status, error, tokens) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (run.job_id, run.started_at_ms, run.duration_ms, run.status, run.error, run.tokens),
+        )
+        self.db.commit()
+        self._inserts_since_compact += 1
+        if self._inserts_since_compact >= self.keep_runs:
+            self.compact()
+
+    def runs(self, job_id: str | None = None, limit: int = 20) -> list[CronRun]:
+        """Most recent runs first, optionally for one job."""
+        sql = "SELECT job_id, started_at_ms, duration_ms, status, error, tokens FROM runs"
+        params: tuple = ()
+        if job_id:
+            sql += " WHERE job_id = ?"
+            params = (job_id,)
+        rows = self.db.execute(sql + " ORDER BY started_at_ms DESC, id DESC LIMIT ?", (*params, limit))
+        return [CronRun(*row) for row in rows.fetchall()]
+
+    def compact(self) -> int:
+        """Drop all but the newest ``keep_runs`` runs per job; returns rows removed."""
+        with self.db:
+            removed = self.db.execute(
+                "DELETE FROM runs WHERE id IN ("
+                " SELECT id FROM (SELECT id, ROW_NUMBER() OVER ("
+                "  PARTITION BY job_id ORDER BY started_at_ms DESC, id DESC) AS n FROM runs)"
+                " WHERE n > ?)",
+                (self.keep_runs,),
+            ).rowcount
+        self._inserts_since_compact = 0
+        return removed
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def open_cron_store(path: Path) -> JsonCronStore | SQLiteCronStore:
+    """SQLite for ``*.db`` paths, atomic JSON otherwise."""
+    if path.suffix == ".db":
+        return SQLiteCronStore(path)
+    return JsonCronStore(path)
@@ -1,6 +1,10 @@
 """Heartbeat service - periodic agent wake-up to check for tasks."""
 
 import asyncio
+import hashlib
+import re
+import time
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Callable, Coroutine
 
@@ -17,6 +21,12 @@ If nothing needs attention, reply with just: HEARTBEAT_OK"""
 # Token that indicates "nothing to do"
 HEARTBEAT_OK_TOKEN = "HEARTBEAT_OK"
 
+# Per-task timing annotations, e.g. "- [ ] Send report due: 2026-03-01 09:00"
+# or "- [ ] Check the inbox every: 2h"
+_DUE_RE = re.compile(r"\bdue:\s*(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2})")
+_EVERY_RE = re.compile(r"\bevery:\s*(\d+)\s*([mhd])\b")
+_UNIT_S = {"m": 60, "h": 3600, "d": 86400}
+
 
 def _is_heartbeat_empty(content: str | None) -> bool:
     """Check if HEARTBEAT.md has no actionable content."""
@@ -35,12 +45,38 @@ def _is_heartbeat_empty(content: str | None) -> bool:
     return True
 
 
+def _next_due(content: str, last_run: float) -> float | None:
+    """Earliest task due time (epoch seconds) after the last heartbeat run."""
+    due: list[float] = []
+    for line in content.split("\n"):
+        line = line.strip()
+        if not line.startswith(("-", "*")) or line.startswith(("- [x]", "* [x]")):
+            continue
+        for m in _DUE_RE.finditer(line):
+            try:
+                ts = datetime.fromisoformat(m.group(1)).timestamp()
+            except ValueError:
+                continue
+            if ts > last_run:
+                due.append(ts)
+        for m in _EVERY_RE.finditer(line):
+            due.append(last_run + int(m.group(1)) * _UNIT_S[m.group(2)])
+    return min(due) if due else None
+
+
 class HeartbeatService:
     """
     Periodic heartbeat service that wakes the agent to check for tasks.
     
     The agent reads HEARTBEAT.md from the workspace and executes any
     tasks listed there. If nothing needs attention, it replies HEARTBEAT_OK.
+
+    Besides the periodic ``interval_s`` tick, the service wakes when the file
+    changes (``mode="watch"`` uses watchfiles when installed, ``"poll"``
+    checks mtime/size every ``poll_interval_s``; ``"interval"`` only ticks)
+    and when a task's ``due:`` / ``every:`` time arrives. The agent runs only
+    if the content hash changed, a task came due, or the interval passed
+    without the current content having been answered with HEARTBEAT_OK.
     """
     
     def __init__(
@@ -49,13 +85,24 @@ class HeartbeatService:
         on_heartbeat: Callable[[str], Coroutine[Any, Any, str]] | None = None,
         interval_s: int = DEFAULT_HEARTBEAT_INTERVAL_S,
         enabled: bool = True,
+        mode: str = "watch",
+        poll_interval_s: float = 5.0,
+        debounce_s: float = 1.0,
     ):
         self.workspace = workspace
         self.on_heartbeat = on_heartbeat
         self.interval_s = interval_s
         self.enabled = enabled
+        self.mode = mode
+        self.poll_interval_s = poll_interval_s
+        self.debounce_s = debounce_s
         self._running = False
         self._task: asyncio.Task | None = None
+        self._watch_task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+        self._last_run = time.time()
+        self._handled_hash: str | None = None
+        self._handled_ok = False
     
     @property
     def heartbeat_file(self) -> Path:
@@ -77,21 +124,39 @@ class HeartbeatService:
             return
         
         self._running = True
+        self._last_run = time.time()
         self._task = asyncio.create_task(self._run_loop())
-        logger.info(f"Heartbeat started (every {self.interval_s}s)")
+        if self.mode != "interval":
+            self._watch_task = asyncio.create_task(self._watch_loop())
+        logger.info(f"Heartbeat started (every {self.interval_s}s, mode={self.mode})")
     
     def stop(self) -> None:
         """Stop the heartbeat service."""
         self._running = False
-        if self._task:
-            self._task.cancel()
-            self._task = None
+        for task in (self._task, self._watch_task):
+            if task:
+                task.cancel()
+        self._task = self._watch_task = None
+    
+    def _next_wake(self) -> float:
+        wake = self._last_run + self.interval_s
+        content = self._read_heartbeat_file()
+        if content and (due := _next_due(content, self._last_run)) is not None:
+            wake = min(wake, due)
+        return wake
     
     async def _run_loop(self) -> None:
         """Main heartbeat loop."""
         while self._running:
             try:
-                await asyncio.sleep(self.interval_s)
+                timeout = max(self._next_wake() - time.time(), 0)
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout)
+                    # Let editors finish writing before reading the file
+                    await asyncio.sleep(self.debounce_s)
+                except asyncio.TimeoutError:
+                    pass
+                self._changed.clear()
                 if self._running:
                     await self._tick()
             except asyncio.CancelledError:
@@ -99,32 +164,90 @@ class HeartbeatService:
             except Exception as e:
                 logger.error(f"Heartbeat error: {e}")
     
+    async def _watch_loop(self) -> None:
+        """Set ``_changed`` whenever HEARTBEAT.md is created, edited or removed."""
+        if self.mode == "watch":
+            try:
+                from watchfiles import awatch
+            except ImportError:
+                logger.info("Heartbeat: watchfiles not installed, polling HEARTBEAT.md instead")
+            else:
+                # Only the workspace root: a recursive watch would add an inotify
+                # watch for every directory under it
+                name = self.heartbeat_file.name
+                async for _ in awatch(
+                    self.workspace, watch_filter=lambda _, path: Path(path).name == name, recursive=False
+                ):
+                    self._changed.set()
+                return
+        
+        last = self._stat()
+        while self._running:
+            await asyncio.sleep(self.poll_interval_s)
+            current = self._stat()
+            if current != last:
+                last = current
+                self._changed.set()
+    
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            st = self.heartbeat_file.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
     async def _tick(self) -> None:
         """Execute a single heartbeat tick."""
         content = self._read_heartbeat_file()
+        now = time.time()
+        interval_passed = now - self._last_run >= self.interval_s
         
         # Skip if HEARTBEAT.md is empty or doesn't exist
         if _is_heartbeat_empty(content):
             logger.debug("Heartbeat: no tasks (HEARTBEAT.md empty)")
+            # Move the next wake forward, or the loop would tick without pause
+            if interval_passed:
+                self._last_run = now
+            return
+        
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        changed = digest != self._handled_hash
+        due = _next_due(content, self._last_run)
+        is_due = due is not None and due <= now
+        if not (changed or is_due or (interval_passed and not self._handled_ok)):
+            logger.debug("Heartbeat: HEARTBEAT.md unchanged since HEARTBEAT_OK, skipping")
+            if interval_passed:
+                self._last_run = now
             return
         
         logger.info("Heartbeat: checking for tasks...")
+        self._last_run = now
         
         if self.on_heartbeat:
             try:
-                response = await self.on_heartbeat(HEARTBEAT_PROMPT)
-                
-                # Check if agent said "nothing to do"
-                if HEARTBEAT_OK_TOKEN.replace("_", "") in response.upper().replace("_", ""):
-                    logger.info("Heartbeat: OK (no action needed)")
-                else:
-                    logger.info(f"Heartbeat: completed task")
-                    
+                await self._run_heartbeat()
             except Exception as e:
                 logger.error(f"Heartbeat execution failed: {e}")
     
+    async def _run_heartbeat(self) -> str:
+        self._last_run = time.time()
+        response = await self.on_heartbeat(HEARTBEAT_PROMPT)
+        
+        # Hash the file as the agent left it, so its own edits don't trigger another run
+        content = self._read_heartbeat_file() or ""
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        
+        # Check if agent said "nothing to do"
+        self._handled_ok = HEARTBEAT_OK_TOKEN.replace("_", "") in (response or "").upper().replace("_", "")
+        self._handled_hash = digest
+        if self._handled_ok:
+            logger.info("Heartbeat: OK (no action needed)")
+        else:
+            logger.info("Heartbeat: completed task")
+        return response
+    
     async def trigger_now(self) -> str | None:
         """Manually trigger a heartbeat."""
         if self.on_heartbeat:
-            return await self.on_heartbeat(HEARTBEAT_PROMPT)
+            return await self._run_heartbeat()
         return None
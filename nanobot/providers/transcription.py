@@ -1,65 +1,275 @@
-"""Voice transcription provider using Groq."""
+"""Voice transcription: Groq and local Whisper backends behind a shared queue."""
 
+import asyncio
+import hashlib
 import os
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Protocol
 
 import httpx
 from loguru import logger
 
+from nanobot.utils.helpers import ensure_dir
+
+if TYPE_CHECKING:
+    from nanobot.config.schema import TranscriptionConfig
+
+
+class TranscriptionBackend(Protocol):
+    """Turns an audio file into text ("" when it cannot)."""
+
+    name: str
+
+    async def transcribe(self, file_path: str | Path) -> str: ...
+
 
 class GroqTranscriptionProvider:
     """
     Voice transcription provider using Groq's Whisper API.
-    
+
     Groq offers extremely fast transcription with a generous free tier.
+    One HTTP client is reused for every request.
     """
-    
-    def __init__(self, api_key: str | None = None):
+
+    name = "groq"
+
+    def __init__(self, api_key: str | None = None, model: str = "whisper-large-v3"):
         self.api_key = api_key or os.environ.get("GROQ_API_KEY")
         self.api_url = "https://api.groq.com/openai/v1/audio/transcriptions"
-    
+        self.model = model
+        self._client: httpx.AsyncClient | None = None
+
     async def transcribe(self, file_path: str | Path) -> str:
         """
         Transcribe an audio file using Groq.
-        
+
         Args:
             file_path: Path to the audio file.
-            
+
         Returns:
             Transcribed text.
         """
         if not self.api_key:
             logger.warning("Groq API key not configured for transcription")
             return ""
-        
+
         path = Path(file_path)
         if not path.exists():
             logger.error(f"Audio file not found: {file_path}")
             return ""
-        
+
         try:
-            async with httpx.AsyncClient() as client:
-                with open(path, "rb") as f:
-                    files = {
-                        "file": (path.name, f),
-                        "model": (None, "whisper-large-v3"),
-                    }
-                    headers = {
-                        "Authorization": f"Bearer {self.api_key}",
-                    }
-                    
-                    response = await client.post(
-                        self.api_url,
-                        headers=headers,
-                        files=files,
-                        timeout=60.0
-                    )
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    return data.get("text", "")
-                    
+            if self._client is None:
+                self._client = httpx.AsyncClient(timeout=60.0)
+            with open(path, "rb") as f:
+                files = {
+                    "file": (path.name, f),
+                    "model": (None, self.model),
+                }
+                headers = {
+                    "Authorization": f"Bearer {self.api_key}",
+                }
+
+                response = await self._client.post(self.api_url, headers=headers, files=files)
+
+                response.raise_for_status()
+                data = response.json()
+                return data.get("text", "")
+
         except Exception as e:
             logger.error(f"Groq transcription error: {e}")
             return ""
+
+    async def close(self) -> None:
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+
+class LocalWhisperBackend:
+    """
+    Offline transcription on the CPU with faster-whisper (optional dependency).
+
+    The model is loaded on first use and kept; decoding runs in a thread so
+    the event loop stays responsive.
+    """
+
+    name = "local"
+
+    def __init__(self, model: str = "base", device: str = "cpu", compute_type: str = "int8"):
+        self.model_name = model
+        self.device = device
+        self.compute_type = compute_type
+        self._model = None
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import faster_whisper  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _transcribe_sync(self, path: str) -> str:
+        if self._model is None:
+            from faster_whisper import WhisperModel
+            self._model = WhisperModel(self.model_name, device=self.device, compute_type=self.compute_type)
+        segments, _ = self._model.transcribe(path, vad_filter=True)
+        return " ".join(seg.text.strip() for seg in segments).strip()
+
+    async def transcribe(self, file_path: str | Path) -> str:
+        path = Path(file_path)
+        if not path.exists():
+            logger.error(f"Audio file not found: {file_path}")
+            return ""
+        try:
+            return await asyncio.to_thread(self._transcribe_sync, str(path))
+        except Exception as e:
+            logger.error(f"Local transcription error: {e}")
+            return ""
+
+
+class TranscriptionService:
+    """
+    Shared transcription front end for all channels.
+
+    Requests go through a bounded queue served by ``workers`` tasks, so a
+    burst of voice notes cannot start unlimited uploads or local decodes.
+    Results are cached by a hash of the audio content (in memory and as text
+    files in ``cache_dir``); a forwarded voice note is transcribed once.
+    ``backends`` are tried in order until one returns text.
+    """
+
+    def __init__(
+        self,
+        backends: list[TranscriptionBackend],
+        cache_dir: Path | None = None,
+        workers: int = 2,
+        max_queue: int = 20,
+    ):
+        self.backends = backends
+        self.cache_dir = cache_dir
+        self.workers = max(workers, 1)
+        self.max_queue = max_queue
+        self._cache: dict[str, str] = {}
+        self._pending: dict[str, asyncio.Future[str]] = {}
+        self._queue: asyncio.Queue[tuple[str, Path]] | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def transcribe(self, file_path: str | Path) -> str:
+        """Text of an audio file, or "" if no backend could transcribe it or the queue is full."""
+        path = Path(file_path)
+        try:
+            digest = await asyncio.to_thread(self._digest, path)
+        except OSError as e:
+            logger.error(f"Audio file not readable: {e}")
+            return ""
+        if (text := self._cached(digest)) is not None:
+            return text
+        if digest in self._pending:
+            return await asyncio.shield(self._pending[digest])
+
+        self._start()
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((digest, path))
+        except asyncio.QueueFull:
+            logger.warning(f"Transcription queue full, skipping {path.name}")
+            return ""
+        self._pending[digest] = future
+        return await asyncio.shield(future)
+
+    @staticmethod
+    def _digest(path: Path) -> str:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+        return h.hexdigest()[:32]
+
+    def _cached(self, digest: str) -> str | None:
+        if digest in self._cache:
+            return self._cache[digest]
+        if self.cache_dir:
+            try:
+                text = (self.cache_dir / f"{digest}.txt").read_text(encoding="utf-8")
+            except OSError:
+                return None
+            self._cache[digest] = text
+            return text
+        return None
+
+    def _store(self, digest: str, text: str) -> None:
+        self._cache[digest] = text
+        if self.cache_dir:
+            try:
+                (ensure_dir(self.cache_dir) / f"{digest}.txt").write_text(text, encoding="utf-8")
+            except OSError as e:
+                logger.debug(f"Transcription cache write failed: {e}")
+
+    def _start(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def _worker(self) -> None:
+        while True:
+            digest, path = await self._queue.get()
+            text = ""
+            try:
+                for backend in self.backends:
+                    text = await backend.transcribe(path)
+                    if text:
+                        logger.debug(f"Transcribed {path.name} with {backend.name}")
+                        break
+                if text:
+                    self._store(digest, text)
+            except Exception as e:
+                logger.error(f"Transcription failed: {e}")
+            finally:
+                future = self._pending.pop(digest, None)
+                if future and not future.done():
+                    future.set_result(text)
+                self._queue.task_done()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        for future in self._pending.values():
+            if not future.done():
+                future.set_result("")
+        self._pending.clear()
+        for backend in self.backends:
+            if hasattr(backend, "close"):
+                await backend.close()
+
+
+def make_transcription_service(
+    config: "TranscriptionConfig | None", groq_api_key: str = "", cache_dir: Path | None = None
+) -> TranscriptionService | None:
+    """
+    Build the service from config; None when disabled or no backend is usable.
+
+    ``backend`` "auto" uses Groq when a key is configured and the local model
+    when faster-whisper is installed (Groq first, local as fallback).
+    """
+    from nanobot.config.schema import TranscriptionConfig
+    config = config or TranscriptionConfig()
+    if not config.enabled:
+        return None
+    groq_key = groq_api_key or os.environ.get("GROQ_API_KEY", "")
+    backends: list[TranscriptionBackend] = []
+    if config.backend in ("auto", "groq") and groq_key:
+        backends.append(GroqTranscriptionProvider(api_key=groq_key))
+    if config.backend in ("auto", "local") and LocalWhisperBackend.available():
+        backends.append(LocalWhisperBackend(config.local_model, compute_type=config.compute_type))
+    if config.backend == "local" and not backends:
+        logger.warning("Local transcription needs faster-whisper: pip install nanobot-ai[voice]")
+    if not backends:
+        return None
+    return TranscriptionService(
+        backends, cache_dir=cache_dir, workers=config.workers, max_queue=config.max_queue
+    )
@@ -0,0 +1,46 @@
+"""Content-addressed storage for large session payloads."""
+
+import hashlib
+import os
+from pathlib import Path
+
+from nanobot.utils.helpers import ensure_dir
+
+
+class BlobStore:
+    """
+    Texts stored once per content hash under ``root/<2 hex>/<ref>``.
+
+    Session files keep only a short preview and the ref of a large tool
+    result, so they stay small and identical outputs are stored once.
+    """
+
+    REF_LEN = 16
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    @classmethod
+    def ref_for(cls, text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()[:cls.REF_LEN]
+
+    def _path(self, ref: str) -> Path:
+        return self.root / ref[:2] / ref
+
+    def put(self, text: str) -> str:
+        ref = self.ref_for(text)
+        path = self._path(ref)
+        if not path.exists():
+            ensure_dir(path.parent)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, path)
+        return ref
+
+    def get(self, ref: str) -> str | None:
+        if len(ref) != self.REF_LEN or not all(c in "0123456789abcdef" for c in ref):
+            return None
+        try:
+            return self._path(ref).read_text(encoding="utf-8")
+        except OSError:
+            return None
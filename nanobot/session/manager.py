@@ -43,12 +43,19 @@ class Session:
     
     def get_history(self, max_messages: int = 500) -> list[dict[str, Any]]:
         """Get recent messages in LLM format, preserving tool metadata."""
+        recent = self.messages[-max_messages:]
+        # A window starting mid tool round would begin with orphaned tool results
+        start = 0
+        while start < len(recent) and recent[start]["role"] == "tool":
+            start += 1
         out: list[dict[str, Any]] = []
-        for m in self.messages[-max_messages:]:
+        for m in recent[start:]:
             entry: dict[str, Any] = {"role": m["role"], "content": m.get("content", "")}
             for k in ("tool_calls", "tool_call_id", "name"):
                 if k in m:
                     entry[k] = m[k]
+            if "tool_calls" in entry and not entry["content"]:
+                entry["content"] = None
             out.append(entry)
         return out
     
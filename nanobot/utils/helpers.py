@@ -37,6 +37,11 @@ def get_sessions_path() -> Path:
     return ensure_dir(get_data_path() / "sessions")
 
 
+def get_media_path() -> Path:
+    """Get the directory where channels store downloaded media."""
+    return ensure_dir(get_data_path() / "media")
+
+
 def get_skills_path(workspace: Path | None = None) -> Path:
     """Get the skills directory within the workspace."""
     ws = workspace or get_workspace_path()
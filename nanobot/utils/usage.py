@@ -0,0 +1,39 @@
+"""Per-task token usage accounting."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+
+@dataclass
+class TokenUsage:
+    """Token counts accumulated over several LLM calls."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+    def add(self, usage: dict[str, int]) -> None:
+        self.prompt_tokens += usage.get("prompt_tokens", 0) or 0
+        self.completion_tokens += usage.get("completion_tokens", 0) or 0
+        self.total_tokens += usage.get("total_tokens", 0) or 0
+
+
+_tracker: ContextVar[TokenUsage | None] = ContextVar("usage_tracker", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[TokenUsage]:
+    """Collect the usage of every LLM call made by the current task (see ``record_usage``)."""
+    tracker = TokenUsage()
+    token = _tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _tracker.reset(token)
+
+
+def record_usage(usage: dict[str, int]) -> None:
+    """Add a response's usage to the active ``track_usage`` block, if any."""
+    if usage and (tracker := _tracker.get()) is not None:
+        tracker.add(usage)
@@ -0,0 +1,81 @@
+"""Micro-benchmark for the tool parameter validation path.
+
+Run with: python tests/bench_tool_validation.py
+"""
+
+import timeit
+from typing import Any
+
+from test_tool_validation import SampleTool
+
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.registry import ToolRegistry
+
+PARAMS = {"query": "hello", "count": 3, "mode": "fast", "meta": {"tag": "x", "flags": ["a", "b"]}}
+N = 20000
+
+
+def baseline_validate(val: Any, schema: dict[str, Any], path: str) -> list[str]:
+    """The schema walker validate_params used before validators were precompiled."""
+    t, label = schema.get("type"), path or "parameter"
+    if t in Tool._TYPE_MAP and not isinstance(val, Tool._TYPE_MAP[t]):
+        return [f"{label} should be {t}"]
+
+    errors = []
+    if "enum" in schema and val not in schema["enum"]:
+        errors.append(f"{label} must be one of {schema['enum']}")
+    if t in ("integer", "number"):
+        if "minimum" in schema and val < schema["minimum"]:
+            errors.append(f"{label} must be >= {schema['minimum']}")
+        if "maximum" in schema and val > schema["maximum"]:
+            errors.append(f"{label} must be <= {schema['maximum']}")
+    if t == "string":
+        if "minLength" in schema and len(val) < schema["minLength"]:
+            errors.append(f"{label} must be at least {schema['minLength']} chars")
+        if "maxLength" in schema and len(val) > schema["maxLength"]:
+            errors.append(f"{label} must be at most {schema['maxLength']} chars")
+    if t == "object":
+        props = schema.get("properties", {})
+        for k in schema.get("required", []):
+            if k not in val:
+                errors.append(f"missing required {path + '.' + k if path else k}")
+        for k, v in val.items():
+            if k in props:
+                errors.extend(baseline_validate(v, props[k], path + '.' + k if path else k))
+    if t == "array" and "items" in schema:
+        for i, item in enumerate(val):
+            errors.extend(baseline_validate(item, schema["items"], f"{path}[{i}]" if path else f"[{i}]"))
+    return errors
+
+
+class NamedSampleTool(SampleTool):
+    def __init__(self, name: str):
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+
+def main() -> None:
+    tool = SampleTool()
+    schema = {**tool.parameters, "type": "object"}
+    assert baseline_validate(PARAMS, schema, "") == tool.validate_params(PARAMS)
+
+    cold = timeit.timeit(lambda: baseline_validate(PARAMS, schema, ""), number=N)
+    warm = timeit.timeit(lambda: tool.validate_params(PARAMS), number=N)
+
+    reg = ToolRegistry()
+    for i in range(50):
+        reg.register(NamedSampleTool(f"sample_{i}"))
+    defs_cold = timeit.timeit(lambda: [t.to_schema() for t in reg._tools.values()], number=N // 20)
+    defs_warm = timeit.timeit(reg.get_definitions, number=N // 20)
+
+    print(f"validate (baseline walker):    {cold / N * 1e6:8.2f} us/call")
+    print(f"validate (precompiled):        {warm / N * 1e6:8.2f} us/call")
+    print(f"definitions, 50 tools (build): {defs_cold / (N // 20) * 1e6:8.2f} us/call")
+    print(f"definitions, 50 tools (cache): {defs_warm / (N // 20) * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
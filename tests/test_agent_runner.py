@@ -0,0 +1,126 @@
+from typing import Any
+
+from nanobot.agent.runner import AgentHooks, AgentRunner, RunState, TurnLimits
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class EchoTool(Tool):
+    @property
+    def name(self) -> str:
+        return "echo"
+
+    @property
+    def description(self) -> str:
+        return "Echo text"
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {"text": {"type": "string"}}, "required": ["text"]}
+
+    async def execute(self, text: str, **kwargs: Any) -> str:
+        return text
+
+
+class ScriptedProvider(LLMProvider):
+    def __init__(self, responses: list[LLMResponse]):
+        super().__init__()
+        self.responses = responses
+        self.seen: list[list[dict]] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        self.seen.append(list(messages))
+        return self.responses.pop(0)
+
+    def get_default_model(self) -> str:
+        return "fake"
+
+
+def _call(i: int) -> LLMResponse:
+    return LLMResponse(
+        content=None,
+        tool_calls=[ToolCallRequest(id=str(i), name="echo", arguments={"text": f"hi {i}"})],
+        usage={"total_tokens": 100},
+    )
+
+
+def _runner(provider, **kwargs) -> AgentRunner:
+    tools = ToolRegistry()
+    tools.register(EchoTool())
+    return AgentRunner(provider, tools, model="fake", **kwargs)
+
+
+async def test_runner_executes_tools_and_returns_final_answer() -> None:
+    provider = ScriptedProvider([_call(1), LLMResponse(content="done")])
+    messages = [{"role": "user", "content": "go"}]
+
+    result = await _runner(provider, reflect_prompt="Reflect.").run(messages)
+
+    assert (result.content, result.stop_reason, result.iterations) == ("done", "final", 2)
+    assert result.tools_used == ["echo"]
+    assert [m["role"] for m in messages] == ["user", "assistant", "tool", "user"]
+    assert messages[2]["content"] == "hi 1" and messages[3]["content"] == "Reflect."
+
+
+async def test_runner_hooks_rewrite_results_and_enforce_budget() -> None:
+    class Hooks(AgentHooks):
+        async def after_tool(self, state: RunState, call, result: str) -> str:
+            return result.upper()
+
+        def check_budget(self, state: RunState) -> str | None:
+            return "over budget" if state.usage.total_tokens >= 200 else None
+
+    provider = ScriptedProvider([_call(1), _call(2), _call(3)])
+    result = await _runner(provider).run([{"role": "user", "content": "go"}], Hooks())
+
+    # The final-answer request still came back with tool calls, so the fallback text is used
+    assert result.stop_reason == "budget" and result.content == "I had to stop before finishing: over budget"
+    assert provider.seen[1][-1]["content"] == "HI 1"
+    assert provider.seen[2][-1]["content"].startswith("over budget Do not call any more tools")
+
+
+async def test_runner_asks_for_final_answer_at_max_iterations() -> None:
+    provider = ScriptedProvider([_call(1), _call(2), LLMResponse(content="partial summary")])
+    result = await _runner(provider, max_iterations=2).run([{"role": "user", "content": "go"}])
+    assert (result.content, result.stop_reason) == ("partial summary", "max_iterations")
+
+
+async def test_runner_stops_repeated_identical_calls() -> None:
+    repeat = LLMResponse(content=None, tool_calls=[ToolCallRequest(id="x", name="echo", arguments={"text": "same"})])
+    provider = ScriptedProvider([repeat, repeat, repeat, LLMResponse(content="giving up")])
+    runner = _runner(provider, limits=TurnLimits(max_repeated_calls=2))
+
+    result = await runner.run([{"role": "user", "content": "go"}])
+
+    assert (result.content, result.stop_reason, result.tools_used) == ("giving up", "repeated", ["echo", "echo"])
+
+
+async def test_runner_allows_repeated_calls_whose_result_changes() -> None:
+    class CounterTool(EchoTool):
+        runs = 0
+
+        async def execute(self, text: str, **kwargs: Any) -> str:
+            CounterTool.runs += 1
+            return "passed" if CounterTool.runs >= 4 else f"{CounterTool.runs} failing"
+
+    tools = ToolRegistry()
+    tools.register(CounterTool())
+    repeat = LLMResponse(content=None, tool_calls=[ToolCallRequest(id="x", name="echo", arguments={"text": "pytest"})])
+    provider = ScriptedProvider([repeat] * 5 + [LLMResponse(content="done")])
+    runner = AgentRunner(provider, tools, model="fake", limits=TurnLimits(max_repeated_calls=2))
+
+    result = await runner.run([{"role": "user", "content": "go"}])
+
+    # 1..3 failing, 4 passed, 5 passed again: the 6th identical call would be stopped
+    assert (result.content, result.stop_reason, len(result.tools_used)) == ("done", "final", 5)
+
+
+async def test_adaptive_reflection_only_after_errors() -> None:
+    bad = LLMResponse(content=None, tool_calls=[ToolCallRequest(id="b", name="missing", arguments={})])
+    provider = ScriptedProvider([_call(1), bad, LLMResponse(content="done")])
+    messages = [{"role": "user", "content": "go"}]
+
+    await _runner(provider, reflect_prompt="Reflect.", reflect_mode="adaptive").run(messages)
+
+    assert [m.get("content") for m in messages if m["role"] == "user"] == ["go", "Reflect."]
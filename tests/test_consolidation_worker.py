@@ -0,0 +1,128 @@
+import asyncio
+
+from nanobot.agent.consolidation import ConsolidationJob, ConsolidationWorker
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.session.manager import Session
+
+
+def _session(key: str, count: int) -> Session:
+    session = Session(key=key)
+    for i in range(count):
+        session.add_message("user", f"msg{i}")
+    return session
+
+
+class Recorder:
+    def __init__(self, fail_times: int = 0, delay: float = 0.0):
+        self.batches: list[list[tuple[str, int, int]]] = []
+        self.fail_times = fail_times
+        self.delay = delay
+
+    async def __call__(self, jobs: list[ConsolidationJob]) -> None:
+        await asyncio.sleep(self.delay)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("provider down")
+        self.batches.append([
+            (j.key, j.end - len(j.messages), j.end) for j in jobs
+        ])
+
+
+async def test_burst_collapses_into_one_batch() -> None:
+    rec = Recorder()
+    worker = ConsolidationWorker(rec, keep_count=5, debounce_s=0.05)
+    a, b = _session("a", 20), _session("b", 12)
+    for _ in range(5):
+        worker.enqueue(a)
+        worker.enqueue(b)
+    await worker.flush(timeout=2)
+
+    assert rec.batches == [[("a", 0, 15), ("b", 0, 7)]]
+    assert (a.last_consolidated, b.last_consolidated) == (15, 7)
+
+
+async def test_single_flight_requeues_session_updated_mid_run() -> None:
+    rec = Recorder(delay=0.1)
+    worker = ConsolidationWorker(rec, keep_count=5, debounce_s=0)
+    session = _session("a", 20)
+    worker.enqueue(session)
+    await asyncio.sleep(0.05)  # first run is in flight
+    for i in range(20, 30):
+        session.add_message("user", f"msg{i}")
+    worker.enqueue(session)
+    worker.enqueue(session)
+    await worker.flush(timeout=2)
+
+    assert rec.batches == [[("a", 0, 15)], [("a", 15, 25)]]
+    assert session.last_consolidated == 25
+
+
+async def test_failed_batch_is_retried() -> None:
+    rec = Recorder(fail_times=2)
+    worker = ConsolidationWorker(rec, keep_count=5, debounce_s=0, retry_base_s=0.01)
+    session = _session("a", 20)
+    worker.enqueue(session)
+    await worker.flush(timeout=2)
+
+    assert rec.batches == [[("a", 0, 15)]]
+    assert session.last_consolidated == 15
+
+
+async def test_session_cleared_mid_run_is_not_advanced() -> None:
+    rec = Recorder(delay=0.05)
+    worker = ConsolidationWorker(rec, keep_count=5, debounce_s=0)
+    session = _session("a", 20)
+    worker.enqueue(session)
+    await asyncio.sleep(0.01)
+    session.clear()
+    await worker.flush(timeout=2)
+    assert session.last_consolidated == 0
+
+
+class MemoryProvider(LLMProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        if tools is None and "memory consolidation" in messages[0]["content"]:
+            self.calls += 1
+            return LLMResponse(content=(
+                '{"history_entries": ["[2026-01-01 10:00] First chat.", "[2026-01-01 11:00] Second chat."],'
+                ' "memory_update": "User likes tea."}'
+            ))
+        return LLMResponse(content="ok")
+
+    def get_default_model(self) -> str:
+        return "fake"
+
+
+async def test_agent_loop_batches_sessions_into_one_llm_call(tmp_path) -> None:
+    provider = MemoryProvider()
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, memory_window=10)
+    for key in ("cli:one", "cli:two"):
+        session = loop.sessions.get_or_create(key)
+        for i in range(12):
+            session.add_message("user", f"{key} msg{i}")
+        loop.sessions.save(session)
+        await loop.process_direct("hello", session_key=key)
+    await loop.consolidator.flush(timeout=5)
+
+    assert provider.calls == 1
+    history = (tmp_path / "memory" / "HISTORY.md").read_text()
+    assert "First chat." in history and "Second chat." in history
+    assert (tmp_path / "memory" / "MEMORY.md").read_text() == "User likes tea."
+    assert loop.sessions.get_or_create("cli:one").last_consolidated == 9
+
+
+async def test_shutdown_flushes_debounced_archive(tmp_path) -> None:
+    loop = AgentLoop(bus=MessageBus(), provider=MemoryProvider(), workspace=tmp_path)
+    rec = Recorder()
+    loop.consolidator = ConsolidationWorker(rec, keep_count=5, debounce_s=60)
+    loop.consolidator.enqueue_archive("cli:direct", [{"role": "user", "content": "bye"}])
+
+    await loop.flush_consolidation(timeout=2)
+    assert rec.batches == [[("cli:direct", 0, 1)]]
+    assert loop.consolidator._task is None
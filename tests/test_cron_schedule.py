@@ -0,0 +1,59 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from nanobot.cron.schedule import ScheduleError, compile_schedule
+from nanobot.cron.service import CronService
+from nanobot.cron.types import CronJob, CronSchedule
+
+
+def _ms(dt: datetime) -> int:
+    return int(dt.timestamp() * 1000)
+
+
+def test_compiled_cron_next_n_respects_timezone_and_dst() -> None:
+    tz = ZoneInfo("America/New_York")
+    compiled = compile_schedule(CronSchedule(kind="cron", expr="30 2 * * *", tz="America/New_York"))
+    # 2026-03-08 is the spring-forward day: 02:30 does not exist locally
+    fires = compiled.next_n(_ms(datetime(2026, 3, 6, 12, 0, tzinfo=tz)), 4)
+    days = [datetime.fromtimestamp(ms / 1000, tz).day for ms in fires]
+    assert fires == sorted(fires) and len(set(fires)) == 4
+    assert days[0] == 7 and days[-1] == 10
+    assert compiled.next_after(_ms(datetime(2026, 3, 6, 12, 0, tzinfo=tz))) == fires[0]
+
+
+def test_compile_is_cached_and_every_is_arithmetic() -> None:
+    sched = CronSchedule(kind="every", every_ms=1000)
+    compiled = compile_schedule(sched)
+    assert compile_schedule(CronSchedule(kind="every", every_ms=1000)) is compiled
+    assert compiled.next_n(5000, 3) == [6000, 7000, 8000]
+
+
+@pytest.mark.parametrize("schedule", [
+    CronSchedule(kind="cron", expr="61 * * * *"),
+    CronSchedule(kind="cron", expr="0 9 * * *", tz="Mars/Olympus"),
+    CronSchedule(kind="every", every_ms=0),
+])
+def test_invalid_schedules_raise(schedule) -> None:
+    with pytest.raises(ScheduleError):
+        compile_schedule(schedule)
+
+
+def test_add_job_rejects_invalid_and_past_schedules(tmp_path) -> None:
+    service = CronService(tmp_path / "jobs.json")
+    with pytest.raises(ValueError, match="invalid cron expression"):
+        service.add_job("bad", CronSchedule(kind="cron", expr="not a cron"), "hi")
+    with pytest.raises(ValueError, match="past"):
+        service.add_job("late", CronSchedule(kind="at", at_ms=1000), "hi")
+    assert service.list_jobs(include_disabled=True) == []
+
+
+def test_stored_invalid_job_is_flagged_not_scheduled(tmp_path) -> None:
+    service = CronService(tmp_path / "jobs.json")
+    store = service._load_store()
+    job = CronJob(id="x", name="legacy", schedule=CronSchedule(kind="cron", expr="0 9 * * *", tz="Nowhere/City"))
+    store.jobs.append(job)
+    service._recompute_next_runs()
+    assert job.state.next_run_at_ms is None
+    assert job.state.last_status == "error" and "Nowhere/City" in job.state.last_error
@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+from nanobot.agent.tools.message import MessageTool
+from nanobot.cron.scheduler import DueQueue
+from nanobot.cron.service import CronService
+from nanobot.cron.types import CronSchedule
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def test_due_queue_orders_and_reschedules() -> None:
+    q = DueQueue()
+    q.push("a", 300)
+    q.push("b", 100)
+    q.push("c", 200)
+    q.push("b", 400)  # reschedule
+    assert q.remove("c")
+    assert q.peek() == (300, "a")
+    assert q.pop_due(350) == [(300, "a")]
+    assert q.pop_due(1000) == [(400, "b")]
+    assert len(q) == 0 and q.peek() is None
+
+
+def test_due_queue_compacts_stale_entries() -> None:
+    q = DueQueue()
+    for i in range(500):
+        q.push("job", i)
+    assert len(q) == 1
+    assert len(q._heap) < 200
+
+
+async def test_due_jobs_run_concurrently_with_limit(tmp_path) -> None:
+    running, peak, order = 0, 0, []
+
+    async def on_job(job):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.2)
+        running -= 1
+        order.append(job.name)
+
+    service = CronService(tmp_path / "jobs.json", on_job=on_job, max_concurrent=3)
+    for i in range(6):
+        service.add_job(f"job{i}", CronSchedule(kind="every", every_ms=3_600_000), "hi")
+    for job in service.list_jobs():
+        job.state.next_run_at_ms = _now_ms() - 10
+    start = time.monotonic()
+    await service.start()
+    while len(order) < 6:
+        await asyncio.sleep(0.02)
+    service.stop()
+
+    assert peak == 3
+    assert time.monotonic() - start < 1.0  # two waves of 0.2s, not six
+    assert all(j.state.next_run_at_ms > _now_ms() for j in service.list_jobs())
+
+
+async def test_job_timeout_marks_error(tmp_path) -> None:
+    async def on_job(job):
+        await asyncio.sleep(5)
+
+    service = CronService(tmp_path / "jobs.json", on_job=on_job, job_timeout_s=0.1)
+    job = service.add_job("slow", CronSchedule(kind="every", every_ms=60_000), "hi")
+    assert await service.run_job(job.id)
+    assert job.state.last_status == "error"
+    assert "timed out" in job.state.last_error
+
+
+async def test_misfire_policies(tmp_path) -> None:
+    every = 60_000
+    missed_slot = _now_ms() - 10 * every
+
+    async def run_with(policy: str):
+        ran = []
+
+        async def on_job(job):
+            ran.append(job.id)
+
+        service = CronService(
+            tmp_path / f"{policy}.json", on_job=on_job, misfire_policy=policy, misfire_grace_s=1
+        )
+        job = service.add_job("late", CronSchedule(kind="every", every_ms=every), "hi")
+        job.state.next_run_at_ms = missed_slot
+        service._schedule(job)
+        service._running = True
+        await service._on_timer()
+        await asyncio.gather(*service._active.values())
+        service.stop()
+        return ran, job
+
+    ran, job = await run_with("skip")
+    assert ran == [] and job.state.last_status == "skipped"
+    assert job.state.next_run_at_ms > _now_ms()
+
+    ran, job = await run_with("coalesce")
+    assert len(ran) == 1 and job.state.next_run_at_ms > _now_ms()
+
+    ran, job = await run_with("run_late")
+    assert len(ran) == 1 and job.state.next_run_at_ms == missed_slot + every
+
+
+def test_jitter_spreads_recurring_jobs(tmp_path) -> None:
+    service = CronService(tmp_path / "jobs.json", jitter_s=30)
+    times = {
+        service.add_job(f"j{i}", CronSchedule(kind="every", every_ms=60_000), "hi").state.next_run_at_ms
+        for i in range(10)
+    }
+    base = _now_ms() + 60_000
+    jittered = {service._next_run(j, _now_ms()) for j in service.list_jobs()}
+    assert len(jittered) > 1
+    assert all(base - 1000 <= t <= base + 31_000 for t in jittered | times)
+
+
+async def test_routing_context_is_isolated_between_concurrent_turns() -> None:
+    sent = []
+
+    async def send(msg):
+        sent.append((msg.channel, msg.chat_id, msg.content))
+
+    tool = MessageTool(send_callback=send)
+
+    async def turn(chat_id: str):
+        tool.set_context("telegram", chat_id)
+        await asyncio.sleep(0.01)
+        await tool.execute(content=f"for {chat_id}")
+
+    await asyncio.gather(turn("alice"), turn("bob"))
+    assert sorted(sent) == [("telegram", "alice", "for alice"), ("telegram", "bob", "for bob")]
+
+
+async def test_job_index_tracks_add_remove_and_one_shot_delete(tmp_path) -> None:
+    service = CronService(tmp_path / "jobs.json")
+    rebuilds = 0
+    original = service._rebuild_queue
+
+    def counting_rebuild() -> None:
+        nonlocal rebuilds
+        rebuilds += 1
+        original()
+
+    service._rebuild_queue = counting_rebuild
+    keep = service.add_job("keep", CronSchedule(kind="every", every_ms=60_000), "hi")
+    once = service.add_job("once", CronSchedule(kind="at", at_ms=_now_ms() + 60_000), "hi", delete_after_run=True)
+    gone = service.add_job("gone", CronSchedule(kind="every", every_ms=60_000), "hi")
+    await service.start()
+    assert rebuilds == 1
+
+    assert service.remove_job(gone.id) and not service.remove_job(gone.id)
+    assert await service.run_job(once.id, force=True)
+    assert service._get_job(once.id) is None and service._get_job(keep.id) is keep
+    assert [j.id for j in service.list_jobs(include_disabled=True)] == [keep.id]
+    assert service.enable_job(keep.id, enabled=False) is keep
+    service.stop()
+
+    reloaded = CronService(tmp_path / "jobs.json")
+    assert [j.id for j in reloaded.list_jobs(include_disabled=True)] == [keep.id]
@@ -0,0 +1,80 @@
+import json
+import sqlite3
+
+from nanobot.cron.service import CronService
+from nanobot.cron.store import CronRun, JsonCronStore, SQLiteCronStore
+from nanobot.cron.types import CronSchedule
+from nanobot.utils.usage import record_usage
+
+EVERY = CronSchedule(kind="every", every_ms=60_000)
+
+
+def test_sqlite_store_updates_single_rows(tmp_path) -> None:
+    service = CronService(tmp_path / "jobs.db")
+    a = service.add_job("a", EVERY, "hello")
+    b = service.add_job("b", EVERY, "world")
+    service.enable_job(a.id, enabled=False)
+    service.remove_job(b.id)
+
+    reloaded = CronService(tmp_path / "jobs.db").list_jobs(include_disabled=True)
+    assert [(j.id, j.enabled) for j in reloaded] == [(a.id, False)]
+
+
+async def test_runs_are_recorded_with_tokens(tmp_path) -> None:
+    async def on_job(job):
+        record_usage({"prompt_tokens": 90, "completion_tokens": 10, "total_tokens": 100})
+        record_usage({"prompt_tokens": 40, "completion_tokens": 2, "total_tokens": 42})
+        if job.name == "bad":
+            raise RuntimeError("boom")
+        return "done"
+
+    service = CronService(tmp_path / "jobs.db", on_job=on_job)
+    good = service.add_job("good", EVERY, "hi")
+    bad = service.add_job("bad", EVERY, "hi")
+    await service.run_job(good.id)
+    await service.run_job(bad.id)
+
+    runs = service.runs()
+    assert [(r.job_id, r.status, r.tokens) for r in runs] == [(bad.id, "error", 142), (good.id, "ok", 142)]
+    assert runs[0].error == "boom"
+    assert service.runs(good.id, limit=5)[0].duration_ms >= 0
+
+
+def test_run_history_is_compacted(tmp_path) -> None:
+    store = SQLiteCronStore(tmp_path / "jobs.db", keep_runs=5)
+    for i in range(12):
+        store.record_run(CronRun(job_id="j", started_at_ms=i, duration_ms=1, status="ok"))
+    store.compact()
+    assert [r.started_at_ms for r in store.runs("j")] == [11, 10, 9, 8, 7]
+
+
+def test_legacy_json_is_imported_once(tmp_path) -> None:
+    legacy = CronService(tmp_path / "jobs.json")
+    job = legacy.add_job("legacy", EVERY, "hi")
+
+    service = CronService(tmp_path / "jobs.db")
+    assert [j.id for j in service.list_jobs()] == [job.id]
+    assert not (tmp_path / "jobs.json").exists()
+    assert (tmp_path / "jobs.json.migrated").exists()
+    rows = sqlite3.connect(tmp_path / "jobs.db").execute("SELECT COUNT(*) FROM jobs").fetchone()
+    assert rows == (1,)
+
+
+def test_json_store_writes_atomically(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "jobs.json"
+    store = JsonCronStore(path)
+    service = CronService(path)
+    service.add_job("a", EVERY, "hi")
+    before = path.read_text()
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("nanobot.cron.store.os.replace", crash)
+    try:
+        service.add_job("b", EVERY, "hi")
+    except OSError:
+        pass
+    assert path.read_text() == before
+    assert [j["name"] for j in json.loads(before)["jobs"]] == ["a"]
+    assert [j.name for j in store.load()] == ["a"]
@@ -39,12 +39,13 @@ def _make_raw_email(
     return msg.as_bytes()
 
 
-def test_fetch_new_messages_parses_unseen_and_marks_seen(monkeypatch) -> None:
+def test_fetch_new_messages_parses_unseen_and_marks_seen(monkeypatch, tmp_path) -> None:
     raw = _make_raw_email(subject="Invoice", body="Please pay")
 
     class FakeIMAP:
         def __init__(self) -> None:
-            self.store_calls: list[tuple[bytes, str, str]] = []
+            self.search_args: list[tuple] = []
+            self.store_calls: list[tuple[str, str, str]] = []
 
         def login(self, _user: str, _pw: str):
             return "OK", [b"logged in"]
@@ -52,14 +53,16 @@ def test_fetch_new_messages_parses_unseen_and_marks_seen(monkeypatch) -> None:
         def select(self, _mailbox: str):
             return "OK", [b"1"]
 
-        def search(self, *_args):
-            return "OK", [b"1"]
-
-        def fetch(self, _imap_id: bytes, _parts: str):
-            return "OK", [(b"1 (UID 123 BODY[] {200})", raw), b")"]
+        def response(self, _code: str):
+            return "UIDVALIDITY", [b"1"]
 
-        def store(self, imap_id: bytes, op: str, flags: str):
-            self.store_calls.append((imap_id, op, flags))
+        def uid(self, command: str, *args):
+            if command == "SEARCH":
+                self.search_args.append(args)
+                return "OK", [b"123"]
+            if command == "FETCH":
+                return "OK", [(b"1 (UID 123 BODY[] {200})", raw), b")"]
+            self.store_calls.append(args)
             return "OK", [b""]
 
         def logout(self):
@@ -68,18 +71,19 @@ def test_fetch_new_messages_parses_unseen_and_marks_seen(monkeypatch) -> None:
     fake = FakeIMAP()
     monkeypatch.setattr("nanobot.channels.email.imaplib.IMAP4_SSL", lambda _h, _p: fake)
 
-    channel = EmailChannel(_make_config(), MessageBus())
+    channel = EmailChannel(_make_config(), MessageBus(), state_path=tmp_path / "email.json")
     items = channel._fetch_new_messages()
 
     assert len(items) == 1
     assert items[0]["sender"] == "alice@example.com"
     assert items[0]["subject"] == "Invoice"
     assert "Please pay" in items[0]["content"]
-    assert fake.store_calls == [(b"1", "+FLAGS", "\\Seen")]
+    assert fake.store_calls == [("123", "+FLAGS", "(\\Seen)")]
 
-    # Same UID should be deduped in-process.
+    # Same UID should be skipped via the checkpoint.
     items_again = channel._fetch_new_messages()
     assert items_again == []
+    assert fake.search_args == [("UNSEEN",), ("UID", "124:*", "UNSEEN")]
 
 
 def test_extract_text_body_falls_back_to_html() -> None:
@@ -265,7 +269,7 @@ async def test_send_skips_when_consent_not_granted(monkeypatch) -> None:
     assert called["smtp"] is False
 
 
-def test_fetch_messages_between_dates_uses_imap_since_before_without_mark_seen(monkeypatch) -> None:
+def test_fetch_messages_between_dates_uses_imap_since_before_without_mark_seen(monkeypatch, tmp_path) -> None:
     raw = _make_raw_email(subject="Status", body="Yesterday update")
 
     class FakeIMAP:
@@ -279,15 +283,13 @@ def test_fetch_messages_between_dates_uses_imap_since_before_without_mark_seen(m
         def select(self, _mailbox: str):
             return "OK", [b"1"]
 
-        def search(self, *_args):
-            self.search_args = _args
-            return "OK", [b"5"]
-
-        def fetch(self, _imap_id: bytes, _parts: str):
-            return "OK", [(b"5 (UID 999 BODY[] {200})", raw), b")"]
-
-        def store(self, imap_id: bytes, op: str, flags: str):
-            self.store_calls.append((imap_id, op, flags))
+        def uid(self, command: str, *args):
+            if command == "SEARCH":
+                self.search_args = args
+                return "OK", [b"999"]
+            if command == "FETCH":
+                return "OK", [(b"5 (UID 999 BODY[] {200})", raw), b")"]
+            self.store_calls.append(args)
             return "OK", [b""]
 
         def logout(self):
@@ -296,7 +298,7 @@ def test_fetch_messages_between_dates_uses_imap_since_before_without_mark_seen(m
     fake = FakeIMAP()
     monkeypatch.setattr("nanobot.channels.email.imaplib.IMAP4_SSL", lambda _h, _p: fake)
 
-    channel = EmailChannel(_make_config(), MessageBus())
+    channel = EmailChannel(_make_config(), MessageBus(), state_path=tmp_path / "email.json")
     items = channel.fetch_messages_between_dates(
         start_date=date(2026, 2, 6),
         end_date=date(2026, 2, 7),
@@ -305,7 +307,6 @@ def test_fetch_messages_between_dates_uses_imap_since_before_without_mark_seen(m
 
     assert len(items) == 1
     assert items[0]["subject"] == "Status"
-    # search(None, "SINCE", "06-Feb-2026", "BEFORE", "07-Feb-2026")
-    assert fake.search_args is not None
-    assert fake.search_args[1:] == ("SINCE", "06-Feb-2026", "BEFORE", "07-Feb-2026")
+    # uid("SEARCH", "SINCE", "06-Feb-2026", "BEFORE", "07-Feb-2026")
+    assert fake.search_args == ("SINCE", "06-Feb-2026", "BEFORE", "07-Feb-2026")
     assert fake.store_calls == []
@@ -0,0 +1,190 @@
+import asyncio
+import socketserver
+import threading
+import time
+from email.message import EmailMessage
+
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.email import EmailChannel
+from nanobot.config.schema import EmailConfig
+
+
+def _raw_email(n: int) -> bytes:
+    msg = EmailMessage()
+    msg["From"] = f"user{n}@example.com"
+    msg["To"] = "bot@example.com"
+    msg["Subject"] = f"Message {n}"
+    msg["Message-ID"] = f"<m{n}@example.com>"
+    msg.set_content(f"Body {n}")
+    return msg.as_bytes()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Just enough IMAP4rev1 + IDLE for imaplib and EmailChannel."""
+
+    def send(self, line: str) -> None:
+        with self.server.lock:
+            self.wfile.write(line.encode() + b"\r\n")
+            self.wfile.flush()
+
+    def handle(self) -> None:
+        srv = self.server
+        self.send("* OK IMAP stand-in ready")
+        while line := self.rfile.readline():
+            tag, cmd, *args = line.decode().strip().split(" ")
+            cmd = cmd.upper()
+            srv.commands.append(" ".join([cmd, *args]))
+            if cmd == "CAPABILITY":
+                self.send("* CAPABILITY IMAP4rev1 IDLE")
+            elif cmd == "SELECT":
+                self.send(f"* {len(srv.messages)} EXISTS")
+                self.send(f"* OK [UIDVALIDITY {srv.uidvalidity}] UIDs valid")
+            elif cmd == "UID":
+                self.uid_command(args[0].upper(), args[1:])
+            elif cmd == "IDLE":
+                # Optionally announce mail in the same write as the continuation
+                self.send("+ idling" + "".join(f"\r\n{extra}" for extra in srv.idle_extra))
+                srv.idlers.append(self)
+                self.rfile.readline()  # DONE
+                srv.idlers.remove(self)
+            elif cmd == "LOGOUT":
+                self.send("* BYE")
+                self.send(f"{tag} OK LOGOUT completed")
+                return
+            self.send(f"{tag} OK {cmd} completed")
+
+    def uid_command(self, sub: str, args: list[str]) -> None:
+        srv = self.server
+        if sub == "SEARCH":
+            msgs = list(srv.messages)
+            if "UID" in args:
+                lo = int(args[args.index("UID") + 1].split(":")[0])
+                msgs = [m for m in msgs if m["uid"] >= lo] or msgs[-1:]
+            if "UNSEEN" in args:
+                msgs = [m for m in msgs if not m["seen"]]
+            self.send("* SEARCH " + " ".join(str(m["uid"]) for m in msgs))
+            return
+        wanted = set()
+        for part in args[0].split(","):
+            lo, _, hi = part.partition(":")
+            wanted.update(range(int(lo), int(hi or lo) + 1))
+        for seq, m in enumerate(srv.messages, 1):
+            if m["uid"] not in wanted:
+                continue
+            if sub == "FETCH":
+                with srv.lock:
+                    self.wfile.write(
+                        f"* {seq} FETCH (UID {m['uid']} BODY[] {{{len(m['raw'])}}}\r\n".encode()
+                        + m["raw"] + b")\r\n"
+                    )
+            elif sub == "STORE":
+                m["seen"] = True
+
+
+class IMAPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.uidvalidity = 7
+        self.messages: list[dict] = []
+        self.commands: list[str] = []
+        self.idlers: list[_Handler] = []
+        self.idle_extra: list[str] = []
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def deliver(self, raw: bytes) -> None:
+        uid = self.messages[-1]["uid"] + 1 if self.messages else 1
+        self.messages.append({"uid": uid, "raw": raw, "seen": False})
+        for handler in list(self.idlers):
+            handler.send(f"* {len(self.messages)} EXISTS")
+
+
+def _config(port: int, **kwargs) -> EmailConfig:
+    return EmailConfig(
+        enabled=True,
+        consent_granted=True,
+        imap_host="127.0.0.1",
+        imap_port=port,
+        imap_use_ssl=False,
+        imap_username="bot@example.com",
+        imap_password="secret",
+        smtp_host="127.0.0.1",
+        smtp_username="bot@example.com",
+        smtp_password="secret",
+        **kwargs,
+    )
+
+
+def test_uid_sync_batches_and_persists_checkpoint(tmp_path):
+    server = IMAPStandIn()
+    for n in range(1, 4):
+        server.deliver(_raw_email(n))
+    state = tmp_path / "email.json"
+    cfg = _config(server.server_address[1], mark_seen=False, fetch_batch_size=2)
+
+    channel = EmailChannel(cfg, MessageBus(), state_path=state)
+    items = channel._fetch_new_messages()
+    assert [i["subject"] for i in items] == ["Message 1", "Message 2", "Message 3"]
+    assert [c for c in server.commands if c.startswith("UID FETCH")] == [
+        "UID FETCH 1:2 (UID BODY.PEEK[])", "UID FETCH 3 (UID BODY.PEEK[])",
+    ]
+    assert channel._fetch_new_messages() == []
+    channel._close_imap()
+
+    # A restarted channel resumes from the checkpoint on disk
+    restarted = EmailChannel(cfg, MessageBus(), state_path=state)
+    server.deliver(_raw_email(4))
+    assert [i["subject"] for i in restarted._fetch_new_messages()] == ["Message 4"]
+    restarted._close_imap()
+
+    # A new UIDVALIDITY invalidates the checkpoint
+    server.uidvalidity = 8
+    resynced = EmailChannel(cfg, MessageBus(), state_path=state)
+    assert len(resynced._fetch_new_messages()) == 4
+    resynced._close_imap()
+    server.shutdown()
+
+
+async def test_idle_delivers_new_mail_without_polling(tmp_path):
+    server = IMAPStandIn()
+    server.deliver(_raw_email(1))
+    bus = MessageBus()
+    channel = EmailChannel(_config(server.server_address[1], poll_interval_seconds=60), bus, state_path=tmp_path / "s.json")
+    task = asyncio.create_task(channel.start())
+
+    first = await asyncio.wait_for(bus.consume_inbound(), timeout=5)
+    assert first.metadata["subject"] == "Message 1"
+    for _ in range(50):
+        if server.idlers:
+            break
+        await asyncio.sleep(0.05)
+    assert server.idlers
+
+    server.deliver(_raw_email(2))
+    second = await asyncio.wait_for(bus.consume_inbound(), timeout=5)
+    assert second.metadata["subject"] == "Message 2"
+    assert all(m["seen"] for m in server.messages)
+
+    await channel.stop()
+    await asyncio.wait_for(task, timeout=5)
+    assert server.commands[-1] == "LOGOUT"
+    server.shutdown()
+
+
+def test_idle_sees_exists_sent_with_the_continuation(tmp_path):
+    server = IMAPStandIn()
+    server.deliver(_raw_email(1))
+    channel = EmailChannel(_config(server.server_address[1]), MessageBus(), state_path=tmp_path / "s.json")
+    channel._running = True
+    channel._open_mailbox()
+    server.idle_extra = ["* 2 EXISTS"]
+
+    start = time.monotonic()
+    assert channel._idle_wait(4) is True
+    assert time.monotonic() - start < 1
+    assert server.commands[-1] == "IDLE"
+    channel._close_imap()
+    server.shutdown()
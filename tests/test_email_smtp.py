@@ -0,0 +1,121 @@
+import asyncio
+import smtplib
+import socket
+import time
+from email.message import EmailMessage
+
+import pytest
+
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.email import EmailChannel, SMTPSender
+from nanobot.config.schema import EmailConfig
+
+
+def _message(n: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "bot@example.com"
+    msg["To"] = "alice@example.com"
+    msg["Subject"] = f"Digest {n}"
+    msg.set_content(f"Body {n}")
+    return msg
+
+
+class FakeSMTP:
+    def __init__(self, fail_first: bool = False):
+        self.fail_first = fail_first
+        self.sent: list[EmailMessage] = []
+        self.quit_called = False
+
+    def send_message(self, msg: EmailMessage):
+        if self.fail_first:
+            self.fail_first = False
+            raise smtplib.SMTPServerDisconnected("gone")
+        self.sent.append(msg)
+
+    def quit(self):
+        self.quit_called = True
+
+
+async def test_sender_reuses_connection_and_reconnects_on_drop():
+    conns: list[FakeSMTP] = []
+
+    def connect():
+        conns.append(FakeSMTP(fail_first=len(conns) == 1))
+        return conns[-1]
+
+    sender = SMTPSender(connect)
+    await asyncio.gather(*(sender.send(_message(n)) for n in range(3)))
+    assert len(conns) == 1 and len(conns[0].sent) == 3
+
+    # Expired keepalive: the old connection is replaced; the new one drops once
+    sender.keepalive = 0
+    await sender.send(_message(3))
+    assert conns[0].quit_called
+    assert len(conns) == 3 and [m["Subject"] for m in conns[2].sent] == ["Digest 3"]
+
+    await sender.close()
+    assert conns[2].quit_called
+
+
+async def test_sender_paces_and_reports_errors():
+    class Rejecting(FakeSMTP):
+        def send_message(self, msg):
+            raise smtplib.SMTPRecipientsRefused({"alice@example.com": (550, b"no")})
+
+    sender = SMTPSender(lambda: FakeSMTP(), max_per_minute=1200)
+    start = time.monotonic()
+    await asyncio.gather(*(sender.send(_message(n)) for n in range(4)))
+    assert time.monotonic() - start >= 0.14
+    await sender.close()
+
+    rejecting = SMTPSender(Rejecting)
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        await rejecting.send(_message(0))
+    await rejecting.close()
+
+
+async def test_channel_sends_burst_over_one_connection_to_aiosmtpd():
+    pytest.importorskip("aiosmtpd")
+    from aiosmtpd.controller import Controller
+
+    class Handler:
+        def __init__(self):
+            self.envelopes = []
+
+        async def handle_DATA(self, server, session, envelope):  # noqa: N802 (aiosmtpd hook name)
+            self.envelopes.append(envelope)
+            return "250 OK"
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    handler = Handler()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        channel = EmailChannel(
+            EmailConfig(consent_granted=True, smtp_host="127.0.0.1", smtp_port=port, smtp_use_tls=False,
+                        from_address="bot@example.com"),
+            MessageBus(),
+        )
+        connects = 0
+        original = channel._smtp.connect
+
+        def counting_connect():
+            nonlocal connects
+            connects += 1
+            return original()
+
+        channel._smtp.connect = counting_connect
+        await asyncio.gather(*(
+            channel.send(OutboundMessage(channel="email", chat_id="alice@example.com", content=f"Digest {n}"))
+            for n in range(5)
+        ))
+        await channel.stop()
+    finally:
+        controller.stop()
+
+    assert connects == 1
+    assert len(handler.envelopes) == 5
+    assert all(e.rcpt_tos == ["alice@example.com"] for e in handler.envelopes)
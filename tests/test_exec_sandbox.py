@@ -0,0 +1,127 @@
+import asyncio
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from nanobot.agent.tools.sandbox import ExecSandbox, make_sandbox
+from nanobot.agent.tools.shell import ExecTool
+from nanobot.config.schema import ExecSandboxConfig
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux rlimits")
+
+
+def _tool(tmp_path, **limits) -> ExecTool:
+    return ExecTool(working_dir=str(tmp_path), timeout=20, sandbox=ExecSandbox(**limits))
+
+
+async def test_sandbox_reports_resource_usage(tmp_path) -> None:
+    result = await _tool(tmp_path).execute("echo hello")
+    assert result.startswith("hello")
+    assert "[resources: wall " in result
+    assert "limit exceeded" not in result
+
+
+async def test_sandbox_enforces_cpu_limit(tmp_path) -> None:
+    result = await _tool(tmp_path, cpu_seconds=1).execute("while :; do :; done")
+    assert "CPU time limit exceeded" in result
+
+
+async def test_sandbox_enforces_memory_limit(tmp_path) -> None:
+    cmd = f"{sys.executable} -c \"b = bytearray(512 * 1024 * 1024); print('allocated')\""
+    result = await _tool(tmp_path, memory_mb=200).execute(cmd)
+    assert "MemoryError" in result
+    assert "allocated" not in result
+
+
+async def test_sandbox_enforces_file_size_limit(tmp_path) -> None:
+    result = await _tool(tmp_path, file_size_mb=1).execute(
+        "head -c 3000000 /dev/zero > big.bin"
+    )
+    assert "file size limit exceeded" in result
+    assert (tmp_path / "big.bin").stat().st_size <= 1024 * 1024
+
+
+def test_sandbox_wraps_with_namespace_tools(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(shutil, "which", lambda name: f"/usr/bin/{name}")
+    argv = ExecSandbox(namespace="bwrap", network=False).wrap("ls", str(tmp_path))
+    assert argv[0] == "bwrap"
+    assert "--share-net" not in argv
+    assert argv[-3:] == ["/bin/sh", "-c", "ls"]
+
+    argv = ExecSandbox(namespace="unshare").wrap("ls", str(tmp_path))
+    assert argv[:2] == ["unshare", "--user"]
+    assert "--net" not in argv
+
+
+def test_sandbox_falls_back_without_namespace_tools(monkeypatch) -> None:
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+    assert ExecSandbox(namespace="auto").namespace == "none"
+    assert ExecSandbox(namespace="bwrap").namespace == "none"
+    with pytest.raises(ValueError):
+        ExecSandbox(namespace="docker")
+
+
+def test_make_sandbox_respects_enabled_flag() -> None:
+    assert make_sandbox(ExecSandboxConfig()) is None
+    sandbox = make_sandbox(ExecSandboxConfig(enabled=True, cpu_seconds=5))
+    assert sandbox is not None and sandbox.cpu_seconds == 5
+
+
+def _unshare_works() -> bool:
+    if not shutil.which("unshare"):
+        return False
+    probe = subprocess.run(
+        ["unshare", "--user", "--map-root-user", "--pid", "--fork", "--mount-proc", "true"],
+        capture_output=True,
+    )
+    return probe.returncode == 0
+
+
+@pytest.mark.skipif(not _unshare_works(), reason="unprivileged user namespaces unavailable")
+async def test_sandbox_runs_in_pid_namespace(tmp_path) -> None:
+    result = await _tool(tmp_path, namespace="unshare").execute("echo $$")
+    assert result.splitlines()[0] == "1"
+
+
+async def test_cancelled_command_removes_its_cgroup(monkeypatch, tmp_path) -> None:
+    sandbox = ExecSandbox()
+    cgroup = tmp_path / "cg"
+    cgroup.mkdir()
+    removed: list = []
+    monkeypatch.setattr(sandbox, "_create_cgroup", lambda: cgroup)
+    monkeypatch.setattr(ExecSandbox, "_remove_cgroup", staticmethod(removed.append))
+    tool = ExecTool(working_dir=str(tmp_path), timeout=20, sandbox=sandbox)
+
+    task = asyncio.create_task(tool.execute("sleep 30"))
+    await asyncio.sleep(0.3)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert removed == [cgroup]
+
+
+async def test_persistent_shell_starts_inside_sandbox(monkeypatch, tmp_path) -> None:
+    sandbox = ExecSandbox(cpu_seconds=7)
+    wrapped: list[list[str]] = []
+    original = sandbox.wrap_argv
+    monkeypatch.setattr(sandbox, "wrap_argv", lambda argv, cwd: wrapped.append(argv) or original(argv, cwd))
+    tool = ExecTool(working_dir=str(tmp_path), timeout=20, persistent=True, sandbox=sandbox)
+    try:
+        assert (await tool.execute("ulimit -t")).strip() == "7"
+    finally:
+        await tool.close()
+    assert len(wrapped) == 1 and wrapped[0][0].endswith("sh")
+
+
+@pytest.mark.skipif(not _unshare_works(), reason="unprivileged user namespaces unavailable")
+async def test_persistent_shell_runs_in_pid_namespace(tmp_path) -> None:
+    tool = ExecTool(
+        working_dir=str(tmp_path), timeout=20, persistent=True,
+        sandbox=ExecSandbox(namespace="unshare"),
+    )
+    try:
+        assert (await tool.execute("echo $$")).strip() == "1"
+    finally:
+        await tool.close()
@@ -0,0 +1,210 @@
+import os
+import sys
+import time
+
+import pytest
+
+from nanobot.agent.tools.shell import ExecTool, OutputBuffer
+from nanobot.bus.events import OutboundMessage
+
+posix_only = pytest.mark.skipif(sys.platform == "win32", reason="POSIX process groups")
+
+
+def test_output_buffer_keeps_head_and_tail() -> None:
+    buf = OutputBuffer(head_bytes=4, tail_bytes=4)
+    for chunk in (b"abcdef", b"ghij", b"klmnop"):
+        buf.write(chunk)
+
+    assert buf.total == 16
+    assert buf.dropped == 8
+    text = buf.text()
+    assert text.startswith("abcd")
+    assert text.endswith("mnop")
+    assert "8 bytes omitted" in text
+
+
+def test_output_buffer_small_output_is_verbatim() -> None:
+    buf = OutputBuffer(head_bytes=4, tail_bytes=4)
+    buf.write(b"abcdef")
+    assert buf.text() == "abcdef"
+    assert buf.recent(3) == "def"
+
+
+async def test_exec_truncates_long_output_keeping_tail(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), max_output_chars=100)
+    result = await tool.execute(f"{sys.executable} -c \"print('x' * 5000 + 'END')\"")
+    assert "bytes omitted" in result
+    assert result.rstrip().endswith("END")
+    assert len(result) < 300
+
+
+async def test_exec_output_limit_covers_both_streams(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), max_output_chars=10000)
+    script = "import sys; sys.stdout.write('o' * 50000); sys.stderr.write('e' * 50000)"
+    result = await tool.execute(f"{sys.executable} -c \"{script}\"")
+    assert "STDERR:" in result
+    assert result.count("bytes omitted") == 2
+    assert len(result) < 10200
+
+
+async def test_exec_kills_command_over_byte_ceiling(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), timeout=30, max_output_bytes=64 * 1024)
+    start = time.monotonic()
+    result = await tool.execute("yes")
+    assert time.monotonic() - start < 10
+    assert "Output exceeded 65536 bytes" in result
+
+
+@posix_only
+async def test_exec_timeout_kills_process_group(tmp_path) -> None:
+    pid_file = tmp_path / "child.pid"
+    tool = ExecTool(working_dir=str(tmp_path), timeout=1)
+    result = await tool.execute(f"sleep 30 & echo $! > {pid_file}; echo started; wait")
+
+    assert result.startswith("Error: Command timed out after 1 seconds")
+    assert "started" in result
+    child = int(pid_file.read_text())
+    for _ in range(50):
+        try:
+            os.kill(child, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.05)
+    else:
+        pytest.fail("background child survived the timeout")
+
+
+async def test_exec_forwards_progress(tmp_path) -> None:
+    sent: list[OutboundMessage] = []
+
+    async def send(msg: OutboundMessage) -> None:
+        sent.append(msg)
+
+    tool = ExecTool(working_dir=str(tmp_path), progress_interval=0.2, send_callback=send)
+    tool.set_context("telegram", "42")
+    result = await tool.execute("echo working; sleep 1; echo done")
+
+    assert "done" in result
+    assert sent
+    assert sent[0].chat_id == "42"
+    assert "working" in sent[0].content
+
+
+@posix_only
+async def test_persistent_shell_keeps_state(tmp_path) -> None:
+    (tmp_path / "sub").mkdir()
+    tool = ExecTool(working_dir=str(tmp_path), persistent=True)
+    tool.set_context("cli", "direct")
+    try:
+        assert "(no output)" == await tool.execute("cd sub && export GREETING=hi")
+        result = await tool.execute("pwd; echo $GREETING")
+        assert result.splitlines() == [str(tmp_path / "sub"), "hi"]
+
+        result = await tool.execute("echo oops >&2; false")
+        assert "oops" in result
+        assert "Exit code: 1" in result
+    finally:
+        await tool.close()
+
+
+@posix_only
+async def test_persistent_shell_isolated_per_chat(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), persistent=True)
+    try:
+        tool.set_context("telegram", "1")
+        await tool.execute("export WHO=one")
+        tool.set_context("telegram", "2")
+        assert "one" not in await tool.execute("echo ${WHO:-unset}")
+    finally:
+        await tool.close()
+
+
+@posix_only
+async def test_persistent_shell_restarts_after_timeout_and_exit(tmp_path) -> None:
+    tool = ExecTool(working_dir=str(tmp_path), timeout=1, persistent=True)
+    try:
+        await tool.execute("export KEEP=1")
+        result = await tool.execute("sleep 30")
+        assert "timed out" in result and "restarted" in result
+        assert "unset" in await tool.execute("echo ${KEEP:-unset}")
+
+        result = await tool.execute("exit 3")
+        assert "Exit code: 3" in result
+        assert "alive" in await tool.execute("echo alive")
+    finally:
+        await tool.close()
+
+
+@posix_only
+async def test_shell_pool_reaps_idle_sessions(tmp_path) -> None:
+    from nanobot.agent.tools.shell_session import ShellSessionPool
+
+    pool = ShellSessionPool(str(tmp_path), idle_ttl=0.01)
+    try:
+        session = pool.get("a")
+        await session.run("true", 5, OutputBuffer(100, 100), 1000)
+        assert session.alive
+        time.sleep(0.05)
+        assert await pool.reap_idle() == 1
+        assert len(pool) == 0
+        assert not session.alive
+    finally:
+        await pool.close_all()
+
+
+@posix_only
+async def test_shell_pool_reaper_spares_shells_used_while_reaping(tmp_path) -> None:
+    import asyncio
+
+    from nanobot.agent.tools.shell_session import ShellSessionPool
+
+    pool = ShellSessionPool(str(tmp_path), idle_ttl=0.01)
+    try:
+        first, second = pool.get("a"), pool.get("b")
+        for session in (first, second):
+            await session.run("true", 5, OutputBuffer(100, 100), 1000)
+        time.sleep(0.05)
+        gate = asyncio.Event()
+        close_first = first.close
+
+        async def slow_close() -> None:
+            await gate.wait()
+            await close_first()
+
+        first.close = slow_close
+        reaping = asyncio.create_task(pool.reap_idle())
+        await asyncio.sleep(0.05)
+
+        fresh = pool.get("b")
+        assert fresh is not second
+        buf = OutputBuffer(100, 100)
+        assert await fresh.run("echo ok", 5, buf, 1000) == (0, None)
+        gate.set()
+        assert await reaping == 2
+        assert fresh.alive and buf.text().strip() == "ok"
+    finally:
+        await pool.close_all()
+
+
+@posix_only
+async def test_agent_loop_close_tools_ends_persistent_shells(tmp_path) -> None:
+    from unittest.mock import MagicMock
+
+    from nanobot.agent.loop import AgentLoop
+    from nanobot.bus.queue import MessageBus
+    from nanobot.config.schema import ExecToolConfig
+
+    provider = MagicMock()
+    provider.get_default_model.return_value = "fake"
+    loop = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=tmp_path,
+        exec_config=ExecToolConfig(persistent_shell=True),
+    )
+    tool = loop.tools.get("exec")
+    pid = int((await tool.execute("echo $$")).strip())
+    os.kill(pid, 0)
+
+    await loop.close_tools()
+    assert len(tool._sessions) == 0
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
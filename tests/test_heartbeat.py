@@ -0,0 +1,123 @@
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+
+from nanobot.heartbeat.service import HeartbeatService, _next_due
+
+
+def _service(tmp_path, replies: list[str], **kwargs) -> tuple[HeartbeatService, list[str]]:
+    calls: list[str] = []
+
+    async def on_heartbeat(prompt: str) -> str:
+        calls.append(prompt)
+        return replies.pop(0) if replies else "HEARTBEAT_OK"
+
+    return HeartbeatService(tmp_path, on_heartbeat=on_heartbeat, **kwargs), calls
+
+
+async def test_unchanged_content_after_ok_skips_llm(tmp_path) -> None:
+    (tmp_path / "HEARTBEAT.md").write_text("- [ ] water the plants\n")
+    service, calls = _service(tmp_path, ["HEARTBEAT_OK"], interval_s=0)
+
+    await service._tick()
+    await service._tick()
+    assert len(calls) == 1
+
+    (tmp_path / "HEARTBEAT.md").write_text("- [ ] water the plants\n- [ ] call mom\n")
+    await service._tick()
+    assert len(calls) == 2
+
+
+async def test_unchanged_content_reruns_after_interval_when_not_ok(tmp_path) -> None:
+    (tmp_path / "HEARTBEAT.md").write_text("- [ ] summarize the news\n")
+    service, calls = _service(tmp_path, ["Sent the summary"], interval_s=3600)
+
+    await service._tick()
+    await service._tick()
+    assert len(calls) == 1
+    service._last_run -= 3600
+    await service._tick()
+    assert len(calls) == 2
+
+
+def test_next_due_parses_task_annotations() -> None:
+    content = (
+        "Use every: 5m in prose is ignored\n"
+        "- [ ] check inbox every: 2h\n"
+        "- [ ] report due: 2030-01-01 09:00\n"
+        "- [x] done due: 2030-01-01 08:00\n"
+    )
+    assert _next_due(content, last_run=1000.0) == 1000.0 + 7200
+    assert _next_due("- [ ] report due: 2000-01-01 09:00", last_run=time.time()) is None
+
+
+async def test_poll_mode_wakes_on_file_change(tmp_path) -> None:
+    (tmp_path / "HEARTBEAT.md").write_text("- [ ] first\n")
+    service, calls = _service(tmp_path, [], interval_s=3600, mode="poll", poll_interval_s=0.02, debounce_s=0)
+    await service.start()
+    try:
+        await asyncio.sleep(0.05)
+        (tmp_path / "HEARTBEAT.md").write_text("- [ ] second task\n")
+        for _ in range(100):
+            if calls:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        service.stop()
+    assert len(calls) == 1
+
+
+async def test_empty_file_does_not_spin_the_loop(tmp_path) -> None:
+    (tmp_path / "HEARTBEAT.md").write_text("# Heartbeat Tasks\n\n- [ ]\n")
+    service, calls = _service(tmp_path, [], interval_s=1, mode="interval")
+    ticks = 0
+    original = service._tick
+
+    async def counting_tick() -> None:
+        nonlocal ticks
+        ticks += 1
+        await original()
+
+    service._tick = counting_tick
+    service._last_run -= 1
+    await service.start()
+    service._last_run -= 1
+    try:
+        await asyncio.sleep(0.3)
+    finally:
+        service.stop()
+    assert ticks <= 2
+    assert calls == []
+
+
+async def test_agent_edits_to_heartbeat_file_do_not_retrigger(tmp_path) -> None:
+    path = tmp_path / "HEARTBEAT.md"
+    path.write_text("- [ ] water the plants\n")
+    calls: list[str] = []
+
+    async def on_heartbeat(prompt: str) -> str:
+        calls.append(prompt)
+        path.write_text("- [x] water the plants\n- [ ] buy seeds\n")
+        return "HEARTBEAT_OK"
+
+    service = HeartbeatService(tmp_path, on_heartbeat=on_heartbeat, interval_s=3600)
+    await service._tick()
+    await service._tick()
+    assert len(calls) == 1
+
+
+async def test_watch_mode_watches_only_the_workspace_root(monkeypatch, tmp_path) -> None:
+    calls: list[dict] = []
+
+    async def awatch(path, **kwargs):
+        calls.append({"path": path, **kwargs})
+        changed = str(tmp_path / "HEARTBEAT.md")
+        if kwargs["watch_filter"](None, changed):
+            yield {(None, changed)}
+
+    monkeypatch.setitem(sys.modules, "watchfiles", SimpleNamespace(awatch=awatch))
+    service, _ = _service(tmp_path, [], mode="watch")
+    await service._watch_loop()
+    assert calls[0]["path"] == tmp_path and calls[0]["recursive"] is False
+    assert service._changed.is_set()
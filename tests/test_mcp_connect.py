@@ -0,0 +1,187 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from types import SimpleNamespace
+
+import pytest
+
+from nanobot.agent.tools import mcp as mcp_module
+from nanobot.agent.tools.mcp import (
+    MCPClient,
+    MCPServerConnection,
+    connect_mcp_servers,
+    load_cached_tools,
+)
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.config.schema import MCPServerConfig
+
+
+class FakeSession:
+    def __init__(self, server: str):
+        self.server = server
+        self.calls: list[tuple[str, dict]] = []
+        self.broken = False
+        self.fail_after_send = False
+        self.active = 0
+        self.peak = 0
+
+    async def send_ping(self):
+        if self.broken:
+            raise ConnectionError("pipe closed")
+
+    async def list_tools(self):
+        tool = SimpleNamespace(
+            name="echo",
+            description=f"Echo from {self.server}",
+            inputSchema={"type": "object", "properties": {"text": {"type": "string"}}},
+        )
+        return SimpleNamespace(tools=[tool])
+
+    async def call_tool(self, name: str, arguments: dict):
+        import anyio
+        from mcp import types
+        if self.broken:
+            raise anyio.ClosedResourceError()
+        self.calls.append((name, arguments))
+        if self.fail_after_send:
+            raise ConnectionError("connection reset")
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(arguments.get("delay", 0))
+        finally:
+            self.active -= 1
+        return SimpleNamespace(content=[types.TextContent(type="text", text=arguments["text"])])
+
+
+@pytest.fixture
+def fake_open(monkeypatch):
+    opened: list[str] = []
+    delays = {"slow": 0.3, "stuck": 60, "fast": 0}
+
+    async def _open(self, stack):
+        opened.append(self.name)
+        await asyncio.sleep(delays.get(self.name, 0.3))
+        return FakeSession(self.name)
+
+    monkeypatch.setattr(MCPServerConnection, "_open", _open)
+    return opened
+
+
+async def test_servers_connect_concurrently(tmp_path, fake_open) -> None:
+    servers = {n: MCPServerConfig(command="fake") for n in ("a", "b", "c")}
+    registry = ToolRegistry()
+    start = time.monotonic()
+    async with AsyncExitStack() as stack:
+        await connect_mcp_servers(servers, registry, stack, cache_dir=tmp_path)
+        assert time.monotonic() - start < 0.8
+        assert sorted(registry.tool_names) == ["mcp_a_echo", "mcp_b_echo", "mcp_c_echo"]
+        assert await registry.execute("mcp_b_echo", {"text": "hi"}) == "hi"
+
+
+async def test_connect_timeout_skips_only_that_server(tmp_path, fake_open) -> None:
+    servers = {
+        "stuck": MCPServerConfig(command="fake", connect_timeout=1),
+        "slow": MCPServerConfig(command="fake"),
+    }
+    registry = ToolRegistry()
+    async with AsyncExitStack() as stack:
+        await connect_mcp_servers(servers, registry, stack, cache_dir=tmp_path)
+    assert registry.tool_names == ["mcp_slow_echo"]
+
+
+async def test_lazy_server_uses_cache_and_connects_on_first_use(tmp_path, fake_open) -> None:
+    servers = {"lazy": MCPServerConfig(command="fake", lazy=True)}
+
+    # First run: no cache yet, so the server connects eagerly and caches its schemas
+    async with AsyncExitStack() as stack:
+        await connect_mcp_servers(servers, ToolRegistry(), stack, cache_dir=tmp_path)
+    assert fake_open == ["lazy"]
+    assert load_cached_tools(tmp_path, "lazy", servers["lazy"])[0].name == "echo"
+
+    # Second run: tools come from cache, process starts on first call
+    registry = ToolRegistry()
+    async with AsyncExitStack() as stack:
+        await connect_mcp_servers(servers, registry, stack, cache_dir=tmp_path)
+        assert registry.tool_names == ["mcp_lazy_echo"]
+        assert fake_open == ["lazy"]
+        assert await registry.execute("mcp_lazy_echo", {"text": "later"}) == "later"
+        assert fake_open == ["lazy", "lazy"]
+
+
+def test_cache_invalidated_when_config_changes(tmp_path) -> None:
+    tools = [SimpleNamespace(name="t", description="d", inputSchema={"type": "object"})]
+    mcp_module.save_cached_tools(tmp_path, "srv", MCPServerConfig(command="a"), tools)
+    assert load_cached_tools(tmp_path, "srv", MCPServerConfig(command="a")) is not None
+    assert load_cached_tools(tmp_path, "srv", MCPServerConfig(command="b")) is None
+
+
+async def test_client_reconnects_and_retries_after_transport_failure(fake_open) -> None:
+    client = MCPClient("fast", MCPServerConfig(command="fake", health_interval=0))
+    await client.connect()
+    client.primary.session.broken = True
+
+    result = await client.call_tool("echo", {"text": "again"})
+
+    assert result.content[0].text == "again"
+    assert fake_open == ["fast", "fast"]
+    await client.close()
+
+
+async def test_client_does_not_resend_a_call_that_may_have_run(fake_open) -> None:
+    client = MCPClient("fast", MCPServerConfig(command="fake", health_interval=0))
+    await client.connect()
+    first = client.primary.session
+    first.fail_after_send = True
+
+    with pytest.raises(ConnectionError):
+        await client.call_tool("echo", {"text": "charge card"})
+    assert first.calls == [("echo", {"text": "charge card"})]
+    # Reconnected for the next call, but the failed one was not sent again
+    assert fake_open == ["fast", "fast"] and client.primary.session.calls == []
+
+    client.cfg.retry_tools = ["echo"]
+    client.primary.session.fail_after_send = True
+    result = await client.call_tool("echo", {"text": "idempotent"})
+    assert result.content[0].text == "idempotent"
+    assert fake_open == ["fast", "fast", "fast"]
+    await client.close()
+
+
+async def test_client_limits_concurrency_and_times_out(fake_open) -> None:
+    cfg = MCPServerConfig(command="fake", max_concurrency=2, call_timeout=1, health_interval=0)
+    client = MCPClient("fast", cfg)
+    await client.connect()
+    await asyncio.gather(*(client.call_tool("echo", {"text": "x", "delay": 0.05}) for _ in range(6)))
+    assert client.primary.session.peak == 2
+
+    with pytest.raises(TimeoutError):
+        await client.call_tool("echo", {"text": "x", "delay": 5})
+    stats = client.metrics["echo"]
+    assert (stats.calls, stats.errors) == (7, 1)
+    assert stats.max_ms >= 1000
+    await client.close()
+
+
+async def test_pool_spreads_calls_across_processes(fake_open) -> None:
+    cfg = MCPServerConfig(command="fake", pool_size=3, max_concurrency=0, health_interval=0)
+    client = MCPClient("fast", cfg)
+    await client.connect()
+    await asyncio.gather(*(client.call_tool("echo", {"text": "x", "delay": 0.05}) for _ in range(6)))
+    assert [len(c.session.calls) for c in client.connections] == [2, 2, 2]
+    await client.close()
+
+
+async def test_health_check_reconnects_and_resyncs_tools(tmp_path, fake_open) -> None:
+    registry = ToolRegistry()
+    async with AsyncExitStack() as stack:
+        clients = await connect_mcp_servers(
+            {"fast": MCPServerConfig(command="fake", health_interval=0)},
+            registry, stack, cache_dir=tmp_path,
+        )
+        client = clients["fast"]
+        client.primary.session.broken = True
+        await client.check_health()
+        assert fake_open == ["fast", "fast"]
+        assert not client.primary.session.broken
+        assert registry.tool_names == ["mcp_fast_echo"]
@@ -0,0 +1,83 @@
+import base64
+import io
+import os
+import time
+
+import pytest
+
+from nanobot.agent.context import ContextBuilder
+from nanobot.agent.media import MediaPipeline, max_dim_for_model
+
+PNG_1PX = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+
+def test_max_dim_for_model():
+    assert max_dim_for_model("anthropic/claude-opus-4-5") == 1568
+    assert max_dim_for_model("openai/gpt-4o") == 2048
+    assert max_dim_for_model("gemini/gemini-2.0-flash") == 3072
+    assert max_dim_for_model("deepseek-chat") == 1568
+
+
+def test_encode_caches_by_content(tmp_path):
+    a = tmp_path / "a.png"
+    b = tmp_path / "b.png"
+    a.write_bytes(PNG_1PX)
+    b.write_bytes(PNG_1PX)
+    pipeline = MediaPipeline(tmp_path / "cache")
+
+    part = pipeline.encode(a)
+    assert part["image_url"]["url"] == "data:image/png;base64," + base64.b64encode(PNG_1PX).decode()
+    assert pipeline.encode(b) is part
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+
+    # A fresh pipeline reads the encoded payload from disk
+    assert MediaPipeline(tmp_path / "cache").encode(b) == part
+    assert pipeline.encode(tmp_path / "missing.png") is None
+    (tmp_path / "notes.txt").write_text("hi")
+    assert pipeline.encode(tmp_path / "notes.txt") is None
+
+
+async def test_prepare_and_build_user_content(tmp_path):
+    img = tmp_path / "photo.png"
+    img.write_bytes(PNG_1PX)
+    builder = ContextBuilder(tmp_path, media=MediaPipeline(tmp_path / "cache"))
+
+    parts = await builder.media.prepare([str(img), str(tmp_path / "gone.jpg")])
+    assert parts[0]["type"] == "image_url" and parts[1] is None
+
+    content = builder._build_user_content("look", [str(img), str(tmp_path / "gone.jpg")])
+    assert [p["type"] for p in content] == ["image_url", "text"]
+
+    # Prepared parts are used as-is; the files are not read again
+    img.unlink()
+    messages = builder.build_messages([], "look", media=[str(img)], images=[parts[0]])
+    assert messages[-1]["content"] == [parts[0], {"type": "text", "text": "look"}]
+    assert builder._build_user_content("plain", [str(tmp_path / "gone.jpg")]) == "plain"
+
+
+def test_resize_large_image(tmp_path):
+    pil_image = pytest.importorskip("PIL.Image")
+    path = tmp_path / "big.jpg"
+    pil_image.new("RGB", (4000, 1000), "red").save(path)
+
+    part = MediaPipeline(tmp_path / "cache", max_dim=1000).encode(path)
+    url = part["image_url"]["url"]
+    assert url.startswith("data:image/jpeg;base64,")
+    with pil_image.open(io.BytesIO(base64.b64decode(url.split(",", 1)[1]))) as small:
+        assert small.size == (1000, 250)
+
+
+def test_gc_by_age_and_size(tmp_path):
+    media = tmp_path / "media"
+    media.mkdir()
+    now = time.time()
+    for name, age_days in (("old.jpg", 40), ("mid.jpg", 5), ("new.jpg", 1)):
+        f = media / name
+        f.write_bytes(b"x" * 600_000)
+        os.utime(f, (now - age_days * 86400,) * 2)
+
+    pipeline = MediaPipeline(tmp_path / "cache", media_dir=media, max_age_days=30, max_size_mb=1)
+    assert pipeline.gc() == 2
+    assert [p.name for p in media.iterdir()] == ["new.jpg"]
@@ -0,0 +1,74 @@
+from nanobot.agent.history_index import HistoryIndex
+from nanobot.agent.memory import MemoryStore
+from nanobot.agent.tools.history import RecallHistoryTool
+
+OLD_HISTORY = (
+    "[2026-01-05 09:00] User planned a trip to Kyoto and booked a ryokan.\n\n"
+    "[2026-01-20 18:30] Debugged a flaky pytest fixture in the billing service.\n\n"
+    "[2026-02-02 12:00] User asked for ramen recommendations in Kyoto.\n\n"
+)
+
+
+def test_imports_existing_history_and_indexes_appends(tmp_path) -> None:
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "memory" / "HISTORY.md").write_text(OLD_HISTORY)
+    store = MemoryStore(tmp_path)
+    assert len(store.history_index) == 3
+
+    store.append_history("[2026-02-10 08:00] Renewed the Kyoto rail pass.")
+    assert len(store.history_index) == 4
+    assert store.history_index.sync() == 0
+
+    # A fresh store reuses the on-disk index instead of re-importing
+    assert len(MemoryStore(tmp_path).history_index) == 4
+
+
+def test_search_ranks_and_filters_by_time(tmp_path) -> None:
+    (tmp_path / "HISTORY.md").write_text(OLD_HISTORY)
+    index = HistoryIndex(tmp_path / "HISTORY.md", tmp_path / "history.db")
+
+    hits = index.search("kyoto ramen")
+    assert hits[0].ts == "2026-02-02 12:00"
+    assert "**ramen**" in hits[0].snippet
+
+    assert [h.ts for h in index.search("kyoto", until="2026-01-31")] == ["2026-01-05 09:00"]
+    assert [h.ts for h in index.search("kyoto", since="2026-02-01")] == ["2026-02-02 12:00"]
+    assert index.search("pytest", since="2026-02-01") == []
+
+
+def test_rewritten_history_is_reindexed(tmp_path) -> None:
+    path = tmp_path / "HISTORY.md"
+    path.write_text(OLD_HISTORY)
+    index = HistoryIndex(path, tmp_path / "history.db")
+    assert index.sync() == 3 and index.sync() == 0
+    path.write_text("[2026-03-01 10:00] Only entry left.\n\n")
+    assert index.sync() == 1
+    assert len(index) == 1
+
+
+def test_appends_to_short_history_do_not_rebuild(tmp_path) -> None:
+    path = tmp_path / "HISTORY.md"
+    index = HistoryIndex(path, tmp_path / "history.db")
+    for n in range(4):
+        with open(path, "a") as f:
+            f.write(f"[2026-03-0{n + 1} 10:00] Note {n}.\n\n")
+        assert index.sync() == 1
+    assert len(index) == 4
+
+    # Same size, different bytes: still detected as a rewrite
+    path.write_text(path.read_text().replace("Note 0", "Note X"))
+    assert index.sync() == 4
+    assert len(index) == 4
+
+
+async def test_recall_history_tool(tmp_path) -> None:
+    store = MemoryStore(tmp_path)
+    for entry in OLD_HISTORY.strip().split("\n\n"):
+        store.append_history(entry)
+    tool = RecallHistoryTool(store.history_index)
+
+    result = await tool.execute(query="billing fixture")
+    assert result.startswith("[2026-01-20 18:30]")
+    assert "No history entries" in await tool.execute(query="volcano")
+    recent = await tool.execute(query="", limit=1)
+    assert recent.startswith("[2026-02-02 12:00]")
@@ -0,0 +1,97 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from nanobot.agent.loop import AgentLoop  # noqa: E402
+from nanobot.agent.semantic import HashingEmbedder, SemanticIndex  # noqa: E402
+from nanobot.bus.queue import MessageBus  # noqa: E402
+from nanobot.config.schema import SemanticSearchConfig  # noqa: E402
+from nanobot.providers.base import LLMProvider, LLMResponse  # noqa: E402
+from nanobot.session.manager import SessionManager  # noqa: E402
+
+
+def _index(tmp_path, dim: int = 256) -> SemanticIndex:
+    return SemanticIndex(
+        index_dir=tmp_path / "memory" / "semantic",
+        sessions_dir=tmp_path / "sessions",
+        history_file=tmp_path / "memory" / "HISTORY.md",
+        embedder=HashingEmbedder(dim),
+    )
+
+
+def _add_messages(manager: SessionManager, key: str, texts: list[str]) -> None:
+    session = manager.get_or_create(key)
+    for text in texts:
+        session.add_message("user", text)
+    manager.save(session)
+
+
+def test_hashing_embedder_is_deterministic_and_normalized() -> None:
+    a = HashingEmbedder(64).embed(["the quick brown fox", ""])
+    b = HashingEmbedder(64).embed(["the quick brown fox", ""])
+    assert np.array_equal(a, b)
+    assert abs(float(np.linalg.norm(a[0])) - 1.0) < 1e-5
+    assert not a[1].any()
+
+
+def test_index_is_incremental_and_persistent(tmp_path) -> None:
+    manager = SessionManager(tmp_path)
+    _add_messages(manager, "telegram:1", ["my dentist appointment is on friday", "buy oat milk"])
+    (tmp_path / "memory").mkdir(exist_ok=True)
+    (tmp_path / "memory" / "HISTORY.md").write_text(
+        "[2026-01-03 10:00] Discussed renewing the car insurance policy.\n\n"
+    )
+
+    index = _index(tmp_path)
+    assert index.refresh() == 3
+    assert index.refresh() == 0
+
+    _add_messages(manager, "telegram:1", ["remind me about the dentist"])
+    assert index.refresh() == 1
+
+    hits = index.search("car insurance policy", limit=2)
+    assert hits[0].source == "history" and hits[0].ts == "2026-01-03 10:00"
+    assert index.search("dentist appointment", source="sessions")[0].ref == "telegram:1"
+    assert all(h.source == "history" for h in index.search("dentist", source="history"))
+
+    reopened = _index(tmp_path)
+    assert reopened.count == 4 and reopened.refresh() == 0
+    assert reopened.search("oat milk")[0].text == "user: buy oat milk"
+
+
+def test_index_grows_past_initial_capacity(tmp_path) -> None:
+    manager = SessionManager(tmp_path)
+    _add_messages(manager, "cli:bulk", [f"note number {i} about topic{i}" for i in range(1500)])
+    index = _index(tmp_path, dim=256)
+    assert index.refresh() == 1500
+    assert index._capacity == 2048
+    assert index.search("note number 1234 about topic1234")[0].text.endswith("topic1234")
+
+
+def test_embedder_change_rebuilds(tmp_path) -> None:
+    _add_messages(SessionManager(tmp_path), "cli:x", ["hello world"])
+    _index(tmp_path, dim=64).refresh()
+    index = _index(tmp_path, dim=128)
+    assert index.count == 0
+    assert index.refresh() == 1
+
+
+class NoopProvider(LLMProvider):
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        return LLMResponse(content="ok")
+
+    def get_default_model(self) -> str:
+        return "fake"
+
+
+async def test_semantic_search_tool_registered_when_enabled(tmp_path) -> None:
+    loop = AgentLoop(
+        bus=MessageBus(), provider=NoopProvider(), workspace=tmp_path,
+        semantic_search=SemanticSearchConfig(enabled=True, dim=128),
+    )
+    _add_messages(loop.sessions, "slack:team", ["the staging database password rotates monthly"])
+    result = await loop.tools.execute("semantic_search", {"query": "staging database password"})
+    assert "slack:team" in result and "rotates monthly" in result
+
+    plain = AgentLoop(bus=MessageBus(), provider=NoopProvider(), workspace=tmp_path)
+    assert not plain.tools.has("semantic_search")
@@ -0,0 +1,68 @@
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.session.blobs import BlobStore
+from nanobot.session.manager import Session
+
+
+class ScriptedProvider(LLMProvider):
+    def __init__(self, responses: list[LLMResponse]):
+        super().__init__()
+        self.responses = responses
+        self.requests: list[list[dict]] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        self.requests.append(list(messages))
+        return self.responses.pop(0)
+
+    def get_default_model(self) -> str:
+        return "fake"
+
+
+def test_blob_store_is_content_addressed(tmp_path) -> None:
+    store = BlobStore(tmp_path)
+    ref = store.put("payload")
+    assert store.put("payload") == ref and len(ref) == BlobStore.REF_LEN
+    assert store.get(ref) == "payload"
+    assert store.get("../../etc/passwd") is None
+
+
+def test_history_skips_orphaned_tool_results() -> None:
+    session = Session(key="t:1")
+    session.add_message("user", "hi")
+    session.add_message("assistant", "", tool_calls=[{"id": "1", "type": "function",
+                                                      "function": {"name": "x", "arguments": "{}"}}])
+    session.add_message("tool", "result", tool_call_id="1", name="x")
+    session.add_message("assistant", "done")
+
+    assert [m["role"] for m in session.get_history(max_messages=2)] == ["assistant"]
+    history = session.get_history(max_messages=3)
+    assert history[0]["tool_calls"] and history[0]["content"] is None
+
+
+async def test_tool_calls_are_persisted_with_large_results_out_of_line(tmp_path) -> None:
+    big = "x" * 5000
+    (tmp_path / "big.txt").write_text(big)
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[
+            ToolCallRequest(id="c1", name="read_file", arguments={"path": str(tmp_path / "big.txt")}),
+        ]),
+        LLMResponse(content="It is all x."),
+        LLMResponse(content="Still all x."),
+    ])
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, persist_tool_calls=True)
+
+    await loop.process_direct("what is in big.txt?", session_key="cli:test")
+
+    session = loop.sessions.get_or_create("cli:test")
+    roles = [m["role"] for m in session.messages]
+    assert roles == ["user", "assistant", "tool", "assistant"]
+    tool_msg = session.messages[2]
+    assert len(tool_msg["content"]) < 3000
+    assert loop.blobs.get(tool_msg["blob"]) == big
+    assert await loop.tools.execute("read_tool_result", {"ref": tool_msg["blob"], "limit": 10}) \
+        == f"[chars 0-10 of 5000; more remains]\n{'x' * 10}"
+
+    await loop.process_direct("and again?", session_key="cli:test")
+    history = provider.requests[-1]
+    assert any(m.get("tool_call_id") == "c1" for m in history)
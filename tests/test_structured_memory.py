@@ -0,0 +1,102 @@
+from nanobot.agent.context import ContextBuilder
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.memory import MemoryStore, StructuredMemoryStore, make_memory_store
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse
+
+
+def _store(tmp_path, **kwargs) -> StructuredMemoryStore:
+    store = StructuredMemoryStore(tmp_path, **kwargs)
+    store.apply_updates([
+        {"content": "User lives in Lisbon", "tags": ["profile"]},
+        {"content": "User prefers green tea over coffee", "tags": ["preferences"]},
+        {"content": "Project nanobot uses pytest for testing", "tags": ["projects"]},
+        {"content": "User's cat is called Miso", "tags": ["profile"]},
+    ], source="cli:direct")
+    return store
+
+
+def test_retrieval_injects_only_relevant_facts(tmp_path) -> None:
+    store = _store(tmp_path, top_k=2)
+    context = store.get_memory_context("what tea should I order?")
+    assert "green tea" in context
+    assert "2 of 4 facts" in context
+    assert len([line for line in context.splitlines() if line.startswith("- ")]) == 2
+
+
+def test_fact_level_updates_and_markdown_view(tmp_path) -> None:
+    store = _store(tmp_path)
+    tea = store.search("tea")[0]
+    cat = store.search("cat")[0]
+    store.apply_updates([
+        {"id": tea.id, "content": "User prefers black coffee now", "tags": ["preferences"]},
+        {"id": cat.id, "delete": True},
+    ])
+    contents = [f.content for f in store.all_facts()]
+    assert "User prefers black coffee now" in contents
+    assert "User's cat is called Miso" not in contents
+    assert store.get_fact(tea.id).created_at <= store.get_fact(tea.id).updated_at
+
+    markdown = store.memory_file.read_text()
+    assert "## preferences\n- User prefers black coffee now" in markdown
+
+
+def test_imports_and_syncs_existing_memory_md(tmp_path) -> None:
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "memory" / "MEMORY.md").write_text(
+        "# Long-term Memory\n\n## Profile\n- Name is Sam\n- Works as a nurse\n"
+    )
+    store = StructuredMemoryStore(tmp_path)
+    assert [(f.content, f.tags) for f in store.all_facts()] == [
+        ("Name is Sam", ["profile"]), ("Works as a nurse", ["profile"]),
+    ]
+
+    # Manual edits to the rendered file are picked up on the next read
+    text = store.memory_file.read_text().replace("- Works as a nurse\n", "- Works as a doctor\n")
+    store.memory_file.write_text(text)
+    store._rendered_mtime = -1  # force: same-second writes can share an mtime
+    assert "Works as a doctor" in store.get_memory_context("job")
+    assert "nurse" not in store.read_long_term()
+
+
+def test_make_memory_store_defaults_to_file(tmp_path) -> None:
+    assert type(make_memory_store(tmp_path)) is MemoryStore
+    assert isinstance(make_memory_store(tmp_path, "sqlite"), StructuredMemoryStore)
+    assert type(ContextBuilder(tmp_path).memory) is MemoryStore
+
+
+class FactProvider(LLMProvider):
+    def __init__(self):
+        super().__init__()
+        self.prompts: list[str] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        if tools is None:
+            self.prompts.append(messages[1]["content"])
+            return LLMResponse(content=(
+                '{"history_entries": ["[2026-01-01 10:00] Talked about tea."],'
+                ' "fact_updates": [{"content": "User drinks oolong", "tags": ["preferences"], "conversation": 1}]}'
+            ))
+        return LLMResponse(content="ok")
+
+    def get_default_model(self) -> str:
+        return "fake"
+
+
+async def test_consolidation_upserts_facts(tmp_path) -> None:
+    provider = FactProvider()
+    loop = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=tmp_path,
+        memory_window=4, memory_backend="sqlite",
+    )
+    loop.context.memory.upsert_fact("User likes tea", ["preferences"])
+    session = loop.sessions.get_or_create("cli:tea")
+    for i in range(6):
+        session.add_message("user", f"I had some tea #{i}")
+    await loop.process_direct("more tea", session_key="cli:tea")
+    await loop.consolidator.flush(timeout=5)
+
+    assert "] User likes tea (preferences)" in provider.prompts[0]
+    facts = {f.content: f for f in loop.context.memory.all_facts()}
+    assert facts["User drinks oolong"].source == "cli:tea"
+    assert "User likes tea" in facts
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from nanobot.agent.subagent import SubagentManager
+from nanobot.bus.queue import MessageBus
+from nanobot.config.schema import SubagentConfig
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class GatedProvider(LLMProvider):
+    """Blocks every call until ``gate`` is set; tracks peak concurrency."""
+
+    def __init__(self, response: LLMResponse | None = None):
+        super().__init__()
+        self.gate = asyncio.Event()
+        self.response = response or LLMResponse(content="done")
+        self.active = 0
+        self.peak = 0
+        self.last_prompts: list[str] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        self.last_prompts.append(messages[-1].get("content") or "")
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await self.gate.wait()
+            return self.response
+        finally:
+            self.active -= 1
+
+    def get_default_model(self) -> str:
+        return "fake"
+
+
+def _manager(tmp_path, provider, **cfg) -> SubagentManager:
+    return SubagentManager(provider=provider, workspace=tmp_path, bus=MessageBus(), config=SubagentConfig(**cfg))
+
+
+async def test_spawn_respects_concurrency_and_quota(tmp_path) -> None:
+    provider = GatedProvider()
+    manager = _manager(tmp_path, provider, max_concurrent=2, per_session_limit=3)
+
+    replies = [await manager.spawn(f"task {i}", origin_chat_id="a") for i in range(4)]
+    assert "started" in replies[0] and "queued" in replies[2]
+    assert replies[3].startswith("Error") and "already has 3" in replies[3]
+    assert "queued" in await manager.spawn("other chat", origin_chat_id="b")
+
+    await asyncio.sleep(0.05)
+    assert provider.peak == 2
+    assert manager.get_running_count() == 2
+
+    provider.gate.set()
+    for _ in range(50):
+        if not manager.list_tasks():
+            break
+        await asyncio.sleep(0.01)
+    assert manager.list_tasks() == []
+    assert manager.bus.inbound_size == 4
+
+
+async def test_cancel_only_within_origin(tmp_path) -> None:
+    manager = _manager(tmp_path, GatedProvider())
+    await manager.spawn("long task", origin_chat_id="a")
+    task = manager.list_tasks()[0]
+    await asyncio.sleep(0)
+
+    assert not manager.cancel(task.id, "cli:b")
+    assert manager.cancel(task.id, "cli:a")
+    await asyncio.sleep(0.01)
+    assert manager.list_tasks() == []
+    assert manager.bus.inbound_size == 0
+
+
+async def test_token_budget_stops_subagent(tmp_path) -> None:
+    provider = GatedProvider(LLMResponse(
+        content="still looking",
+        tool_calls=[ToolCallRequest(id="1", name="list_dir", arguments={"path": str(tmp_path)})],
+        usage={"prompt_tokens": 900, "completion_tokens": 200, "total_tokens": 1100},
+    ))
+    provider.gate.set()
+    manager = _manager(tmp_path, provider, token_budget=2000)
+    await manager.spawn("explore", origin_chat_id="a")
+    registry = manager.tools
+    await asyncio.sleep(0.05)
+
+    announce = await manager.bus.consume_inbound()
+    assert len(provider.last_prompts) == 3
+    assert "token budget (2200 tokens)" in provider.last_prompts[-1]
+    assert "still looking" in announce.content
+    assert manager.tools is registry
+
+
+def test_config_rejects_zero_concurrency():
+    with pytest.raises(ValidationError):
+        SubagentConfig(max_concurrent=0)
+    with pytest.raises(ValidationError):
+        SubagentConfig.model_validate({"maxConcurrent": 0})
@@ -0,0 +1,76 @@
+from nanobot.agent.compaction import ResultStore, ToolResultCompactor
+from nanobot.agent.runner import AgentRunner
+from nanobot.agent.tools.filesystem import ReadFileTool
+from nanobot.agent.tools.history import ReadToolResultTool
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+BIG = "".join(f"line {i:05d}\n" for i in range(2000))  # 22k chars
+
+
+def test_compact_keeps_head_tail_and_ref() -> None:
+    compactor = ToolResultCompactor(threshold=1000, head_chars=100, tail_chars=50)
+    text = compactor.compact_text("web_fetch", BIG)
+    assert text.startswith(BIG[:100]) and text.endswith(BIG[-50:])
+    ref = text.split('ref="')[1].split('"')[0]
+    assert compactor.store.get(ref) == BIG
+    assert compactor.compact_text("read_tool_result", BIG) is BIG
+
+
+def test_per_tool_thresholds() -> None:
+    compactor = ToolResultCompactor(threshold=1000, thresholds={"read_file": 0, "exec": 50000})
+    assert compactor.compact_text("read_file", BIG) is BIG
+    assert compactor.compact_text("exec", BIG) is BIG
+    assert len(compactor.compact_text("web_fetch", BIG)) < 3000
+
+
+def test_store_evicts_least_recently_used() -> None:
+    store = ResultStore(max_chars=10)
+    a = store.put("aaaaaa")
+    b = store.put("bbbbbb")
+    assert store.get(a) is None and store.get(b) == "bbbbbb"
+
+
+async def test_read_tool_result_pages_through_text() -> None:
+    store = ResultStore()
+    tool = ReadToolResultTool(store)
+    ref = store.put(BIG)
+    out = await tool.execute(ref=ref, offset=11, limit=11)
+    assert out == f"[chars 11-22 of {len(BIG)}; more remains]\nline 00001\n"
+    assert (await tool.execute(ref="nope")).startswith("Error")
+
+
+class RecordingProvider(LLMProvider):
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = responses
+        self.sizes: list[int] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        self.sizes.append(sum(len(m.get("content") or "") for m in messages))
+        return self.responses.pop(0)
+
+    def get_default_model(self) -> str:
+        return "fake"
+
+
+async def test_runner_compacts_results_after_one_round(tmp_path) -> None:
+    (tmp_path / "big.txt").write_text(BIG)
+    tools = ToolRegistry()
+    tools.register(ReadFileTool())
+
+    def read(name: str) -> LLMResponse:
+        return LLMResponse(content=None, tool_calls=[
+            ToolCallRequest(id=name, name="read_file", arguments={"path": str(tmp_path / name)}),
+        ])
+
+    provider = RecordingProvider([read("big.txt"), read("missing.txt"), LLMResponse(content="done")])
+    runner = AgentRunner(provider, tools, model="fake", compactor=ToolResultCompactor(threshold=1000))
+
+    messages = [{"role": "user", "content": "read it"}]
+    result = await runner.run(messages)
+
+    assert result.content == "done"
+    assert provider.sizes[1] > len(BIG)  # first round after the read sees it in full
+    assert provider.sizes[2] < 5000  # later rounds get the compacted version
+    assert "read_tool_result" in messages[2]["content"]
@@ -0,0 +1,125 @@
+from typing import Any
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.agent.tools.selector import ListToolsTool, ToolSelector
+from nanobot.bus.queue import MessageBus
+from nanobot.config.schema import ToolSelectionConfig
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class FakeMCPTool(Tool):
+    def __init__(self, name: str, description: str):
+        self._name = name
+        self._description = description
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return self._description
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {"query": {"type": "string"}}}
+
+    async def execute(self, **kwargs: Any) -> str:
+        return f"{self._name} ok"
+
+
+MCP_TOOLS = [
+    ("mcp_github_create_issue", "Create a new issue in a GitHub repository"),
+    ("mcp_github_list_pull_requests", "List pull requests for a GitHub repository"),
+    ("mcp_calendar_create_event", "Create a calendar event with attendees"),
+    ("mcp_calendar_list_events", "List upcoming calendar events"),
+    ("mcp_weather_forecast", "Get the weather forecast for a city"),
+    ("mcp_notion_search", "Search pages in a Notion workspace"),
+]
+
+
+def _registry() -> ToolRegistry:
+    reg = ToolRegistry()
+    for name, desc in MCP_TOOLS:
+        reg.register(FakeMCPTool(name, desc))
+    reg.register(FakeMCPTool("read_file", "Read a file"))
+    return reg
+
+
+def _names(defs: list[dict[str, Any]]) -> set[str]:
+    return {d["function"]["name"] for d in defs}
+
+
+def test_selector_ranks_relevant_tools_and_keeps_pinned() -> None:
+    selector = ToolSelector(_registry(), top_k=2)
+    names = _names(selector.select("what's on my calendar tomorrow? any events?"))
+    assert names == {"read_file", "mcp_calendar_list_events", "mcp_calendar_create_event"}
+
+
+def test_selector_sends_everything_when_under_top_k() -> None:
+    reg = _registry()
+    assert ToolSelector(reg, top_k=10).select("anything") is reg.get_definitions()
+
+
+def test_selector_boosts_recently_used_tools() -> None:
+    selector = ToolSelector(_registry(), top_k=1)
+    assert _names(selector.select("thanks!")) == {"read_file"}
+    selector.record_used(["mcp_weather_forecast", "read_file"])
+    assert _names(selector.select("thanks!")) == {"read_file", "mcp_weather_forecast"}
+
+
+def test_selector_reindexes_after_registry_change() -> None:
+    reg = _registry()
+    selector = ToolSelector(reg, top_k=1)
+    assert "mcp_jira_create_ticket" not in selector.search("jira ticket")
+    reg.register(FakeMCPTool("mcp_jira_create_ticket", "Create a Jira ticket"))
+    assert selector.search("jira ticket")[0] == "mcp_jira_create_ticket"
+
+
+async def test_list_tools_describes_matches() -> None:
+    tool = ListToolsTool(ToolSelector(_registry(), top_k=1))
+    result = await tool.execute(query="github pull requests")
+    assert result.splitlines()[1].startswith("- mcp_github_list_pull_requests:")
+
+
+class ScriptedProvider(LLMProvider):
+    def __init__(self, responses: list[LLMResponse]):
+        super().__init__()
+        self.responses = responses
+        self.sent_tools: list[set[str]] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        self.sent_tools.append(_names(tools or []))
+        return self.responses.pop(0)
+
+    def get_default_model(self) -> str:
+        return "fake"
+
+
+async def test_agent_loop_sends_subset_and_activates_listed_tools(tmp_path) -> None:
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[
+            ToolCallRequest(id="1", name="list_tools", arguments={"query": "notion pages"}),
+        ]),
+        LLMResponse(content=None, tool_calls=[
+            ToolCallRequest(id="2", name="mcp_notion_search", arguments={"query": "plans"}),
+        ]),
+        LLMResponse(content="done"),
+    ])
+    loop = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=tmp_path,
+        tool_selection=ToolSelectionConfig(enabled=True, top_k=2),
+    )
+    for name, desc in MCP_TOOLS:
+        loop.tools.register(FakeMCPTool(name, desc))
+
+    result = await loop.process_direct("check the weather forecast for Paris")
+
+    assert result == "done"
+    first, second, _ = provider.sent_tools
+    assert "exec" in first and "list_tools" in first
+    assert "mcp_weather_forecast" in first
+    assert "mcp_notion_search" not in first
+    assert "mcp_notion_search" in second
@@ -86,3 +86,33 @@ async def test_registry_returns_validation_error() -> None:
     reg.register(SampleTool())
     result = await reg.execute("sample", {"query": "hi"})
     assert "Invalid parameters" in result
+
+
+def test_validator_compiled_once_per_tool() -> None:
+    class CountingTool(SampleTool):
+        reads = 0
+
+        @property
+        def parameters(self) -> dict[str, Any]:
+            CountingTool.reads += 1
+            return super().parameters
+
+    tool = CountingTool()
+    for _ in range(5):
+        assert tool.validate_params({"query": "hi", "count": 2}) == []
+    assert tool.validate_params({"query": "hi", "count": 11}) == ["count must be <= 10"]
+    assert CountingTool.reads == 1
+
+
+def test_registry_caches_definitions_until_changed() -> None:
+    reg = ToolRegistry()
+    reg.register(SampleTool())
+    first = reg.get_definitions()
+    assert reg.get_definitions() is first
+    assert [d["function"]["name"] for d in first] == ["sample"]
+
+    reg.unregister("sample")
+    assert reg.get_definitions() == []
+
+    reg.register(SampleTool())
+    assert reg.get_definitions() is not first
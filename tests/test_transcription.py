@@ -0,0 +1,140 @@
+import asyncio
+import base64
+import json
+from pathlib import Path
+
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.whatsapp import WhatsAppChannel
+from nanobot.config.schema import TranscriptionConfig, WhatsAppConfig
+from nanobot.providers.transcription import TranscriptionService, make_transcription_service
+
+
+class FakeBackend:
+    def __init__(self, name: str, text: str, delay: float = 0):
+        self.name = name
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+
+    async def transcribe(self, file_path) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.text
+
+
+async def test_service_caches_by_content_and_falls_back(tmp_path):
+    a = tmp_path / "a.ogg"
+    b = tmp_path / "b.ogg"
+    a.write_bytes(b"same audio")
+    b.write_bytes(b"same audio")
+    failing, local = FakeBackend("groq", ""), FakeBackend("local", "hello there")
+    service = TranscriptionService([failing, local], cache_dir=tmp_path / "cache")
+
+    assert await service.transcribe(a) == "hello there"
+    assert await service.transcribe(b) == "hello there"
+    assert (failing.calls, local.calls) == (1, 1)
+
+    # Disk cache survives a new service
+    fresh = FakeBackend("local", "other")
+    assert await TranscriptionService([fresh], cache_dir=tmp_path / "cache").transcribe(a) == "hello there"
+    assert fresh.calls == 0
+    await service.close()
+
+
+async def test_service_bounds_queue_and_dedupes_concurrent(tmp_path):
+    slow = FakeBackend("local", "text", delay=0.05)
+    service = TranscriptionService([slow], workers=1, max_queue=1)
+    paths = []
+    for i in range(3):
+        p = tmp_path / f"{i}.ogg"
+        p.write_bytes(f"audio {i}".encode())
+        paths.append(p)
+
+    first = asyncio.create_task(service.transcribe(paths[0]))
+    await asyncio.sleep(0.02)  # the only worker is now busy with paths[0]
+    results = await asyncio.gather(
+        service.transcribe(paths[0]), service.transcribe(paths[1]), service.transcribe(paths[2]),
+    )
+    # paths[0] joins the running job, paths[1] waits in the queue, paths[2] is refused
+    assert [await first, *results] == ["text", "text", "text", ""]
+    assert slow.calls == 2
+    await service.close()
+
+
+def test_make_service_needs_a_backend(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    monkeypatch.setattr("nanobot.providers.transcription.LocalWhisperBackend.available", staticmethod(lambda: False))
+    assert make_transcription_service(TranscriptionConfig()) is None
+    assert make_transcription_service(TranscriptionConfig(enabled=False), groq_api_key="k") is None
+    service = make_transcription_service(TranscriptionConfig(), groq_api_key="k")
+    assert [b.name for b in service.backends] == ["groq"]
+
+
+async def test_whatsapp_voice_message_is_transcribed(tmp_path, monkeypatch):
+    monkeypatch.setattr("nanobot.channels.whatsapp.get_media_path", lambda: tmp_path)
+    bus = MessageBus()
+    backend = FakeBackend("local", "call me back")
+    channel = WhatsAppChannel(WhatsAppConfig(), bus, transcriber=TranscriptionService([backend]))
+
+    await channel._handle_bridge_message(json.dumps({
+        "type": "message", "id": "ABC", "sender": "123@s.whatsapp.net", "content": "[Voice Message]",
+        "audio": base64.b64encode(b"opus").decode(), "mimetype": "audio/ogg; codecs=opus",
+    }))
+    msg = await bus.consume_inbound()
+    assert msg.content == "[transcription: call me back]"
+    assert msg.media == [str(tmp_path / "wa_ABC.ogg")]
+    assert (tmp_path / "wa_ABC.ogg").read_bytes() == b"opus"
+
+
+async def test_whatsapp_transcribes_off_the_receive_loop_and_keeps_order(tmp_path, monkeypatch):
+    monkeypatch.setattr("nanobot.channels.whatsapp.get_media_path", lambda: tmp_path)
+    bus = MessageBus()
+    backend = FakeBackend("local", "first", delay=0.2)
+    channel = WhatsAppChannel(WhatsAppConfig(), bus, transcriber=TranscriptionService([backend]))
+
+    def frame(**fields) -> str:
+        return json.dumps({"type": "message", "sender": "123@s.whatsapp.net", **fields})
+
+    await asyncio.wait_for(channel._handle_bridge_message(frame(
+        id="V1", content="[Voice Message]", audio=base64.b64encode(b"opus").decode(),
+    )), timeout=0.1)
+    await asyncio.wait_for(channel._handle_bridge_message(frame(id="T2", content="second")), timeout=0.1)
+    await channel._handle_bridge_message(frame(id="T3", content="hi", sender="456@s.whatsapp.net"))
+
+    # Another chat is not held up; this chat's text waits behind the voice note
+    other = await asyncio.wait_for(bus.consume_inbound(), timeout=0.1)
+    assert other.content == "hi"
+    contents = [(await asyncio.wait_for(bus.consume_inbound(), timeout=1)).content for _ in range(2)]
+    assert contents == ["[transcription: first]", "second"]
+
+
+async def test_telegram_voice_is_published_after_transcription_without_blocking(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    from nanobot.channels.telegram import TelegramChannel
+    from nanobot.config.schema import TelegramConfig
+
+    monkeypatch.setattr("nanobot.utils.helpers.get_media_path", lambda: tmp_path)
+    bus = MessageBus()
+    backend = FakeBackend("local", "see you at noon", delay=0.2)
+    channel = TelegramChannel(TelegramConfig(), bus, transcriber=TranscriptionService([backend]))
+    monkeypatch.setattr(channel, "_start_typing", lambda chat_id: None)
+
+    async def download_to_drive(path):
+        Path(path).write_bytes(b"opus")
+
+    file = SimpleNamespace(download_to_drive=download_to_drive)
+    channel._app = SimpleNamespace(bot=SimpleNamespace(get_file=lambda file_id: asyncio.sleep(0, file)))
+    message = SimpleNamespace(
+        chat_id=42, text=None, caption=None, photo=None, audio=None, document=None,
+        voice=SimpleNamespace(file_id="voice-file-id-123456", mime_type="audio/ogg"),
+        message_id=1, chat=SimpleNamespace(type="private"),
+    )
+    user = SimpleNamespace(id=7, username="ann", first_name="Ann")
+
+    await asyncio.wait_for(
+        channel._on_message(SimpleNamespace(message=message, effective_user=user), None), timeout=0.1
+    )
+    msg = await asyncio.wait_for(bus.consume_inbound(), timeout=1)
+    assert msg.content == "[transcription: see you at noon]"
+    assert msg.media and msg.metadata["username"] == "ann"